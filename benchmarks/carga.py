@@ -0,0 +1,342 @@
+# benchmarks/carga.py
+# teste de carga das rotas principais sobre um banco temporário semeado com volumes
+# configuráveis (projetos, alunos por projeto, fração de cadastros pendentes). A mesma
+# sequência de requisições roda dentro do processo, pelo transporte ASGI do httpx, e
+# contra um trabalhador do uvicorn de verdade; o resultado (p50/p95/p99 e requisições
+# por segundo de cada rota) vai para um JSON, que pode ser comparado com o de outro commit
+#
+# uso, a partir da raiz do projeto:
+#   python -m benchmarks.carga [--projetos 20] [--alunos 15] [--pendentes 0.2]
+#                              [--requisicoes 300] [--concorrencia 8] [--modo ambos]
+#                              [--saida arquivo.json]
+#   python -m benchmarks.carga --comparar antes.json depois.json [--tolerancia 0.1]
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+# antes de importar a aplicação: custo do bcrypt fixo (sem calibrar a cada banco novo)
+# e limites de login que não bloqueiam as tentativas repetidas do próprio teste
+os.environ.setdefault("SENHA_CUSTO", "10")
+os.environ.setdefault("LOGIN_LIMITE_IP", "1000000")
+os.environ.setdefault("LOGIN_LIMITE_EMAIL", "1000000")
+
+import httpx
+
+from repositories import AlunoSql, ProjetoSql
+from util.Database import Database
+
+
+SENHA = "Senha@123"
+EMAIL_ADMIN, SENHA_ADMIN = AlunoSql.PARAMETROS_ADMIN[1], "123456"
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Hugo", "Isabela", "João"]
+SOBRENOMES = ["Almeida", "Barbosa", "Costa", "Dias", "Ferreira", "Gomes", "Lima", "Moreira", "Souza", "Teixeira"]
+PASTA_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+# o httpx registra cada requisição no nível INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@dataclass
+class Rota:
+    nome: str
+    metodo: str
+    url: str
+    status: int = 200
+    admin: bool = False
+    # corpo do formulário da i-ésima requisição
+    formulario: Callable[[int], dict] | None = None
+
+
+def montar_rotas(emails: list[str]) -> list[Rota]:
+    return [
+        Rota("GET /", "GET", "/"),
+        Rota("GET /login", "GET", "/login"),
+        # cada tentativa usa um aluno diferente: inclui a verificação do bcrypt e a gravação do token
+        Rota("POST /login", "POST", "/login", 302, formulario=lambda i: {"email": emails[i % len(emails)], "senha": SENHA}),
+        Rota("GET /aluno/listagem", "GET", "/aluno/listagem", admin=True),
+        Rota("GET /aluno/aprovar", "GET", "/aluno/aprovar", admin=True),
+        Rota("GET /projeto/listagem", "GET", "/projeto/listagem", admin=True),
+        Rota("GET /projeto/novo", "GET", "/projeto/novo", admin=True),
+    ]
+
+
+def semear(caminho: str, projetos: int, alunos: int, pendentes: float, semente: int) -> list[str]:
+    # cria o esquema completo (tabelas, migrações e gatilhos dos contadores) e insere os
+    # dados em uma transação; devolve os e-mails dos alunos aprovados, usados no login
+    from repositories.AlunoRepo import AlunoRepo
+    from repositories.ProjetoRepo import ProjetoRepo
+    from util.migrations import migrar
+    from util.passwordHashing import servicoSenhas
+    from util.security import obter_hash_senha
+
+    Database.caminho = caminho
+    ProjetoRepo.criarTabela()
+    AlunoRepo.criarTabela()
+    AlunoRepo.criarUsuarioAdmin()
+    migrar()
+    # um hash só, com o custo que a aplicação vai usar: o login não dispara rehash
+    hashSenha = obter_hash_senha(SENHA, servicoSenhas.configurar())
+    sorteio = random.Random(semente)
+    with Database.conexaoEscrita() as conexao:
+        conexao.executemany(
+            ProjetoSql.INSERIR,
+            [(f"Projeto {i:04d}", f"Descrição do projeto {i} para o teste de carga.") for i in range(1, projetos + 1)],
+        )
+        ids = [linha[0] for linha in conexao.execute(ProjetoSql.OBTER_TODOS_PARA_SELECT)]
+        linhas = []
+        for idProjeto in ids:
+            for j in range(alunos):
+                nome = f"{sorteio.choice(NOMES)} {sorteio.choice(SOBRENOMES)} {sorteio.choice(SOBRENOMES)}"
+                aprovado = sorteio.random() >= pendentes
+                linhas.append((nome, f"aluno{idProjeto}.{j}@exemplo.com", hashSenha, idProjeto, aprovado))
+        conexao.executemany(AlunoSql.INSERIR_IMPORTADO, linhas)
+    Database.fecharTodas()
+    return [linha[1] for linha in linhas if linha[4]]
+
+
+class SemCookies(http.cookiejar.CookieJar):
+    # cliente anônimo: o cookie devolvido pelo login não vale para as próximas requisições
+    def set_cookie(self, cookie):
+        pass
+
+
+def percentil(ordenados: list[float], fracao: float) -> float:
+    # interpolação linear entre as duas amostras vizinhas
+    posicao = (len(ordenados) - 1) * fracao
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def resumir(tempos: list[float], duracao: float, erros: int) -> dict:
+    ordenados = sorted(tempos)
+    return {
+        "requisicoes": len(tempos),
+        "erros": erros,
+        "p50Ms": round(percentil(ordenados, 0.50) * 1000, 3),
+        "p95Ms": round(percentil(ordenados, 0.95) * 1000, 3),
+        "p99Ms": round(percentil(ordenados, 0.99) * 1000, 3),
+        "mediaMs": round(statistics.fmean(ordenados) * 1000, 3),
+        "porSegundo": round(len(tempos) / duracao, 1),
+    }
+
+
+async def medir_rota(cliente: httpx.AsyncClient, rota: Rota, requisicoes: int, concorrencia: int) -> dict:
+    tempos = []
+    erros = 0
+    # as tarefas consomem o mesmo iterador: cada índice é usado uma vez só
+    indices = iter(range(requisicoes))
+
+    async def trabalhador():
+        nonlocal erros
+        for i in indices:
+            dados = rota.formulario(i) if rota.formulario else None
+            inicio = time.perf_counter()
+            resposta = await cliente.request(rota.metodo, rota.url, data=dados)
+            tempos.append(time.perf_counter() - inicio)
+            if resposta.status_code != rota.status:
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    return resumir(tempos, time.perf_counter() - inicio, erros)
+
+
+async def medir_rotas(criarCliente: Callable[..., httpx.AsyncClient], rotas: list[Rota], args) -> dict:
+    resultados = {}
+    async with criarCliente() as admin, criarCliente(cookies=httpx.Cookies(SemCookies())) as anonimo:
+        resposta = await admin.post("/login", data={"email": EMAIL_ADMIN, "senha": SENHA_ADMIN})
+        if resposta.status_code != 302:
+            raise RuntimeError(f"Login do administrador falhou ({resposta.status_code}).")
+        for rota in rotas:
+            cliente = admin if rota.admin else anonimo
+            # aquecimento: caches de página, sessão e templates, conexões do pool
+            await medir_rota(cliente, rota, max(args.requisicoes // 10, 1), args.concorrencia)
+            resultados[rota.nome] = await medir_rota(cliente, rota, args.requisicoes, args.concorrencia)
+            print(f"  {rota.nome:<22} {formatar(resultados[rota.nome])}", flush=True)
+    return resultados
+
+
+async def medir_asgi(caminho: str, rotas: list[Rota], args) -> dict:
+    Database.caminho = caminho
+    import main
+
+    def criarCliente(**kwargs):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://teste", **kwargs)
+
+    try:
+        return await medir_rotas(criarCliente, rotas, args)
+    finally:
+        await main.app.router.shutdown()
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def medir_uvicorn(caminho: str, rotas: list[Rota], args) -> dict:
+    porta = porta_livre()
+    processo = subprocess.Popen([sys.executable, "-m", "benchmarks.carga", "--servir", caminho, "--porta", str(porta)])
+    url = f"http://127.0.0.1:{porta}"
+
+    def criarCliente(**kwargs):
+        return httpx.AsyncClient(base_url=url, timeout=30, **kwargs)
+
+    try:
+        # a inicialização compila os estáticos e os templates antes de aceitar conexões
+        async with criarCliente() as cliente:
+            for _ in range(300):
+                if processo.poll() is not None:
+                    raise RuntimeError("O uvicorn terminou antes de aceitar conexões.")
+                try:
+                    await cliente.get("/login")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("O uvicorn não aceitou conexões a tempo.")
+        return await medir_rotas(criarCliente, rotas, args)
+    finally:
+        processo.terminate()
+        processo.wait(timeout=30)
+
+
+def servir(caminho: str, porta: int):
+    import uvicorn
+
+    Database.caminho = caminho
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=porta, workers=1, log_level="warning", access_log=False)
+
+
+def formatar(resultado: dict) -> str:
+    return (
+        f"p50 {resultado['p50Ms']:>8.2f} ms  p95 {resultado['p95Ms']:>8.2f} ms  "
+        f"p99 {resultado['p99Ms']:>8.2f} ms  {resultado['porSegundo']:>8.1f} req/s  "
+        f"erros {resultado['erros']}"
+    )
+
+
+def commit_atual() -> str | None:
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip()
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix="carga-")
+    try:
+        base = os.path.join(pasta, "base.db")
+        inicio = time.perf_counter()
+        emails = semear(base, args.projetos, args.alunos, args.pendentes, args.semente)
+        print(f"banco semeado em {time.perf_counter() - inicio:.1f} s ({len(emails)} alunos aprovados)")
+        rotas = montar_rotas(emails)
+        modos = ["asgi", "uvicorn"] if args.modo == "ambos" else [args.modo]
+        resultados = {}
+        for modo in modos:
+            # cada modo começa de uma cópia do mesmo banco semeado
+            caminho = os.path.join(pasta, f"{modo}.db")
+            shutil.copyfile(base, caminho)
+            print(modo)
+            medir = medir_asgi if modo == "asgi" else medir_uvicorn
+            resultados[modo] = asyncio.run(medir(caminho, rotas, args))
+    finally:
+        Database.fecharTodas()
+        shutil.rmtree(pasta, ignore_errors=True)
+    commit = commit_atual()
+    relatorio = {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "configuracao": {
+            "projetos": args.projetos,
+            "alunosPorProjeto": args.alunos,
+            "fracaoPendentes": args.pendentes,
+            "semente": args.semente,
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+        },
+        "resultados": resultados,
+    }
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"carga-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"resultado gravado em {saida}")
+
+
+def comparar(antes: str, depois: str, tolerancia: float) -> int:
+    # compara o p95 e a vazão de cada rota; devolve 1 se alguma piorou além da tolerância
+    with open(antes, encoding="utf-8") as arquivo:
+        a = json.load(arquivo)
+    with open(depois, encoding="utf-8") as arquivo:
+        d = json.load(arquivo)
+    if a["configuracao"] != d["configuracao"]:
+        print("aviso: os dois resultados usaram configurações diferentes")
+    print(f"{a['commit']} -> {d['commit']}")
+    regressoes = 0
+    for modo, rotas in d["resultados"].items():
+        print(modo)
+        for nome, depoisRota in rotas.items():
+            antesRota = a["resultados"].get(modo, {}).get(nome)
+            if antesRota is None:
+                continue
+            variacaoP95 = depoisRota["p95Ms"] / antesRota["p95Ms"] - 1
+            variacaoVazao = depoisRota["porSegundo"] / antesRota["porSegundo"] - 1
+            piorou = variacaoP95 > tolerancia or variacaoVazao < -tolerancia
+            regressoes += piorou
+            print(
+                f"  {nome:<22} p95 {antesRota['p95Ms']:>8.2f} -> {depoisRota['p95Ms']:>8.2f} ms ({variacaoP95:+.0%})  "
+                f"{antesRota['porSegundo']:>8.1f} -> {depoisRota['porSegundo']:>8.1f} req/s ({variacaoVazao:+.0%})"
+                f"{'  REGRESSÃO' if piorou else ''}"
+            )
+    return 1 if regressoes else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas principais.")
+    parser.add_argument("--projetos", type=int, default=20)
+    parser.add_argument("--alunos", type=int, default=15, help="alunos por projeto")
+    parser.add_argument("--pendentes", type=float, default=0.2, help="fração de cadastros pendentes")
+    parser.add_argument("--semente", type=int, default=2023)
+    parser.add_argument("--requisicoes", type=int, default=300, help="requisições medidas por rota")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--modo", choices=["asgi", "uvicorn", "ambos"], default="ambos")
+    parser.add_argument("--saida", help=f"arquivo JSON (padrão: {PASTA_RESULTADOS}/carga-<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument("--tolerancia", type=float, default=0.1)
+    # uso interno: o processo do uvicorn, iniciado pelo modo "uvicorn"
+    parser.add_argument("--servir", help=argparse.SUPPRESS)
+    parser.add_argument("--porta", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.servir:
+        servir(args.servir, args.porta)
+    elif args.comparar:
+        sys.exit(comparar(*args.comparar, args.tolerancia))
+    else:
+        executar(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# benchmarks/micro.py
+# micro-benchmarks das funções mais chamadas, camada por camada: todos os métodos de
+# AlunoRepo e ProjetoRepo em bancos temporários de vários tamanhos, as validações de
+# util/validators.py, os filtros de util/templateFilters.py e as funções de
+# util/security.py. Para cada caso registra o tempo por chamada (melhor de 5 rodadas
+# do timeit) e, medido à parte com o tracemalloc, o pico de memória alocada durante
+# uma chamada e quantos blocos continuam alocados depois dela (o resultado devolvido).
+# A saída é um JSON, comparável com o de outro commit, como o de benchmarks/carga.py
+#
+# uso, a partir da raiz do projeto:
+#   python -m benchmarks.micro [--tamanhos 100,1000,10000] [--filtro AlunoRepo] [--saida arquivo.json]
+#   python -m benchmarks.micro --comparar antes.json depois.json [--tolerancia 0.1]
+import argparse
+import collections
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from benchmarks.carga import PASTA_RESULTADOS, SENHA, commit_atual, semear
+from models.Aluno import Aluno
+from models.Projeto import Projeto
+from repositories.AlunoRepo import AlunoRepo
+from repositories.ProjetoRepo import ProjetoRepo
+from routes.AlunoRoutes import ESQUEMA_NOVO
+from util.Database import Database
+from util.passwordHashing import servicoSenhas
+from util.security import gerar_token, obter_custo_hash, obter_hash_senha, verificar_senha
+from util.templateFilters import (
+    capitalizar_nome_proprio,
+    formatarData,
+    formatarIdParaImagem,
+    formatarSrcsetImagem,
+)
+from util.validators import *
+
+
+ALUNOS_POR_PROJETO = 25
+# métodos executados só na inicialização da aplicação
+IGNORADOS = {"criarTabela", "criarUsuarioAdmin"}
+
+
+@dataclass
+class Caso:
+    grupo: str
+    nome: str
+    funcao: Callable[[], object]
+
+
+def casos_validacao() -> list[Caso]:
+    casos = [
+        ("is_not_empty", lambda: is_not_empty("Maria", "nome", {})),
+        ("is_email", lambda: is_email("maria.silva@exemplo.com", "email", {})),
+        ("is_cpf", lambda: is_cpf("123.456.789-09", "cpf", {})),
+        ("is_cnpj", lambda: is_cnpj("12.345.678/0001-95", "cnpj", {})),
+        ("is_phone_number", lambda: is_phone_number("(28) 99999-9999", "telefone", {})),
+        ("is_cep", lambda: is_cep("29300-000", "cep", {})),
+        ("is_person_name", lambda: is_person_name("Maria", "nome", {})),
+        ("is_person_fullname", lambda: is_person_fullname("Maria da Silva", "nome", {})),
+        ("is_project_name", lambda: is_project_name("Projeto Integrador", "nome", {})),
+        ("is_password", lambda: is_password("Senha@123", "senha", {})),
+        ("is_password (inválida)", lambda: is_password("123", "senha", {})),
+        ("is_matching_fields", lambda: is_matching_fields("Senha@123", "confSenha", "Senha@123", "Senha", {})),
+        ("ESQUEMA_NOVO.validar", lambda: ESQUEMA_NOVO.validar(
+            {"nome": "maria da silva", "email": "Maria@Exemplo.com", "senha": SENHA, "confSenha": SENHA, "idProjeto": 1}
+        )),
+    ]
+    return [Caso("validators", nome, funcao) for nome, funcao in casos]
+
+
+def casos_filtros() -> list[Caso]:
+    casos = [
+        ("capitalizar_nome_proprio", lambda: capitalizar_nome_proprio("MARIA DAS DORES DA SILVA")),
+        ("formatarData", lambda: formatarData("2023-10-18")),
+        ("formatarIdParaImagem", lambda: formatarIdParaImagem(42, "card")),
+        ("formatarSrcsetImagem", lambda: formatarSrcsetImagem(42)),
+    ]
+    return [Caso("templateFilters", nome, funcao) for nome, funcao in casos]
+
+
+def casos_seguranca() -> list[Caso]:
+    custo = servicoSenhas.configurar()
+    hashSenha = obter_hash_senha(SENHA, custo)
+    casos = [
+        (f"obter_hash_senha (custo {custo})", lambda: obter_hash_senha(SENHA, custo)),
+        (f"verificar_senha (custo {custo})", lambda: verificar_senha(SENHA, hashSenha)),
+        ("obter_custo_hash", lambda: obter_custo_hash(hashSenha)),
+        ("gerar_token", gerar_token),
+    ]
+    return [Caso("security", nome, funcao) for nome, funcao in casos]
+
+
+def casos_repositorios(emails: list[str]) -> list[Caso]:
+    # as escritas deixam o banco como estava (mesmos valores, ou inserção seguida de
+    # exclusão), para as medições seguintes verem sempre o mesmo volume de dados
+    email = emails[len(emails) // 2]
+    aluno = AlunoRepo.obterPaginaCursor(1).itens[0]
+    projetos = ProjetoRepo.obterTodosParaSelect()
+    idProjeto = projetos[len(projetos) // 2].id
+    idsProjetos = [projeto.id for projeto in projetos[:10]]
+    hashSenha = AlunoRepo.obterSenhaDeEmail(email)
+    token = gerar_token()
+    AlunoRepo.alterarToken(email, token)
+    projeto = ProjetoRepo.obterPorId(idProjeto)
+
+    def inserirExcluirAluno():
+        novo = AlunoRepo.inserir(Aluno(0, "Aluno Temporario", "temporario@exemplo.com", hashSenha, idProjeto=idProjeto))
+        AlunoRepo.excluir(novo.id)
+
+    def inserirVariosAlunos():
+        AlunoRepo.inserirVarios(
+            [Aluno(0, f"Aluno Lote {i}", f"lote{i}@exemplo.com", hashSenha, idProjeto=idProjeto) for i in range(20)]
+        )
+        with Database.conexao() as conexao:
+            ids = [linha[0] for linha in conexao.execute("SELECT id FROM aluno WHERE email LIKE 'lote%'")]
+        AlunoRepo.recusarCadastros(ids)
+
+    def aprovarDesaprovar():
+        AlunoRepo.aprovarCadastro(aluno.id, False)
+        AlunoRepo.aprovarCadastro(aluno.id, True)
+
+    def aprovarRecusarLote():
+        AlunoRepo.aprovarCadastro(aluno.id, False)
+        AlunoRepo.aprovarCadastros([aluno.id])
+        AlunoRepo.recusarCadastros([aluno.id])
+
+    def inserirExcluirProjeto():
+        novo = ProjetoRepo.inserir(Projeto(0, "Projeto Temporario", "Descrição temporária."))
+        ProjetoRepo.excluir(novo.id)
+
+    def inserirVariosProjetos():
+        ProjetoRepo.inserirVarios([Projeto(0, f"Projeto Lote {i}", "Descrição.") for i in range(20)])
+        for p in ProjetoRepo.obterTodosParaSelect():
+            if p.nome.startswith("Projeto Lote"):
+                ProjetoRepo.excluir(p.id)
+
+    casos = [
+        ("AlunoRepo", "inserir+excluir", inserirExcluirAluno),
+        ("AlunoRepo", "alterar", lambda: AlunoRepo.alterar(aluno)),
+        ("AlunoRepo", "alterarSenha", lambda: AlunoRepo.alterarSenha(aluno.id, hashSenha)),
+        ("AlunoRepo", "substituirHashSenha", lambda: AlunoRepo.substituirHashSenha(email, hashSenha, hashSenha)),
+        ("AlunoRepo", "alterarToken", lambda: AlunoRepo.alterarToken(email, token)),
+        ("AlunoRepo", "alterarAdmin", lambda: AlunoRepo.alterarAdmin(aluno.id, False)),
+        ("AlunoRepo", "aprovarCadastro (ida e volta)", aprovarDesaprovar),
+        ("AlunoRepo", "aprovarCadastros+recusarCadastros", aprovarRecusarLote),
+        ("AlunoRepo", "emailExiste", lambda: AlunoRepo.emailExiste(email)),
+        ("AlunoRepo", "obterSenhaDeEmail", lambda: AlunoRepo.obterSenhaDeEmail(email)),
+        ("AlunoRepo", "inserirVarios (20)+recusarCadastros", inserirVariosAlunos),
+        ("AlunoRepo", "obterEmailsExistentes (50)", lambda: AlunoRepo.obterEmailsExistentes(emails[:50])),
+        ("AlunoRepo", "percorrerTodos", lambda: collections.deque(AlunoRepo.percorrerTodos(), maxlen=0)),
+        ("AlunoRepo", "obterTodos", AlunoRepo.obterTodos),
+        ("AlunoRepo", "obterPagina", lambda: AlunoRepo.obterPagina(2, 10)),
+        ("AlunoRepo", "obterPaginaComContagens", lambda: AlunoRepo.obterPaginaComContagens(2, 10)),
+        ("AlunoRepo", "obterPaginaCursor", lambda: AlunoRepo.obterPaginaCursor(10)),
+        ("AlunoRepo", "obterQtdePaginas", lambda: AlunoRepo.obterQtdePaginas(10)),
+        ("AlunoRepo", "obterPaginaAprovar", lambda: AlunoRepo.obterPaginaAprovar(1, 10)),
+        ("AlunoRepo", "obterPaginaAprovarComContagens", lambda: AlunoRepo.obterPaginaAprovarComContagens(1, 10)),
+        ("AlunoRepo", "obterPaginaAprovarCursor", lambda: AlunoRepo.obterPaginaAprovarCursor(10)),
+        ("AlunoRepo", "obterQtdePaginasAprovar", lambda: AlunoRepo.obterQtdePaginasAprovar(10)),
+        ("AlunoRepo", "obterQtdeAprovar", AlunoRepo.obterQtdeAprovar),
+        ("AlunoRepo", "obterPorId", lambda: AlunoRepo.obterPorId(aluno.id)),
+        ("AlunoRepo", "obterUsuarioPorToken", lambda: AlunoRepo.obterUsuarioPorToken(token)),
+        ("ProjetoRepo", "inserir+excluir", inserirExcluirProjeto),
+        ("ProjetoRepo", "alterar", lambda: ProjetoRepo.alterar(projeto)),
+        ("ProjetoRepo", "inserirVarios (20)+excluir", inserirVariosProjetos),
+        ("ProjetoRepo", "percorrerTodos", lambda: collections.deque(ProjetoRepo.percorrerTodos(), maxlen=0)),
+        ("ProjetoRepo", "obterTodos", ProjetoRepo.obterTodos),
+        ("ProjetoRepo", "obterTodosParaSelect", ProjetoRepo.obterTodosParaSelect),
+        ("ProjetoRepo", "obterPagina", lambda: ProjetoRepo.obterPagina(2, 10)),
+        ("ProjetoRepo", "obterPaginaComContagens", lambda: ProjetoRepo.obterPaginaComContagens(2, 10)),
+        ("ProjetoRepo", "obterPaginaCursor", lambda: ProjetoRepo.obterPaginaCursor(10)),
+        ("ProjetoRepo", "obterQtdePaginas", lambda: ProjetoRepo.obterQtdePaginas(10)),
+        ("ProjetoRepo", "obterPorId", lambda: ProjetoRepo.obterPorId(idProjeto)),
+        ("ProjetoRepo", "obterIntegrantes", lambda: ProjetoRepo.obterIntegrantes(idProjeto)),
+        ("ProjetoRepo", "obterIntegrantesPorProjetos (10)", lambda: ProjetoRepo.obterIntegrantesPorProjetos(idsProjetos)),
+        ("ProjetoRepo", "obterTodosComIntegrantes", ProjetoRepo.obterTodosComIntegrantes),
+    ]
+    return [Caso(grupo, nome, funcao) for grupo, nome, funcao in casos]
+
+
+def metodos_sem_medicao(casos: list[Caso]) -> list[str]:
+    # avisa quando um método novo dos repositórios ainda não tem caso aqui
+    medidos = {(caso.grupo, parte.split(" ")[0]) for caso in casos for parte in caso.nome.split("+")}
+    faltando = []
+    for classe in (AlunoRepo, ProjetoRepo):
+        for nome in vars(classe):
+            if nome.startswith("_") or nome in IGNORADOS:
+                continue
+            if (classe.__name__, nome) not in medidos:
+                faltando.append(f"{classe.__name__}.{nome}")
+    return faltando
+
+
+def medir_tempo(funcao: Callable[[], object]) -> tuple[float, int]:
+    # quantidade de chamadas ajustada para cada rodada durar ao menos 0,2 s; melhor de 5
+    temporizador = timeit.Timer(funcao)
+    chamadas, _ = temporizador.autorange()
+    melhor = min(temporizador.repeat(repeat=5, number=chamadas))
+    return melhor / chamadas * 1_000_000, chamadas
+
+
+def medir_alocacoes(funcao: Callable[[], object]) -> tuple[int, int]:
+    # uma chamada já aquecida (caches de instruções SQL, de nomes, de expressões);
+    # as alocações do próprio tracemalloc (os snapshots) ficam de fora
+    funcao()
+    filtros = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.take_snapshot().filter_traces(filtros)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        resultado = funcao()
+        pico = tracemalloc.get_traced_memory()[1] - base
+        depois = tracemalloc.take_snapshot().filter_traces(filtros)
+    finally:
+        tracemalloc.stop()
+    del resultado
+    blocos = sum(max(diferenca.count_diff, 0) for diferenca in depois.compare_to(antes, "lineno"))
+    return max(pico, 0), blocos
+
+
+def medir_caso(caso: Caso, tamanho: int | None) -> dict:
+    resultado = {"grupo": caso.grupo, "nome": caso.nome, "tamanho": tamanho}
+    try:
+        microssegundos, chamadas = medir_tempo(caso.funcao)
+        pico, blocos = medir_alocacoes(caso.funcao)
+    except Exception as erro:
+        resultado["erro"] = f"{type(erro).__name__}: {erro}"
+        print(f"  {caso.grupo + '.' + caso.nome:<60} {resultado['erro']}", flush=True)
+        return resultado
+    resultado.update(usPorChamada=round(microssegundos, 3), chamadas=chamadas, picoBytes=pico, blocos=blocos)
+    print(
+        f"  {caso.grupo + '.' + caso.nome:<60} {microssegundos:>12.2f} µs"
+        f"  pico {pico / 1024:>9.1f} KiB  blocos {blocos:>6}",
+        flush=True,
+    )
+    return resultado
+
+
+def executar(args):
+    filtro = args.filtro or ""
+    resultados = []
+    casos = []
+    for grupo in (casos_validacao(), casos_filtros(), casos_seguranca()):
+        for caso in grupo:
+            if filtro in f"{caso.grupo}.{caso.nome}":
+                resultados.append(medir_caso(caso, None))
+    for tamanho in args.tamanhos:
+        pasta = tempfile.mkdtemp(prefix="micro-")
+        try:
+            projetos = max(tamanho // ALUNOS_POR_PROJETO, 1)
+            emails = semear(os.path.join(pasta, "micro.db"), projetos, ALUNOS_POR_PROJETO, 0.2, args.semente)
+            print(f"{projetos * ALUNOS_POR_PROJETO} alunos, {projetos} projetos")
+            casos = casos_repositorios(emails)
+            for caso in casos:
+                if filtro in f"{caso.grupo}.{caso.nome}":
+                    resultados.append(medir_caso(caso, projetos * ALUNOS_POR_PROJETO))
+        finally:
+            Database.fecharTodas()
+            shutil.rmtree(pasta, ignore_errors=True)
+    faltando = metodos_sem_medicao(casos) if casos else []
+    if faltando:
+        print(f"métodos sem medição: {', '.join(faltando)}")
+    commit = commit_atual()
+    relatorio = {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "tamanhos": args.tamanhos,
+        "resultados": resultados,
+    }
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"micro-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"resultado gravado em {saida}")
+
+
+def comparar(antes: str, depois: str, tolerancia: float) -> int:
+    # compara tempo por chamada e pico de memória de cada caso; devolve 1 se algum piorou
+    with open(antes, encoding="utf-8") as arquivo:
+        a = {(r["grupo"], r["nome"], r["tamanho"]): r for r in json.load(arquivo)["resultados"]}
+    with open(depois, encoding="utf-8") as arquivo:
+        d = json.load(arquivo)
+    regressoes = 0
+    for r in d["resultados"]:
+        anterior = a.get((r["grupo"], r["nome"], r["tamanho"]))
+        if anterior is None or "erro" in r or "erro" in anterior:
+            continue
+        variacaoTempo = r["usPorChamada"] / anterior["usPorChamada"] - 1
+        variacaoPico = (r["picoBytes"] + 1) / (anterior["picoBytes"] + 1) - 1
+        piorou = variacaoTempo > tolerancia or variacaoPico > tolerancia
+        regressoes += piorou
+        tamanho = f"[{r['tamanho']}]" if r["tamanho"] else ""
+        print(
+            f"  {r['grupo'] + '.' + r['nome'] + tamanho:<66} {variacaoTempo:>+7.0%} tempo"
+            f"  {variacaoPico:>+7.0%} pico{'  REGRESSÃO' if piorou else ''}"
+        )
+    return 1 if regressoes else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de repositórios, validações, filtros e segurança.")
+    parser.add_argument(
+        "--tamanhos",
+        type=lambda valor: [int(t) for t in valor.split(",") if t],
+        default=[100, 1000, 10000],
+        help="quantidades de alunos dos bancos de teste, separadas por vírgula",
+    )
+    parser.add_argument("--filtro", help="só os casos cujo nome contém este texto")
+    parser.add_argument("--semente", type=int, default=2023)
+    parser.add_argument("--saida", help=f"arquivo JSON (padrão: {PASTA_RESULTADOS}/micro-<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument("--tolerancia", type=float, default=0.1)
+    args = parser.parse_args()
+    if args.comparar:
+        sys.exit(comparar(*args.comparar, args.tolerancia))
+    executar(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/validacao.py
+# compara três formas de validar o formulário de cadastro de aluno: campo a campo
+# com a expressão em texto passada ao re.match (como as rotas faziam), campo a campo
+# com as funções de util/validators.py sobre os padrões já compilados, e o esquema
+# compilado de util/formSchema.py (como as rotas fazem agora)
+#
+# uso, a partir da raiz do projeto:  python -m benchmarks.validacao [repetições]
+import sys
+import timeit
+
+from routes.AlunoRoutes import ESQUEMA_NOVO
+from util.templateFilters import capitalizar_nome_proprio
+from util.validators import *
+
+
+FORMULARIOS = {
+    "válido": {
+        "nome": "maria da silva",
+        "email": "Maria.Silva@Exemplo.com ",
+        "senha": "Senha@123",
+        "confSenha": "Senha@123",
+        "idProjeto": 3,
+    },
+    "inválido": {
+        "nome": "",
+        "email": "maria.silva",
+        "senha": "123",
+        "confSenha": "321",
+        "idProjeto": 0,
+    },
+}
+
+
+def validar_funcoes(dados: dict) -> dict:
+    nome = capitalizar_nome_proprio(dados["nome"]).strip()
+    email = dados["email"].lower().strip()
+    senha = dados["senha"].strip()
+    confSenha = dados["confSenha"].strip()
+    erros = {}
+    is_not_empty(nome, "nome", erros)
+    is_person_fullname(nome, "nome", erros)
+    is_not_empty(email, "email", erros)
+    is_email(email, "email", erros)
+    is_not_empty(senha, "senha", erros)
+    is_password(senha, "senha", erros)
+    is_not_empty(confSenha, "confSenha", erros)
+    is_matching_fields(confSenha, "confSenha", senha, "Senha", erros)
+    is_selected_id_valid(dados["idProjeto"], "idProjeto", erros)
+    return erros
+
+
+def validar_antes(dados: dict) -> dict:
+    # as verificações com a expressão em texto a cada chamada: o re.match
+    # consulta o cache interno do módulo re antes de cada busca
+    nome = capitalizar_nome_proprio(dados["nome"]).strip()
+    email = dados["email"].lower().strip()
+    senha = dados["senha"].strip()
+    confSenha = dados["confSenha"].strip()
+    erros = {}
+    for campo, valor, padrao in (
+        ("nome", nome, PADRAO_NOME_COMPLETO.pattern),
+        ("email", email, PADRAO_EMAIL.pattern),
+        ("senha", senha, PADRAO_SENHA.pattern),
+    ):
+        is_not_empty(valor, campo, erros)
+        is_matching_regex(valor, campo, padrao, erros)
+    is_not_empty(confSenha, "confSenha", erros)
+    is_matching_fields(confSenha, "confSenha", senha, "Senha", erros)
+    is_selected_id_valid(dados["idProjeto"], "idProjeto", erros)
+    return erros
+
+
+def validar_esquema(dados: dict) -> dict:
+    return ESQUEMA_NOVO.validar(dados)[1]
+
+
+def medir(funcao, dados: dict, repeticoes: int) -> float:
+    # melhor de 7 rodadas, em microssegundos por formulário
+    tempos = timeit.repeat(lambda: funcao(dados), number=repeticoes, repeat=7)
+    return min(tempos) / repeticoes * 1_000_000
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    # os dois caminhos precisam apontar os mesmos campos com erro
+    for dados in FORMULARIOS.values():
+        assert set(validar_funcoes(dados)) == set(validar_esquema(dados))
+    print(f"{'formulário':<10} {'antes':>10} {'funções':>10} {'esquema':>10} {'ganho':>7}")
+    for nome, dados in FORMULARIOS.items():
+        antes = medir(validar_antes, dados, repeticoes)
+        funcoes = medir(validar_funcoes, dados, repeticoes)
+        esquema = medir(validar_esquema, dados, repeticoes)
+        print(f"{nome:<10} {antes:>8.2f}µs {funcoes:>8.2f}µs {esquema:>8.2f}µs {antes / esquema:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
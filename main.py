@@ -1,22 +1,81 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 from repositories.AlunoRepo import AlunoRepo
 from repositories.ProjetoRepo import ProjetoRepo
 from routes.MainRoutes import router as mainRouter
 from routes.ProjetoRoutes import router as projetoRouter
 from routes.AlunoRoutes import router as alunoRouter
+from util.Database import Database
+from util.DatabaseAsync import DatabaseAsync
+from util.cacheSync import SincronizacaoCachesMiddleware, sincronizacaoCaches
+from util.compression import CompressaoMiddleware, cacheMinificacao
 from util.exceptionHandler import configurar as configurarExcecoes
+from util.images import gerar_variantes_existentes
+from util.executors import encerrar_executores, obter_metricas_executores
+from util.metrics import MetricasMiddleware, registroMetricas
+from util.migrations import migrar
+from util.pageCache import cachePaginas
+from util.passwordHashing import configurar_custo_senhas, servicoSenhas
+from util.rateLimit import limitadorLogin
+from util.security import requisicao_de_admin
+from util.sessionCache import cacheSessao
+from util.staticAssets import ArquivosEstaticos, compilar_estaticos
+from util.startupLock import bloqueio_inicializacao
+from util.templates import precompilar_templates
+from util.uploads import TAMANHO_MAXIMO_CORPO, TAMANHO_MAXIMO_IMPORTACAO, LimiteCorpoMiddleware
 
-ProjetoRepo.criarTabela()
-AlunoRepo.criarTabela()
-AlunoRepo.criarUsuarioAdmin()
+# com vários trabalhadores (WEB_CONCURRENCY), um processo por vez inicializa
+with bloqueio_inicializacao():
+    ProjetoRepo.criarTabela()
+    AlunoRepo.criarTabela()
+    AlunoRepo.criarUsuarioAdmin()
+    migrar()
+    configurar_custo_senhas()
+    # as variantes das imagens não são versionadas: as que faltam são geradas aqui,
+    # antes da compilação dos estáticos
+    gerar_variantes_existentes()
+    compilar_estaticos()
+    precompilar_templates()
 
 app = FastAPI()
 
 configurarExcecoes(app)
 
-app.mount(path="/static", app=StaticFiles(directory="static"), name="static")
+app.add_middleware(
+    LimiteCorpoMiddleware,
+    limitesPorRota={
+        "/projeto/novo": TAMANHO_MAXIMO_CORPO,
+        "/aluno/importar": TAMANHO_MAXIMO_IMPORTACAO,
+        "/projeto/importar": TAMANHO_MAXIMO_IMPORTACAO,
+    },
+)
+app.add_middleware(CompressaoMiddleware)
+# antes de cada requisição, descarta o que outros trabalhadores tornaram desatualizado
+app.add_middleware(SincronizacaoCachesMiddleware)
+# adicionado por último, envolve os demais: a latência inclui a compressão
+app.add_middleware(MetricasMiddleware, permitirDepuracao=requisicao_de_admin)
+
+# estatísticas dos componentes, exportadas junto com as métricas em /metrics
+registroMetricas.coletar("bd", Database.obterEstatisticas)
+registroMetricas.coletar("bdAsync", DatabaseAsync.obterEstatisticas)
+registroMetricas.coletar("executores", obter_metricas_executores)
+registroMetricas.coletar("senhas", servicoSenhas.obterEstatisticas)
+registroMetricas.coletar("login", limitadorLogin.obterEstatisticas)
+registroMetricas.coletar("cachePaginas", cachePaginas.obterEstatisticas)
+registroMetricas.coletar("cacheSessao", cacheSessao.obterEstatisticas)
+registroMetricas.coletar("cacheMinificacao", cacheMinificacao.obterEstatisticas)
+registroMetricas.coletar("sincronizacaoCaches", sincronizacaoCaches.obterEstatisticas)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    encerrar_executores()
+    sincronizacaoCaches.fechar()
+    Database.fecharTodas()
+    await DatabaseAsync.fecharTodas()
+
+
+app.mount(path="/static", app=ArquivosEstaticos(), name="static")
 
 app.include_router(mainRouter)
 app.include_router(projetoRouter)
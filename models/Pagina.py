@@ -0,0 +1,15 @@
+# models/Pagina.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Pagina:
+    itens: List = field(default_factory=list)
+    # cursores opacos (util/pagination.py) para as páginas vizinhas
+    proximo: Optional[str] = None
+    anterior: Optional[str] = None
+    # preenchidos pelas consultas de página com contagens (paginação por deslocamento)
+    totalItens: int = 0
+    totalPaginas: int = 0
+    contagens: Dict[str, int] = field(default_factory=dict)
@@ -1,150 +1,133 @@
 # repositories/AlunoRepo.py
-from typing import List
+from typing import Iterator, List, Set, Tuple
 from models.Aluno import Aluno
+from models.Pagina import Pagina
 from models.Usuario import Usuario
+from repositories import AlunoSql
 from util.Database import Database
+from util.pagination import ler_cursor, montar_pagina, montar_pagina_com_contagens
+from util.pageCache import cachePaginas
+from util.sessionCache import cacheSessao
 
 
 class AlunoRepo:
     @classmethod
     def criarTabela(cls):
-        sql = """
-            CREATE TABLE IF NOT EXISTS aluno (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            email TEXT NOT NULL,
-            senha TEXT NOT NULL,
-            token TEXT,
-            admin BOOLEAN NOT NULL DEFAULT 0,
-            aprovado BOOLEAN NOT NULL DEFAULT 0,            
-            dataCadastro DATETIME DEFAULT CURRENT_TIMESTAMP,
-            idProjeto INTEGER,
-            UNIQUE (email),
-            CONSTRAINT fkAlunoProjeto FOREIGN KEY(idProjeto) REFERENCES projeto(id))
-        """
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        tableCreated = cursor.execute(sql).rowcount > 0
-        conexao.commit()
-        conexao.close()
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            tableCreated = cursor.execute(AlunoSql.CRIAR_TABELA).rowcount > 0
         return tableCreated
 
     @classmethod
     def criarUsuarioAdmin(cls) -> bool:
-        sql = "INSERT OR IGNORE INTO aluno (nome, email, senha, admin) VALUES (?, ?, ?, ?)"
-        # hash da senha 123456
-        hash_senha = "$2b$12$WU9pnIyBUZOJHN7hgkhWtew8hI0Keiobr8idjIxYDwCyiSb5zh0iq"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(
-            sql, ("Administrador do Sistema", "admin@email.com", hash_senha, True)
-        )
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.CRIAR_USUARIO_ADMIN, AlunoSql.PARAMETROS_ADMIN
+            )
+            return resultado.rowcount > 0
 
     @classmethod
     def inserir(cls, aluno: Aluno) -> Aluno:
-        sql = "INSERT INTO aluno (nome, email, senha, idProjeto) VALUES (?, ?, ?, ?)"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(
-            sql, (aluno.nome, aluno.email, aluno.senha, aluno.idProjeto)
-        )
-        if resultado.rowcount > 0:
-            aluno.id = resultado.lastrowid
-        conexao.commit()
-        conexao.close()
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.INSERIR, (aluno.nome, aluno.email, aluno.senha, aluno.idProjeto)
+            )
+            if resultado.rowcount > 0:
+                aluno.id = resultado.lastrowid
+        cachePaginas.invalidar()
         return aluno
 
     @classmethod
     def alterar(cls, aluno: Aluno) -> Aluno:
-        sql = "UPDATE aluno SET nome=?, aluno.email=?, idProjeto=? WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (aluno.nome, aluno.idProjeto, aluno.id))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return aluno
-        else:
-            conexao.close()
-            return None
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.ALTERAR, (aluno.nome, aluno.idProjeto, aluno.id)
+            )
+            alterado = resultado.rowcount > 0
+        cachePaginas.invalidar()
+        return aluno if alterado else None
 
     @classmethod
     def alterarSenha(cls, id: int, senha: str) -> bool:
-        sql = "UPDATE aluno SET senha=? WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (senha, id))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.ALTERAR_SENHA, (senha, id))
+            return resultado.rowcount > 0
+
+    @classmethod
+    def substituirHashSenha(cls, email: str, hashAntigo: str, hashNovo: str) -> bool:
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.SUBSTITUIR_HASH_SENHA, (hashNovo, email, hashAntigo)
+            )
+            return resultado.rowcount > 0
 
     @classmethod
     def alterarToken(cls, email: str, token: str) -> bool:
-        sql = "UPDATE aluno SET token=? WHERE email=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (token, email))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.ALTERAR_TOKEN, (token, email))
+            alterado = resultado.rowcount > 0
+        cacheSessao.invalidarEmail(email)
+        cacheSessao.invalidarToken(token)
+        return alterado
 
     @classmethod
     def alterarAdmin(cls, id: int, admin: bool) -> bool:
-        sql = "UPDATE aluno SET admin=? WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (admin, id))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.ALTERAR_ADMIN, (admin, id))
+            alterado = resultado.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        return alterado
 
     @classmethod
     def aprovarCadastro(cls, id: int, aprovar: bool = True) -> bool:
-        sql = "UPDATE aluno SET aprovado=? WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (aprovar, id))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.APROVAR_CADASTRO, (aprovar, id))
+            alterado = resultado.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterado
+
+    @classmethod
+    def aprovarCadastros(cls, ids: List[int]) -> Tuple[int, int]:
+        return cls._alterarPendentes(AlunoSql.APROVAR_PENDENTE, ids)
+
+    @classmethod
+    def recusarCadastros(cls, ids: List[int]) -> Tuple[int, int]:
+        return cls._alterarPendentes(AlunoSql.EXCLUIR_PENDENTE, ids)
+
+    @classmethod
+    def _alterarPendentes(cls, sql: str, ids: List[int]) -> Tuple[int, int]:
+        # todos os ids em uma transação; devolve quantos cadastros foram alterados
+        # e quantos continuam pendentes, lido do contador na mesma transação
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            alterados = cursor.executemany(sql, [(id,) for id in ids]).rowcount
+            pendentes = cursor.execute(AlunoSql.OBTER_QTDE_APROVAR).fetchone()[0]
+        for id in ids:
+            cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterados, int(pendentes)
 
     @classmethod
     def emailExiste(cls, email: str) -> bool:
-        sql = "SELECT EXISTS (SELECT 1 FROM aluno WHERE email=?)"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (email,)).fetchone()        
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.EMAIL_EXISTE, (email,)).fetchone()
         return bool(resultado[0])
 
     @classmethod
     def obterSenhaDeEmail(cls, email: str) -> str | None:
-        sql = "SELECT senha FROM aluno WHERE email=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (email,)).fetchone()
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.OBTER_SENHA_DE_EMAIL, (email,)).fetchone()
         if resultado:
             return str(resultado[0])
         else:
@@ -152,130 +135,165 @@ class AlunoRepo:
 
     @classmethod
     def excluir(cls, id: int) -> bool:
-        sql = "DELETE FROM aluno WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (id,))
-        if resultado.rowcount > 0:
-            conexao.commit()
-            conexao.close()
-            return True
-        else:
-            conexao.close()
-            return False
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.EXCLUIR, (id,))
+            alterado = resultado.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterado
 
     @classmethod
-    def obterTodos(cls) -> List[Aluno]:
-        sql = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id ORDER BY aluno.nome"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql).fetchall()
-        objetos = [
-            Aluno(
-                id=x[0],
-                nome=x[1],
-                email=x[2],
-                admin=x[3],
-                idProjeto=x[4],
-                nomeProjeto=x[5],
+    def inserirVarios(cls, alunos: List[Aluno]) -> int:
+        # o lote inteiro em uma transação; devolve quantos foram de fato inseridos
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.executemany(
+                AlunoSql.INSERIR_IMPORTADO,
+                [(a.nome, a.email, a.senha, a.idProjeto, a.aprovado) for a in alunos],
             )
-            for x in resultado
-        ]
+            inseridos = resultado.rowcount
+        cachePaginas.invalidar()
+        return inseridos
+
+    @classmethod
+    def obterEmailsExistentes(cls, emails: List[str]) -> Set[str]:
+        marcadores = ", ".join("?" * len(emails))
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_EMAILS_EXISTENTES.format(emails=marcadores), emails
+            ).fetchall()
+        return {x[0] for x in resultado}
+
+    @classmethod
+    def percorrerTodos(cls, tamanhoLote: int = 500) -> Iterator[tuple]:
+        # a exportação sai em lotes buscados a partir do último id; a conexão volta
+        # ao pool antes de cada lote ser entregue, e não fica presa (nem a
+        # profundidade da thread) enquanto quem consome o gerador o percorre
+        ultimoId = 0
+        while True:
+            with Database.conexao() as conexao:
+                cursor = conexao.cursor()
+                lote = cursor.execute(AlunoSql.EXPORTAR, (ultimoId, tamanhoLote)).fetchall()
+            yield from lote
+            if len(lote) < tamanhoLote:
+                return
+            ultimoId = lote[-1][0]
+
+    @classmethod
+    def obterTodos(cls) -> List[Aluno]:
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.OBTER_TODOS).fetchall()
+        objetos = [AlunoSql.mapearAluno(x) for x in resultado]
         return objetos
 
     @classmethod
     def obterPagina(cls, pagina: int, tamanhoPagina: int) -> List[Aluno]:
         inicio = (pagina - 1) * tamanhoPagina
-        sql = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 1 ORDER BY aluno.nome LIMIT ?, ?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (inicio, tamanhoPagina)).fetchall()
-        objetos = [
-            Aluno(
-                id=x[0],
-                nome=x[1],
-                email=x[2],
-                admin=x[3],
-                idProjeto=x[4],
-                nomeProjeto=x[5],
-            )
-            for x in resultado
-        ]
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_PAGINA, (inicio, tamanhoPagina)
+            ).fetchall()
+        objetos = [AlunoSql.mapearAluno(x) for x in resultado]
         return objetos
 
+    @classmethod
+    def obterPaginaComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_PAGINA_COM_CONTAGENS, (inicio, tamanhoPagina)
+            ).fetchall()
+        return montar_pagina_com_contagens(
+            resultado, tamanhoPagina, ["aprovados", "pendentes"], AlunoSql.mapearAluno
+        )
+
+    @classmethod
+    def obterPaginaCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, AlunoSql.CHAVE_INICIAL)
+        sql = AlunoSql.OBTER_PAGINA_ANTES_COM_CONTAGENS if anterior else AlunoSql.OBTER_PAGINA_APOS_COM_CONTAGENS
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(sql, (*chave, tamanhoPagina + 1)).fetchall()
+        return montar_pagina(
+            resultado, tamanhoPagina, anterior, temCursor, AlunoSql.mapearAluno, AlunoSql.chaveAluno,
+            nomesContagens=["aprovados", "pendentes"],
+        )
+
     @classmethod
     def obterQtdePaginas(cls, tamanhoPagina: int) -> int:
-        sql = "SELECT CEIL(CAST((SELECT COUNT(*) FROM aluno WHERE aprovado = 1 AND idProjeto IS NOT NULL) AS FLOAT) / ?) AS qtdePaginas"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (tamanhoPagina,)).fetchone()
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_QTDE_PAGINAS, (tamanhoPagina,)
+            ).fetchone()
         return int(resultado[0])
 
     @classmethod
     def obterPaginaAprovar(cls, pagina: int, tamanhoPagina: int) -> List[Aluno]:
         inicio = (pagina - 1) * tamanhoPagina
-        sql = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 0 ORDER BY aluno.dataCadastro LIMIT ?, ?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (inicio, tamanhoPagina)).fetchall()
-        objetos = [
-            Aluno(
-                id=x[0],
-                nome=x[1],
-                email=x[2],
-                admin=x[3],
-                idProjeto=x[4],
-                nomeProjeto=x[5],
-            )
-            for x in resultado
-        ]
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_PAGINA_APROVAR, (inicio, tamanhoPagina)
+            ).fetchall()
+        objetos = [AlunoSql.mapearAluno(x) for x in resultado]
         return objetos
 
+    @classmethod
+    def obterPaginaAprovarComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_PAGINA_APROVAR_COM_CONTAGENS, (inicio, tamanhoPagina)
+            ).fetchall()
+        return montar_pagina_com_contagens(
+            resultado, tamanhoPagina, ["pendentes"], AlunoSql.mapearAluno
+        )
+
+    @classmethod
+    def obterPaginaAprovarCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, AlunoSql.CHAVE_INICIAL)
+        sql = AlunoSql.OBTER_PAGINA_APROVAR_ANTES_COM_CONTAGENS if anterior else AlunoSql.OBTER_PAGINA_APROVAR_APOS_COM_CONTAGENS
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(sql, (*chave, tamanhoPagina + 1)).fetchall()
+        return montar_pagina(
+            resultado, tamanhoPagina, anterior, temCursor, AlunoSql.mapearAluno, AlunoSql.chaveAlunoAprovar,
+            nomesContagens=["pendentes"],
+        )
+
     @classmethod
     def obterQtdePaginasAprovar(cls, tamanhoPagina: int) -> int:
-        sql = "SELECT CEIL(CAST((SELECT COUNT(*) FROM aluno WHERE aprovado = 0 AND idProjeto IS NOT NULL) AS FLOAT) / ?) AS qtdePaginas"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (tamanhoPagina,)).fetchone()
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                AlunoSql.OBTER_QTDE_PAGINAS_APROVAR, (tamanhoPagina,)
+            ).fetchone()
         return int(resultado[0])
 
     @classmethod
     def obterQtdeAprovar(cls) -> int:
-        sql = "SELECT COUNT(*) FROM aluno WHERE aprovado = 0 AND idProjeto IS NOT NULL"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql).fetchone()
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.OBTER_QTDE_APROVAR).fetchone()
         return int(resultado[0])
 
     @classmethod
     def obterPorId(cls, id: int) -> Aluno | None:
-        sql = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.aprovado, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (id,)).fetchone()
-        if (resultado):
-            objeto = Aluno(
-                id=resultado[0],
-                nome=resultado[1],
-                email=resultado[2],
-                admin=resultado[3],
-                aprovado=resultado[4],
-                idProjeto=resultado[5],
-                nomeProjeto=resultado[6],
-            )
-            return objeto
-        else: 
-            return None
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.OBTER_POR_ID, (id,)).fetchone()
+        return AlunoSql.mapearAlunoPorId(resultado)
 
     @classmethod
     def obterUsuarioPorToken(cls, token: str) -> Usuario:
-        sql = "SELECT id, nome, email, admin FROM aluno WHERE token=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        # quando se executa fechone em um cursor sem resultado, ele retorna None
-        resultado = cursor.execute(sql, (token,)).fetchone()
-        if resultado:
-            objeto = Usuario(*resultado)
-            return objeto
-        else:
-            return None
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(AlunoSql.OBTER_USUARIO_POR_TOKEN, (token,)).fetchone()
+        return AlunoSql.mapearUsuario(resultado)
@@ -0,0 +1,273 @@
+# repositories/AlunoRepoAsync.py
+from typing import AsyncIterator, List, Set, Tuple
+from models.Aluno import Aluno
+from models.Pagina import Pagina
+from models.Usuario import Usuario
+from repositories import AlunoSql
+from util.DatabaseAsync import DatabaseAsync
+from util.pagination import ler_cursor, montar_pagina, montar_pagina_com_contagens
+from util.pageCache import cachePaginas
+from util.sessionCache import cacheSessao
+
+
+class AlunoRepoAsync:
+    @classmethod
+    async def criarTabela(cls):
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.CRIAR_TABELA)
+            return cursor.rowcount > 0
+
+    @classmethod
+    async def criarUsuarioAdmin(cls) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                AlunoSql.CRIAR_USUARIO_ADMIN, AlunoSql.PARAMETROS_ADMIN
+            )
+            return cursor.rowcount > 0
+
+    @classmethod
+    async def inserir(cls, aluno: Aluno) -> Aluno:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                AlunoSql.INSERIR, (aluno.nome, aluno.email, aluno.senha, aluno.idProjeto)
+            )
+            if cursor.rowcount > 0:
+                aluno.id = cursor.lastrowid
+        cachePaginas.invalidar()
+        return aluno
+
+    @classmethod
+    async def alterar(cls, aluno: Aluno) -> Aluno:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                AlunoSql.ALTERAR, (aluno.nome, aluno.idProjeto, aluno.id)
+            )
+            alterado = cursor.rowcount > 0
+        cachePaginas.invalidar()
+        return aluno if alterado else None
+
+    @classmethod
+    async def alterarSenha(cls, id: int, senha: str) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.ALTERAR_SENHA, (senha, id))
+            return cursor.rowcount > 0
+
+    @classmethod
+    async def substituirHashSenha(cls, email: str, hashAntigo: str, hashNovo: str) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                AlunoSql.SUBSTITUIR_HASH_SENHA, (hashNovo, email, hashAntigo)
+            )
+            return cursor.rowcount > 0
+
+    @classmethod
+    async def alterarToken(cls, email: str, token: str) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.ALTERAR_TOKEN, (token, email))
+            alterado = cursor.rowcount > 0
+        cacheSessao.invalidarEmail(email)
+        cacheSessao.invalidarToken(token)
+        return alterado
+
+    @classmethod
+    async def alterarAdmin(cls, id: int, admin: bool) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.ALTERAR_ADMIN, (admin, id))
+            alterado = cursor.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        return alterado
+
+    @classmethod
+    async def aprovarCadastro(cls, id: int, aprovar: bool = True) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.APROVAR_CADASTRO, (aprovar, id))
+            alterado = cursor.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterado
+
+    @classmethod
+    async def aprovarCadastros(cls, ids: List[int]) -> Tuple[int, int]:
+        return await cls._alterarPendentes(AlunoSql.APROVAR_PENDENTE, ids)
+
+    @classmethod
+    async def recusarCadastros(cls, ids: List[int]) -> Tuple[int, int]:
+        return await cls._alterarPendentes(AlunoSql.EXCLUIR_PENDENTE, ids)
+
+    @classmethod
+    async def _alterarPendentes(cls, sql: str, ids: List[int]) -> Tuple[int, int]:
+        # todos os ids em uma transação; devolve quantos cadastros foram alterados
+        # e quantos continuam pendentes, lido do contador na mesma transação
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.executemany(sql, [(id,) for id in ids])
+            alterados = cursor.rowcount
+            resultado = await conexao.execute_fetchall(AlunoSql.OBTER_QTDE_APROVAR)
+        for id in ids:
+            cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterados, int(resultado[0][0])
+
+    @classmethod
+    async def emailExiste(cls, email: str) -> bool:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(AlunoSql.EMAIL_EXISTE, (email,))
+        return bool(resultado[0][0])
+
+    @classmethod
+    async def obterSenhaDeEmail(cls, email: str) -> str | None:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_SENHA_DE_EMAIL, (email,)
+            )
+        if resultado:
+            return str(resultado[0][0])
+        else:
+            return None
+
+    @classmethod
+    async def excluir(cls, id: int) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(AlunoSql.EXCLUIR, (id,))
+            alterado = cursor.rowcount > 0
+        cacheSessao.invalidarUsuario(id)
+        cachePaginas.invalidar()
+        return alterado
+
+    @classmethod
+    async def inserirVarios(cls, alunos: List[Aluno]) -> int:
+        # o lote inteiro em uma transação; devolve quantos foram de fato inseridos
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.executemany(
+                AlunoSql.INSERIR_IMPORTADO,
+                [(a.nome, a.email, a.senha, a.idProjeto, a.aprovado) for a in alunos],
+            )
+            inseridos = cursor.rowcount
+        cachePaginas.invalidar()
+        return inseridos
+
+    @classmethod
+    async def obterEmailsExistentes(cls, emails: List[str]) -> Set[str]:
+        marcadores = ", ".join("?" * len(emails))
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_EMAILS_EXISTENTES.format(emails=marcadores), emails
+            )
+        return {x[0] for x in resultado}
+
+    @classmethod
+    async def percorrerTodos(cls, tamanhoLote: int = 500) -> AsyncIterator[tuple]:
+        # mesmos lotes de AlunoRepo.percorrerTodos: a conexão só fica reservada
+        # durante a busca de cada lote, não enquanto o cliente baixa o arquivo
+        ultimoId = 0
+        while True:
+            async with DatabaseAsync.conexao() as conexao:
+                lote = await conexao.execute_fetchall(AlunoSql.EXPORTAR, (ultimoId, tamanhoLote))
+            for linha in lote:
+                yield tuple(linha)
+            if len(lote) < tamanhoLote:
+                return
+            ultimoId = lote[-1][0]
+
+    @classmethod
+    async def obterTodos(cls) -> List[Aluno]:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(AlunoSql.OBTER_TODOS)
+        return [AlunoSql.mapearAluno(x) for x in resultado]
+
+    @classmethod
+    async def obterPagina(cls, pagina: int, tamanhoPagina: int) -> List[Aluno]:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_PAGINA, (inicio, tamanhoPagina)
+            )
+        return [AlunoSql.mapearAluno(x) for x in resultado]
+
+    @classmethod
+    async def obterPaginaComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_PAGINA_COM_CONTAGENS, (inicio, tamanhoPagina)
+            )
+        return montar_pagina_com_contagens(
+            list(resultado), tamanhoPagina, ["aprovados", "pendentes"], AlunoSql.mapearAluno
+        )
+
+    @classmethod
+    async def obterPaginaCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, AlunoSql.CHAVE_INICIAL)
+        sql = AlunoSql.OBTER_PAGINA_ANTES_COM_CONTAGENS if anterior else AlunoSql.OBTER_PAGINA_APOS_COM_CONTAGENS
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(sql, (*chave, tamanhoPagina + 1))
+        return montar_pagina(
+            list(resultado), tamanhoPagina, anterior, temCursor, AlunoSql.mapearAluno, AlunoSql.chaveAluno,
+            nomesContagens=["aprovados", "pendentes"],
+        )
+
+    @classmethod
+    async def obterQtdePaginas(cls, tamanhoPagina: int) -> int:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_QTDE_PAGINAS, (tamanhoPagina,)
+            )
+        return int(resultado[0][0])
+
+    @classmethod
+    async def obterPaginaAprovar(cls, pagina: int, tamanhoPagina: int) -> List[Aluno]:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_PAGINA_APROVAR, (inicio, tamanhoPagina)
+            )
+        return [AlunoSql.mapearAluno(x) for x in resultado]
+
+    @classmethod
+    async def obterPaginaAprovarComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_PAGINA_APROVAR_COM_CONTAGENS, (inicio, tamanhoPagina)
+            )
+        return montar_pagina_com_contagens(
+            list(resultado), tamanhoPagina, ["pendentes"], AlunoSql.mapearAluno
+        )
+
+    @classmethod
+    async def obterPaginaAprovarCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, AlunoSql.CHAVE_INICIAL)
+        sql = AlunoSql.OBTER_PAGINA_APROVAR_ANTES_COM_CONTAGENS if anterior else AlunoSql.OBTER_PAGINA_APROVAR_APOS_COM_CONTAGENS
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(sql, (*chave, tamanhoPagina + 1))
+        return montar_pagina(
+            list(resultado), tamanhoPagina, anterior, temCursor, AlunoSql.mapearAluno, AlunoSql.chaveAlunoAprovar,
+            nomesContagens=["pendentes"],
+        )
+
+    @classmethod
+    async def obterQtdePaginasAprovar(cls, tamanhoPagina: int) -> int:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_QTDE_PAGINAS_APROVAR, (tamanhoPagina,)
+            )
+        return int(resultado[0][0])
+
+    @classmethod
+    async def obterQtdeAprovar(cls) -> int:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(AlunoSql.OBTER_QTDE_APROVAR)
+        return int(resultado[0][0])
+
+    @classmethod
+    async def obterPorId(cls, id: int) -> Aluno | None:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(AlunoSql.OBTER_POR_ID, (id,))
+        return AlunoSql.mapearAlunoPorId(resultado[0] if resultado else None)
+
+    @classmethod
+    async def obterUsuarioPorToken(cls, token: str) -> Usuario:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                AlunoSql.OBTER_USUARIO_POR_TOKEN, (token,)
+            )
+        return AlunoSql.mapearUsuario(resultado[0] if resultado else None)
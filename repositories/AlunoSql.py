@@ -0,0 +1,167 @@
+# repositories/AlunoSql.py
+# comandos SQL e mapeamento de linhas compartilhados por AlunoRepo e AlunoRepoAsync
+from models.Aluno import Aluno
+from models.Usuario import Usuario
+
+
+CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS aluno (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    senha TEXT NOT NULL,
+    token TEXT,
+    admin BOOLEAN NOT NULL DEFAULT 0,
+    aprovado BOOLEAN NOT NULL DEFAULT 0,
+    dataCadastro DATETIME DEFAULT CURRENT_TIMESTAMP,
+    idProjeto INTEGER,
+    UNIQUE (email),
+    CONSTRAINT fkAlunoProjeto FOREIGN KEY(idProjeto) REFERENCES projeto(id))
+"""
+CRIAR_INDICES = [
+    # obterUsuarioPorToken roda a cada requisição: o índice cobre todas as colunas lidas
+    "CREATE INDEX IF NOT EXISTS ixAlunoToken ON aluno (token, nome, email, admin) WHERE token IS NOT NULL",
+    # ProjetoRepo.obterIntegrantes e a listagem de alunos aprovados
+    "CREATE INDEX IF NOT EXISTS ixAlunoProjetoAprovado ON aluno (idProjeto, nome) WHERE aprovado = 1",
+    "CREATE INDEX IF NOT EXISTS ixAlunoAprovadoNome ON aluno (nome, idProjeto) WHERE aprovado = 1",
+    # cadastros pendentes, em ordem de chegada
+    "CREATE INDEX IF NOT EXISTS ixAlunoPendenteData ON aluno (dataCadastro, idProjeto) WHERE aprovado = 0",
+]
+# as listagens ordenam por (nome, id) e (dataCadastro, id), chaves da paginação por cursor
+RECRIAR_INDICES_ORDENACAO = [
+    "DROP INDEX IF EXISTS ixAlunoAprovadoNome",
+    "CREATE INDEX IF NOT EXISTS ixAlunoAprovadoNomeId ON aluno (nome, id, idProjeto) WHERE aprovado = 1",
+    "DROP INDEX IF EXISTS ixAlunoPendenteData",
+    "CREATE INDEX IF NOT EXISTS ixAlunoPendenteDataId ON aluno (dataCadastro, id, idProjeto) WHERE aprovado = 0",
+]
+CRIAR_USUARIO_ADMIN = "INSERT OR IGNORE INTO aluno (nome, email, senha, admin) VALUES (?, ?, ?, ?)"
+INSERIR = "INSERT INTO aluno (nome, email, senha, idProjeto) VALUES (?, ?, ?, ?)"
+ALTERAR = "UPDATE aluno SET nome=?, aluno.email=?, idProjeto=? WHERE id=?"
+ALTERAR_SENHA = "UPDATE aluno SET senha=? WHERE id=?"
+# rehash após o login: só troca se o hash ainda for o que foi verificado
+SUBSTITUIR_HASH_SENHA = "UPDATE aluno SET senha=? WHERE email=? AND senha=?"
+ALTERAR_TOKEN = "UPDATE aluno SET token=? WHERE email=?"
+ALTERAR_ADMIN = "UPDATE aluno SET admin=? WHERE id=?"
+APROVAR_CADASTRO = "UPDATE aluno SET aprovado=? WHERE id=?"
+# aprovação e recusa em lote (executemany): só afetam cadastros pendentes, pelo
+# mesmo critério da página de aprovação e do contador (com projeto e não aprovado)
+APROVAR_PENDENTE = "UPDATE aluno SET aprovado=1 WHERE id=? AND aprovado=0 AND idProjeto IS NOT NULL"
+EXCLUIR_PENDENTE = "DELETE FROM aluno WHERE id=? AND aprovado=0 AND idProjeto IS NOT NULL AND admin=0"
+EMAIL_EXISTE = "SELECT EXISTS (SELECT 1 FROM aluno WHERE email=?)"
+OBTER_SENHA_DE_EMAIL = "SELECT senha FROM aluno WHERE email=?"
+EXCLUIR = "DELETE FROM aluno WHERE id=?"
+OBTER_TODOS = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id ORDER BY aluno.nome"
+OBTER_PAGINA = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 1 ORDER BY aluno.nome, aluno.id LIMIT ?, ?"
+# paginação por cursor: as linhas depois (ou antes) da chave (nome, id) informada
+OBTER_PAGINA_APOS = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 1 AND (aluno.nome, aluno.id) > (?, ?) ORDER BY aluno.nome, aluno.id LIMIT ?"
+OBTER_PAGINA_ANTES = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 1 AND (aluno.nome, aluno.id) < (?, ?) ORDER BY aluno.nome DESC, aluno.id DESC LIMIT ?"
+# as contagens vêm da tabela contador (ContadorSql), mantida por gatilhos
+OBTER_QTDE_PAGINAS = "SELECT CEIL(CAST(valor AS FLOAT) / ?) AS qtdePaginas FROM contador WHERE nome = 'alunosAprovados'"
+# a página e as contagens da listagem em uma única consulta; sem linhas na página,
+# o LEFT JOIN ainda devolve uma linha com as contagens e o aluno nulo
+OBTER_PAGINA_COM_CONTAGENS = """
+    SELECT contagem.aprovados, contagem.pendentes, pagina.* FROM
+    (SELECT (SELECT valor FROM contador WHERE nome = 'alunosAprovados') AS aprovados,
+        (SELECT valor FROM contador WHERE nome = 'alunosPendentes') AS pendentes) AS contagem
+    LEFT JOIN (SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 1 ORDER BY aluno.nome, aluno.id LIMIT ?, ?) AS pagina
+    ORDER BY pagina.nome, pagina.id
+"""
+# a página por cursor (com o item a mais que indica outra página) e as contagens
+# em uma única consulta, no mesmo formato de OBTER_PAGINA_COM_CONTAGENS
+OBTER_PAGINA_APOS_COM_CONTAGENS = f"""
+    SELECT contagem.aprovados, contagem.pendentes, pagina.* FROM
+    (SELECT (SELECT valor FROM contador WHERE nome = 'alunosAprovados') AS aprovados,
+        (SELECT valor FROM contador WHERE nome = 'alunosPendentes') AS pendentes) AS contagem
+    LEFT JOIN ({OBTER_PAGINA_APOS}) AS pagina
+    ORDER BY pagina.nome, pagina.id
+"""
+OBTER_PAGINA_ANTES_COM_CONTAGENS = f"""
+    SELECT contagem.aprovados, contagem.pendentes, pagina.* FROM
+    (SELECT (SELECT valor FROM contador WHERE nome = 'alunosAprovados') AS aprovados,
+        (SELECT valor FROM contador WHERE nome = 'alunosPendentes') AS pendentes) AS contagem
+    LEFT JOIN ({OBTER_PAGINA_ANTES}) AS pagina
+    ORDER BY pagina.nome DESC, pagina.id DESC
+"""
+OBTER_PAGINA_APROVAR = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto, aluno.dataCadastro FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 0 ORDER BY aluno.dataCadastro, aluno.id LIMIT ?, ?"
+# paginação por cursor: as linhas depois (ou antes) da chave (dataCadastro, id) informada
+OBTER_PAGINA_APROVAR_APOS = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto, aluno.dataCadastro FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 0 AND (aluno.dataCadastro, aluno.id) > (?, ?) ORDER BY aluno.dataCadastro, aluno.id LIMIT ?"
+OBTER_PAGINA_APROVAR_ANTES = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto, aluno.dataCadastro FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 0 AND (aluno.dataCadastro, aluno.id) < (?, ?) ORDER BY aluno.dataCadastro DESC, aluno.id DESC LIMIT ?"
+OBTER_QTDE_PAGINAS_APROVAR = "SELECT CEIL(CAST(valor AS FLOAT) / ?) AS qtdePaginas FROM contador WHERE nome = 'alunosPendentes'"
+OBTER_QTDE_APROVAR = "SELECT valor FROM contador WHERE nome = 'alunosPendentes'"
+OBTER_PAGINA_APROVAR_COM_CONTAGENS = """
+    SELECT contagem.pendentes, pagina.* FROM
+    (SELECT valor AS pendentes FROM contador WHERE nome = 'alunosPendentes') AS contagem
+    LEFT JOIN (SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.idProjeto, projeto.nome AS nomeProjeto, aluno.dataCadastro FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.aprovado = 0 ORDER BY aluno.dataCadastro, aluno.id LIMIT ?, ?) AS pagina
+    ORDER BY pagina.dataCadastro, pagina.id
+"""
+OBTER_PAGINA_APROVAR_APOS_COM_CONTAGENS = f"""
+    SELECT contagem.pendentes, pagina.* FROM
+    (SELECT valor AS pendentes FROM contador WHERE nome = 'alunosPendentes') AS contagem
+    LEFT JOIN ({OBTER_PAGINA_APROVAR_APOS}) AS pagina
+    ORDER BY pagina.dataCadastro, pagina.id
+"""
+OBTER_PAGINA_APROVAR_ANTES_COM_CONTAGENS = f"""
+    SELECT contagem.pendentes, pagina.* FROM
+    (SELECT valor AS pendentes FROM contador WHERE nome = 'alunosPendentes') AS contagem
+    LEFT JOIN ({OBTER_PAGINA_APROVAR_ANTES}) AS pagina
+    ORDER BY pagina.dataCadastro DESC, pagina.id DESC
+"""
+OBTER_POR_ID = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.aprovado, aluno.idProjeto, projeto.nome AS nomeProjeto FROM aluno INNER JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.id=?"
+OBTER_USUARIO_POR_TOKEN = "SELECT id, nome, email, admin FROM aluno WHERE token=?"
+# importação em massa: e-mails já cadastrados são ignorados sem abortar o lote
+INSERIR_IMPORTADO = "INSERT INTO aluno (nome, email, senha, idProjeto, aprovado) VALUES (?, ?, ?, ?, ?) ON CONFLICT (email) DO NOTHING"
+# {emails} é substituído pelos marcadores do IN
+OBTER_EMAILS_EXISTENTES = "SELECT email FROM aluno WHERE email IN ({emails})"
+# um lote da exportação, sem senha e token: os alunos depois do último id já exportado
+EXPORTAR = "SELECT aluno.id, aluno.nome, aluno.email, aluno.admin, aluno.aprovado, aluno.idProjeto, projeto.nome AS nomeProjeto, aluno.dataCadastro FROM aluno LEFT JOIN projeto ON aluno.idProjeto = projeto.id WHERE aluno.id > ? ORDER BY aluno.id LIMIT ?"
+COLUNAS_EXPORTACAO = ["id", "nome", "email", "admin", "aprovado", "idProjeto", "nomeProjeto", "dataCadastro"]
+
+# hash da senha 123456
+HASH_SENHA_ADMIN = "$2b$12$WU9pnIyBUZOJHN7hgkhWtew8hI0Keiobr8idjIxYDwCyiSb5zh0iq"
+PARAMETROS_ADMIN = ("Administrador do Sistema", "admin@email.com", HASH_SENHA_ADMIN, True)
+
+
+# chave inicial das buscas por cursor: vem antes de qualquer (nome, id) ou (dataCadastro, id)
+CHAVE_INICIAL = ("", 0)
+
+
+def mapearAluno(x) -> Aluno:
+    # linhas de OBTER_TODOS, OBTER_PAGINA* e OBTER_PAGINA_APROVAR*, sem as contagens
+    return Aluno(
+        id=x[0],
+        nome=x[1],
+        email=x[2],
+        admin=x[3],
+        idProjeto=x[4],
+        nomeProjeto=x[5],
+        dataCadastro=x[6] if len(x) > 6 else None,
+    )
+
+
+def chaveAluno(aluno: Aluno) -> tuple:
+    return (aluno.nome, aluno.id)
+
+
+def chaveAlunoAprovar(aluno: Aluno) -> tuple:
+    return (aluno.dataCadastro, aluno.id)
+
+
+def mapearAlunoPorId(x) -> Aluno | None:
+    if not x:
+        return None
+    return Aluno(
+        id=x[0],
+        nome=x[1],
+        email=x[2],
+        admin=x[3],
+        aprovado=x[4],
+        idProjeto=x[5],
+        nomeProjeto=x[6],
+    )
+
+
+def mapearUsuario(x) -> Usuario | None:
+    # quando se executa fetchone em um cursor sem resultado, ele retorna None
+    if not x:
+        return None
+    return Usuario(*x)
@@ -0,0 +1,50 @@
+# repositories/ContadorSql.py
+# contagens das listagens mantidas por gatilhos, para não contar a tabela a cada página
+
+
+CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS contador (
+    nome TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL) WITHOUT ROWID
+"""
+# os critérios são os mesmos das antigas contagens com COUNT(*)
+INICIALIZAR = """
+    INSERT OR REPLACE INTO contador (nome, valor) VALUES
+    ('alunosAprovados', (SELECT COUNT(*) FROM aluno WHERE aprovado = 1 AND idProjeto IS NOT NULL)),
+    ('alunosPendentes', (SELECT COUNT(*) FROM aluno WHERE aprovado = 0 AND idProjeto IS NOT NULL)),
+    ('projetos', (SELECT COUNT(*) FROM projeto))
+"""
+CRIAR_GATILHOS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tgContadorAlunoInserido AFTER INSERT ON aluno BEGIN
+        UPDATE contador SET valor = valor + (NEW.aprovado = 1 AND NEW.idProjeto IS NOT NULL) WHERE nome = 'alunosAprovados';
+        UPDATE contador SET valor = valor + (NEW.aprovado = 0 AND NEW.idProjeto IS NOT NULL) WHERE nome = 'alunosPendentes';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgContadorAlunoAlterado AFTER UPDATE OF aprovado, idProjeto ON aluno BEGIN
+        UPDATE contador SET valor = valor
+            - (OLD.aprovado = 1 AND OLD.idProjeto IS NOT NULL)
+            + (NEW.aprovado = 1 AND NEW.idProjeto IS NOT NULL) WHERE nome = 'alunosAprovados';
+        UPDATE contador SET valor = valor
+            - (OLD.aprovado = 0 AND OLD.idProjeto IS NOT NULL)
+            + (NEW.aprovado = 0 AND NEW.idProjeto IS NOT NULL) WHERE nome = 'alunosPendentes';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgContadorAlunoExcluido AFTER DELETE ON aluno BEGIN
+        UPDATE contador SET valor = valor - (OLD.aprovado = 1 AND OLD.idProjeto IS NOT NULL) WHERE nome = 'alunosAprovados';
+        UPDATE contador SET valor = valor - (OLD.aprovado = 0 AND OLD.idProjeto IS NOT NULL) WHERE nome = 'alunosPendentes';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgContadorProjetoInserido AFTER INSERT ON projeto BEGIN
+        UPDATE contador SET valor = valor + 1 WHERE nome = 'projetos';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgContadorProjetoExcluido AFTER DELETE ON projeto BEGIN
+        UPDATE contador SET valor = valor - 1 WHERE nome = 'projetos';
+    END
+    """,
+]
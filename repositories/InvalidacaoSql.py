@@ -0,0 +1,72 @@
+# repositories/InvalidacaoSql.py
+# alterações que tornam os caches de cada processo desatualizados, registradas por
+# gatilhos na mesma transação da alteração; cada trabalhador lê as novas e limpa os
+# seus caches (util/cacheSync.py)
+
+
+CRIAR_TABELAS = [
+    # versão das páginas em cache: incrementada a cada alteração em aluno ou projeto
+    """
+    CREATE TABLE IF NOT EXISTS versaoCache (
+    nome TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL) WITHOUT ROWID
+    """,
+    # alunos cujas sessões em cache deixaram de valer (token, nome, e-mail, admin, aprovação)
+    """
+    CREATE TABLE IF NOT EXISTS invalidacaoSessao (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idAluno INTEGER NOT NULL)
+    """,
+]
+INICIALIZAR = "INSERT OR IGNORE INTO versaoCache (nome, valor) VALUES ('paginas', 0)"
+# as mesmas alterações que chamam cachePaginas.invalidar e cacheSessao.invalidar* nos repositórios
+CRIAR_GATILHOS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheAlunoInserido AFTER INSERT ON aluno BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheAlunoAlterado AFTER UPDATE OF nome, idProjeto, aprovado ON aluno BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheSessaoAlterada AFTER UPDATE OF token, nome, email, admin, aprovado ON aluno BEGIN
+        INSERT INTO invalidacaoSessao (idAluno) VALUES (OLD.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheAlunoExcluido AFTER DELETE ON aluno BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+        INSERT INTO invalidacaoSessao (idAluno) VALUES (OLD.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheProjetoAlterado AFTER UPDATE ON projeto BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheProjetoInserido AFTER INSERT ON projeto BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tgCacheProjetoExcluido AFTER DELETE ON projeto BEGIN
+        UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas';
+    END
+    """,
+    # só as últimas invalidações ficam guardadas; um trabalhador que ficou para trás
+    # percebe o intervalo nos ids e limpa o cache de sessões inteiro
+    """
+    CREATE TRIGGER IF NOT EXISTS tgInvalidacaoSessaoLimite AFTER INSERT ON invalidacaoSessao BEGIN
+        DELETE FROM invalidacaoSessao WHERE id <= NEW.id - 10000;
+    END
+    """,
+]
+# para as alterações fora do banco que também desatualizam as páginas (imagens gravadas)
+INCREMENTAR_VERSAO_PAGINAS = "UPDATE versaoCache SET valor = valor + 1 WHERE nome = 'paginas'"
+OBTER_VERSAO_PAGINAS = "SELECT valor FROM versaoCache WHERE nome = 'paginas'"
+OBTER_ULTIMA_SESSAO = "SELECT COALESCE(MAX(id), 0) FROM invalidacaoSessao"
+OBTER_SESSOES_APOS = "SELECT id, idAluno FROM invalidacaoSessao WHERE id > ? ORDER BY id"
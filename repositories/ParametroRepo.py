@@ -0,0 +1,19 @@
+# repositories/ParametroRepo.py
+from repositories import ParametroSql
+from util.Database import Database
+
+
+class ParametroRepo:
+    @classmethod
+    def obter(cls, nome: str) -> str | None:
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ParametroSql.OBTER, (nome,)).fetchone()
+        return resultado[0] if resultado else None
+
+    @classmethod
+    def gravar(cls, nome: str, valor: str) -> bool:
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ParametroSql.GRAVAR, (nome, valor))
+            return resultado.rowcount > 0
@@ -0,0 +1,11 @@
+# repositories/ParametroSql.py
+# parâmetros da aplicação gravados no banco (nome -> valor em texto ou JSON)
+
+
+CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS parametro (
+    nome TEXT PRIMARY KEY,
+    valor TEXT NOT NULL) WITHOUT ROWID
+"""
+OBTER = "SELECT valor FROM parametro WHERE nome=?"
+GRAVAR = "INSERT INTO parametro (nome, valor) VALUES (?, ?) ON CONFLICT (nome) DO UPDATE SET valor=excluded.valor"
@@ -1,116 +1,163 @@
 # repositories/ProjetoRepo.py
-from typing import List
+from typing import Dict, Iterator, List
+from models.Pagina import Pagina
 from models.Projeto import Projeto
+from repositories import ProjetoSql
 from util.Database import Database
+from util.pageCache import cachePaginas
+from util.pagination import ler_cursor, montar_pagina, montar_pagina_com_contagens
 
 class ProjetoRepo:
     @classmethod
     def criarTabela(cls):
-        sql = """
-            CREATE TABLE IF NOT EXISTS projeto (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            descricao TEXT NOT NULL)
-        """
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        tableCreated = (cursor.execute(sql).rowcount > 0)
-        conexao.commit()
-        conexao.close()
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            tableCreated = (cursor.execute(ProjetoSql.CRIAR_TABELA).rowcount > 0)
         return tableCreated
-    
-    @classmethod
-    def inserir(cls, projeto: Projeto) -> Projeto:        
-        sql = "INSERT INTO projeto (nome, descricao) VALUES (?, ?)"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (projeto.nome, projeto.descricao))
-        if (resultado.rowcount > 0):            
-            projeto.id = resultado.lastrowid
-        conexao.commit()
-        conexao.close()
+
+    @classmethod
+    def inserir(cls, projeto: Projeto) -> Projeto:
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.INSERIR, (projeto.nome, projeto.descricao))
+            if (resultado.rowcount > 0):
+                projeto.id = resultado.lastrowid
+        cachePaginas.invalidar()
         return projeto
-    
+
     @classmethod
     def alterar(cls, projeto: Projeto) -> Projeto:
-        sql = "UPDATE projeto SET nome=?, descricao=? WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (projeto.nome, projeto.descricao, projeto.id))
-        if (resultado.rowcount > 0):            
-            conexao.commit()
-            conexao.close()
-            return projeto
-        else: 
-            conexao.close()
-            return None
-        
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                ProjetoSql.ALTERAR, (projeto.nome, projeto.descricao, projeto.id)
+            )
+            alterado = resultado.rowcount > 0
+        cachePaginas.invalidar()
+        return projeto if alterado else None
+
     @classmethod
     def excluir(cls, id: int) -> bool:
-        sql = "DELETE FROM projeto WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (id, ))
-        if (resultado.rowcount > 0):
-            conexao.commit()
-            conexao.close()
-            return True
-        else: 
-            conexao.close()
-            return False
-        
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.EXCLUIR, (id, ))
+            alterado = resultado.rowcount > 0
+        cachePaginas.invalidar()
+        return alterado
+
+    @classmethod
+    def inserirVarios(cls, projetos: List[Projeto]) -> int:
+        # o lote inteiro em uma transação
+        with Database.conexaoEscrita() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.executemany(
+                ProjetoSql.INSERIR, [(p.nome, p.descricao) for p in projetos]
+            )
+            inseridos = resultado.rowcount
+        cachePaginas.invalidar()
+        return inseridos
+
+    @classmethod
+    def percorrerTodos(cls, tamanhoLote: int = 500) -> Iterator[tuple]:
+        # a exportação sai em lotes buscados a partir do último id; a conexão volta
+        # ao pool antes de cada lote ser entregue, e não fica presa (nem a
+        # profundidade da thread) enquanto quem consome o gerador o percorre
+        ultimoId = 0
+        while True:
+            with Database.conexao() as conexao:
+                cursor = conexao.cursor()
+                lote = cursor.execute(ProjetoSql.EXPORTAR, (ultimoId, tamanhoLote)).fetchall()
+            yield from lote
+            if len(lote) < tamanhoLote:
+                return
+            ultimoId = lote[-1][0]
+
     @classmethod
     def obterTodos(cls) -> List[Projeto]:
-        sql = "SELECT id, nome, descricao FROM projeto ORDER BY nome"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql).fetchall()
-        objetos = [Projeto(*x) for x in resultado]
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.OBTER_TODOS).fetchall()
+        objetos = [ProjetoSql.mapearProjeto(x) for x in resultado]
         return objetos
-    
+
     @classmethod
     def obterTodosParaSelect(cls) -> List[Projeto]:
-        sql = "SELECT id, nome FROM projeto ORDER BY nome"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql).fetchall()
-        objetos = [Projeto(id=x[0], nome=x[1]) for x in resultado]
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.OBTER_TODOS_PARA_SELECT).fetchall()
+        objetos = [ProjetoSql.mapearProjetoParaSelect(x) for x in resultado]
         return objetos
-    
+
     @classmethod
     def obterPagina(cls, pagina: int, tamanhoPagina: int) -> List[Projeto]:
         inicio = (pagina - 1) * tamanhoPagina
-        sql = "SELECT id, nome, descricao FROM projeto ORDER BY nome LIMIT ?, ?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (inicio, tamanhoPagina)).fetchall()
-        objetos = [Projeto(*x) for x in resultado]
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                ProjetoSql.OBTER_PAGINA, (inicio, tamanhoPagina)
+            ).fetchall()
+        objetos = [ProjetoSql.mapearProjeto(x) for x in resultado]
         return objetos
-    
+
+    @classmethod
+    def obterPaginaComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                ProjetoSql.OBTER_PAGINA_COM_CONTAGENS, (inicio, tamanhoPagina)
+            ).fetchall()
+        return montar_pagina_com_contagens(
+            resultado, tamanhoPagina, ["projetos"], ProjetoSql.mapearProjeto
+        )
+
+    @classmethod
+    def obterPaginaCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, ProjetoSql.CHAVE_INICIAL)
+        sql = ProjetoSql.OBTER_PAGINA_ANTES_COM_CONTAGENS if anterior else ProjetoSql.OBTER_PAGINA_APOS_COM_CONTAGENS
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(sql, (*chave, tamanhoPagina + 1)).fetchall()
+        return montar_pagina(
+            resultado, tamanhoPagina, anterior, temCursor, ProjetoSql.mapearProjeto, ProjetoSql.chaveProjeto,
+            nomesContagens=["projetos"],
+        )
+
     @classmethod
     def obterQtdePaginas(cls, tamanhoPagina: int) -> int:
-        sql = "SELECT CEIL(CAST((SELECT COUNT(*) FROM projeto) AS FLOAT) / ?) AS qtdePaginas"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (tamanhoPagina, )).fetchone()
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(
+                ProjetoSql.OBTER_QTDE_PAGINAS, (tamanhoPagina, )
+            ).fetchone()
         return int(resultado[0])
-    
+
     @classmethod
     def obterPorId(cls, id: int) -> Projeto:
-        sql = "SELECT id, nome, descricao FROM projeto WHERE id=?"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (id, )).fetchone()
-        objeto = Projeto(*resultado)
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.OBTER_POR_ID, (id, )).fetchone()
+        objeto = ProjetoSql.mapearProjeto(resultado)
         return objeto
-        
+
     @classmethod
     def obterIntegrantes(cls, id: int) -> List[str]:
-        sql = "SELECT nome FROM aluno WHERE idProjeto=? and aprovado=1 ORDER BY nome"
-        conexao = Database.criarConexao()
-        cursor = conexao.cursor()
-        resultado = cursor.execute(sql, (id, )).fetchall()        
-        if resultado:            
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.OBTER_INTEGRANTES, (id, )).fetchall()
+        if resultado:
             return [x[0] for x in resultado]
         else:
-            return []            
\ No newline at end of file
+            return []
+
+    @classmethod
+    def obterIntegrantesPorProjetos(cls, ids: List[int]) -> Dict[int, List[str]]:
+        return Database.carregarRelacionados(ProjetoSql.OBTER_INTEGRANTES_POR_PROJETOS, ids)
+
+    @classmethod
+    def obterTodosComIntegrantes(cls) -> List[Projeto]:
+        with Database.conexao() as conexao:
+            cursor = conexao.cursor()
+            resultado = cursor.execute(ProjetoSql.OBTER_TODOS_COM_INTEGRANTES).fetchall()
+        objetos = [ProjetoSql.mapearProjetoComIntegrantes(x) for x in resultado]
+        return objetos
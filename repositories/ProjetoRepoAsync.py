@@ -0,0 +1,154 @@
+# repositories/ProjetoRepoAsync.py
+from typing import AsyncIterator, Dict, List
+from models.Pagina import Pagina
+from models.Projeto import Projeto
+from repositories import InvalidacaoSql, ProjetoSql
+from util.DatabaseAsync import DatabaseAsync
+from util.pageCache import cachePaginas
+from util.pagination import ler_cursor, montar_pagina, montar_pagina_com_contagens
+
+
+class ProjetoRepoAsync:
+    @classmethod
+    async def criarTabela(cls):
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(ProjetoSql.CRIAR_TABELA)
+            return cursor.rowcount > 0
+
+    @classmethod
+    async def inserir(cls, projeto: Projeto) -> Projeto:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                ProjetoSql.INSERIR, (projeto.nome, projeto.descricao)
+            )
+            if cursor.rowcount > 0:
+                projeto.id = cursor.lastrowid
+        cachePaginas.invalidar()
+        return projeto
+
+    @classmethod
+    async def alterar(cls, projeto: Projeto) -> Projeto:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(
+                ProjetoSql.ALTERAR, (projeto.nome, projeto.descricao, projeto.id)
+            )
+            alterado = cursor.rowcount > 0
+        cachePaginas.invalidar()
+        return projeto if alterado else None
+
+    @classmethod
+    async def excluir(cls, id: int) -> bool:
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.execute(ProjetoSql.EXCLUIR, (id,))
+            alterado = cursor.rowcount > 0
+        cachePaginas.invalidar()
+        return alterado
+
+    @classmethod
+    async def invalidarPaginas(cls):
+        # para alterações feitas fora do banco, como as variantes da imagem de um
+        # projeto, que são gravadas depois do inserir; a versão no banco faz os
+        # demais trabalhadores descartarem as suas páginas também (util/cacheSync.py)
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            await conexao.execute(InvalidacaoSql.INCREMENTAR_VERSAO_PAGINAS)
+        cachePaginas.invalidar()
+
+    @classmethod
+    async def inserirVarios(cls, projetos: List[Projeto]) -> int:
+        # o lote inteiro em uma transação
+        async with DatabaseAsync.conexaoEscrita() as conexao:
+            cursor = await conexao.executemany(
+                ProjetoSql.INSERIR, [(p.nome, p.descricao) for p in projetos]
+            )
+            inseridos = cursor.rowcount
+        cachePaginas.invalidar()
+        return inseridos
+
+    @classmethod
+    async def percorrerTodos(cls, tamanhoLote: int = 500) -> AsyncIterator[tuple]:
+        # mesmos lotes de ProjetoRepo.percorrerTodos: a conexão só fica reservada
+        # durante a busca de cada lote, não enquanto o cliente baixa o arquivo
+        ultimoId = 0
+        while True:
+            async with DatabaseAsync.conexao() as conexao:
+                lote = await conexao.execute_fetchall(ProjetoSql.EXPORTAR, (ultimoId, tamanhoLote))
+            for linha in lote:
+                yield tuple(linha)
+            if len(lote) < tamanhoLote:
+                return
+            ultimoId = lote[-1][0]
+
+    @classmethod
+    async def obterTodos(cls) -> List[Projeto]:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(ProjetoSql.OBTER_TODOS)
+        return [ProjetoSql.mapearProjeto(x) for x in resultado]
+
+    @classmethod
+    async def obterTodosParaSelect(cls) -> List[Projeto]:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(ProjetoSql.OBTER_TODOS_PARA_SELECT)
+        return [ProjetoSql.mapearProjetoParaSelect(x) for x in resultado]
+
+    @classmethod
+    async def obterPagina(cls, pagina: int, tamanhoPagina: int) -> List[Projeto]:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                ProjetoSql.OBTER_PAGINA, (inicio, tamanhoPagina)
+            )
+        return [ProjetoSql.mapearProjeto(x) for x in resultado]
+
+    @classmethod
+    async def obterPaginaComContagens(cls, pagina: int, tamanhoPagina: int) -> Pagina:
+        inicio = (pagina - 1) * tamanhoPagina
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                ProjetoSql.OBTER_PAGINA_COM_CONTAGENS, (inicio, tamanhoPagina)
+            )
+        return montar_pagina_com_contagens(
+            list(resultado), tamanhoPagina, ["projetos"], ProjetoSql.mapearProjeto
+        )
+
+    @classmethod
+    async def obterPaginaCursor(cls, tamanhoPagina: int, cursor: str | None = None) -> Pagina:
+        chave, anterior, temCursor = ler_cursor(cursor, ProjetoSql.CHAVE_INICIAL)
+        sql = ProjetoSql.OBTER_PAGINA_ANTES_COM_CONTAGENS if anterior else ProjetoSql.OBTER_PAGINA_APOS_COM_CONTAGENS
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(sql, (*chave, tamanhoPagina + 1))
+        return montar_pagina(
+            list(resultado), tamanhoPagina, anterior, temCursor, ProjetoSql.mapearProjeto, ProjetoSql.chaveProjeto,
+            nomesContagens=["projetos"],
+        )
+
+    @classmethod
+    async def obterQtdePaginas(cls, tamanhoPagina: int) -> int:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(
+                ProjetoSql.OBTER_QTDE_PAGINAS, (tamanhoPagina,)
+            )
+        return int(resultado[0][0])
+
+    @classmethod
+    async def obterPorId(cls, id: int) -> Projeto:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(ProjetoSql.OBTER_POR_ID, (id,))
+        return ProjetoSql.mapearProjeto(resultado[0])
+
+    @classmethod
+    async def obterIntegrantes(cls, id: int) -> List[str]:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(ProjetoSql.OBTER_INTEGRANTES, (id,))
+        return [x[0] for x in resultado]
+
+    @classmethod
+    async def obterIntegrantesPorProjetos(cls, ids: List[int]) -> Dict[int, List[str]]:
+        return await DatabaseAsync.carregarRelacionados(
+            ProjetoSql.OBTER_INTEGRANTES_POR_PROJETOS, ids
+        )
+
+    @classmethod
+    async def obterTodosComIntegrantes(cls) -> List[Projeto]:
+        async with DatabaseAsync.conexao() as conexao:
+            resultado = await conexao.execute_fetchall(ProjetoSql.OBTER_TODOS_COM_INTEGRANTES)
+        return [ProjetoSql.mapearProjetoComIntegrantes(x) for x in resultado]
@@ -0,0 +1,83 @@
+# repositories/ProjetoSql.py
+# comandos SQL e mapeamento de linhas compartilhados por ProjetoRepo e ProjetoRepoAsync
+import json
+from models.Projeto import Projeto
+
+
+CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS projeto (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    descricao TEXT NOT NULL)
+"""
+CRIAR_INDICES = [
+    # listagens e o select de projetos são ordenados por nome
+    "CREATE INDEX IF NOT EXISTS ixProjetoNome ON projeto (nome)",
+]
+INSERIR = "INSERT INTO projeto (nome, descricao) VALUES (?, ?)"
+ALTERAR = "UPDATE projeto SET nome=?, descricao=? WHERE id=?"
+EXCLUIR = "DELETE FROM projeto WHERE id=?"
+OBTER_TODOS = "SELECT id, nome, descricao FROM projeto ORDER BY nome"
+OBTER_TODOS_PARA_SELECT = "SELECT id, nome FROM projeto ORDER BY nome"
+OBTER_PAGINA = "SELECT id, nome, descricao FROM projeto ORDER BY nome, id LIMIT ?, ?"
+# paginação por cursor: as linhas depois (ou antes) da chave (nome, id) informada
+OBTER_PAGINA_APOS = "SELECT id, nome, descricao FROM projeto WHERE (nome, id) > (?, ?) ORDER BY nome, id LIMIT ?"
+OBTER_PAGINA_ANTES = "SELECT id, nome, descricao FROM projeto WHERE (nome, id) < (?, ?) ORDER BY nome DESC, id DESC LIMIT ?"
+# as contagens vêm da tabela contador (ContadorSql), mantida por gatilhos
+OBTER_QTDE_PAGINAS = "SELECT CEIL(CAST(valor AS FLOAT) / ?) AS qtdePaginas FROM contador WHERE nome = 'projetos'"
+# a página e o total de projetos em uma única consulta; sem linhas na página,
+# o LEFT JOIN ainda devolve uma linha com o total e o projeto nulo
+OBTER_PAGINA_COM_CONTAGENS = """
+    SELECT contagem.projetos, pagina.* FROM
+    (SELECT valor AS projetos FROM contador WHERE nome = 'projetos') AS contagem
+    LEFT JOIN (SELECT id, nome, descricao FROM projeto ORDER BY nome, id LIMIT ?, ?) AS pagina
+    ORDER BY pagina.nome, pagina.id
+"""
+# a página por cursor (com o item a mais que indica outra página) e o total de
+# projetos em uma única consulta, no mesmo formato de OBTER_PAGINA_COM_CONTAGENS
+OBTER_PAGINA_APOS_COM_CONTAGENS = f"""
+    SELECT contagem.projetos, pagina.* FROM
+    (SELECT valor AS projetos FROM contador WHERE nome = 'projetos') AS contagem
+    LEFT JOIN ({OBTER_PAGINA_APOS}) AS pagina
+    ORDER BY pagina.nome, pagina.id
+"""
+OBTER_PAGINA_ANTES_COM_CONTAGENS = f"""
+    SELECT contagem.projetos, pagina.* FROM
+    (SELECT valor AS projetos FROM contador WHERE nome = 'projetos') AS contagem
+    LEFT JOIN ({OBTER_PAGINA_ANTES}) AS pagina
+    ORDER BY pagina.nome DESC, pagina.id DESC
+"""
+OBTER_POR_ID = "SELECT id, nome, descricao FROM projeto WHERE id=?"
+# um lote da exportação: os projetos depois do último id já exportado
+EXPORTAR = "SELECT id, nome, descricao FROM projeto WHERE id > ? ORDER BY id LIMIT ?"
+COLUNAS_EXPORTACAO = ["id", "nome", "descricao"]
+OBTER_INTEGRANTES = "SELECT nome FROM aluno WHERE idProjeto=? and aprovado=1 ORDER BY nome"
+# {ids} é substituído pelos marcadores do IN em Database.carregarRelacionados
+OBTER_INTEGRANTES_POR_PROJETOS = "SELECT idProjeto, nome FROM aluno WHERE idProjeto IN ({ids}) AND aprovado=1 ORDER BY idProjeto, nome"
+# uma única consulta traz os projetos e, em JSON, seus integrantes aprovados
+OBTER_TODOS_COM_INTEGRANTES = """
+    SELECT projeto.id, projeto.nome, projeto.descricao,
+    (SELECT json_group_array(nome) FROM
+        (SELECT nome FROM aluno WHERE idProjeto=projeto.id AND aprovado=1 ORDER BY nome))
+    FROM projeto ORDER BY projeto.nome
+"""
+
+
+def mapearProjeto(x) -> Projeto:
+    return Projeto(*x)
+
+
+# chave inicial das buscas por cursor: vem antes de qualquer (nome, id)
+CHAVE_INICIAL = ("", 0)
+
+
+def chaveProjeto(projeto: Projeto) -> tuple:
+    return (projeto.nome, projeto.id)
+
+
+def mapearProjetoParaSelect(x) -> Projeto:
+    return Projeto(id=x[0], nome=x[1])
+
+
+def mapearProjetoComIntegrantes(x) -> Projeto:
+    return Projeto(x[0], x[1], x[2], json.loads(x[3]))
@@ -1,24 +1,56 @@
 # routes/ProjetoRoutes.py
-from fastapi import APIRouter, Depends, Form, Path, HTTPException, Request, status
+from typing import List
+from fastapi import APIRouter, Body, Depends, File, Form, Path, HTTPException, Request, UploadFile, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from models.Aluno import Aluno
 from models.Usuario import Usuario
-from repositories.AlunoRepo import AlunoRepo
-from repositories.ProjetoRepo import ProjetoRepo
-from util.security import obter_hash_senha, validar_usuario_logado, verificar_senha
-from util.templateFilters import capitalizar_nome_proprio, formatarData
+from repositories.AlunoRepoAsync import AlunoRepoAsync
+from repositories.AlunoSql import COLUNAS_EXPORTACAO, chaveAluno, chaveAlunoAprovar
+from repositories.ProjetoRepoAsync import ProjetoRepoAsync
+from util.bulkData import LIMITE_ERROS, ErroImportacao, em_lotes, ler_registros, resposta_exportacao
+from util.formSchema import (
+    EMAIL,
+    NOME_COMPLETO,
+    OBRIGATORIO,
+    SELECIONADO,
+    SENHA,
+    Campo,
+    Esquema,
+    igual_a,
+    inteiro,
+    minusculo,
+    nome_proprio,
+    texto,
+)
+from util.pagination import cursores_da_pagina
+from util.passwordHashing import servicoSenhas
+from util.security import validar_usuario_logado
+from util.templates import templates
 from util.validators import *
 
 
 router = APIRouter(prefix="/aluno")
-templates = Jinja2Templates(directory="templates")
 
-
-@router.on_event("startup")
-async def startup_event():
-    templates.env.filters["date"] = formatarData
+# esquemas de validação dos formulários, compilados uma única vez
+ESQUEMA_IMPORTACAO = Esquema(
+    nome=Campo(OBRIGATORIO, NOME_COMPLETO, normalizar=nome_proprio),
+    email=Campo(OBRIGATORIO, EMAIL, normalizar=minusculo),
+    senha=Campo(OBRIGATORIO, SENHA, normalizar=texto),
+    idProjeto=Campo(SELECIONADO, normalizar=inteiro, padrao=0),
+)
+ESQUEMA_NOVO = Esquema(
+    nome=Campo(OBRIGATORIO, NOME_COMPLETO, normalizar=nome_proprio),
+    email=Campo(OBRIGATORIO, EMAIL, normalizar=minusculo),
+    senha=Campo(OBRIGATORIO, SENHA, normalizar=texto),
+    confSenha=Campo(OBRIGATORIO, igual_a("senha", "Senha"), normalizar=texto),
+    idProjeto=Campo(SELECIONADO, normalizar=inteiro, padrao=0),
+)
+ESQUEMA_ALTERAR_SENHA = Esquema(
+    senhaAtual=Campo(OBRIGATORIO, SENHA, normalizar=texto),
+    novaSenha=Campo(OBRIGATORIO, SENHA, normalizar=texto),
+    confNovaSenha=Campo(OBRIGATORIO, igual_a("novaSenha", "Nova Senha"), normalizar=texto),
+)
 
 
 @router.get("/listagem", response_class=HTMLResponse)
@@ -26,13 +58,25 @@ async def getListagem(
     request: Request,
     pa: int = 1,
     tp: int = 6,
+    c: str = "",
     usuario: Usuario = Depends(validar_usuario_logado),
 ):
     if usuario:
         if usuario.admin:
-            alunos = AlunoRepo.obterPagina(pa, tp)
-            totalPaginas = AlunoRepo.obterQtdePaginas(tp)
-            qtdeAprovar = AlunoRepo.obterQtdeAprovar()
+            # com cursor (c), a página é buscada pela chave e não por deslocamento;
+            # também numa única consulta, com as contagens da tabela contador
+            if c:
+                pagina = await AlunoRepoAsync.obterPaginaCursor(tp, c)
+                alunos, proximo, anterior = pagina.itens, pagina.proximo, pagina.anterior
+                pa = 0
+                totalPaginas = pagina.totalPaginas
+                qtdeAprovar = pagina.contagens["pendentes"]
+            else:
+                # a página já vem com as contagens, numa única consulta
+                pagina = await AlunoRepoAsync.obterPaginaComContagens(pa, tp)
+                alunos, totalPaginas = pagina.itens, pagina.totalPaginas
+                qtdeAprovar = pagina.contagens["pendentes"]
+                proximo, anterior = cursores_da_pagina(alunos, pa, totalPaginas, chaveAluno)
             return templates.TemplateResponse(
                 "aluno/listagem.html",
                 {
@@ -41,6 +85,8 @@ async def getListagem(
                     "totalPaginas": totalPaginas,
                     "paginaAtual": pa,
                     "tamanhoPagina": tp,
+                    "proximo": proximo,
+                    "anterior": anterior,
                     "usuario": usuario,
                     "qtdeAprovar": qtdeAprovar,
                 },
@@ -59,7 +105,7 @@ async def getAprovar(
 ):
     if usuario:
         if usuario.admin:
-            return JSONResponse({"ok": AlunoRepo.aprovarCadastro(id)})
+            return JSONResponse({"ok": await AlunoRepoAsync.aprovarCadastro(id)})
         else:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
     else:
@@ -74,7 +120,48 @@ async def getDesaprovar(
 ):
     if usuario:
         if usuario.admin:
-            return JSONResponse({"ok": AlunoRepo.aprovarCadastro(id, False)})
+            return JSONResponse({"ok": await AlunoRepoAsync.aprovarCadastro(id, False)})
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+# quantidade máxima de cadastros por chamada das ações em lote
+LIMITE_LOTE = 500
+
+
+@router.post("/aprovar_lote")
+async def postAprovarLote(
+    ids: List[int] = Body(..., embed=True),
+    usuario: Usuario = Depends(validar_usuario_logado),
+):
+    if usuario:
+        if usuario.admin:
+            ids = list(dict.fromkeys(ids))
+            if not ids or len(ids) > LIMITE_LOTE:
+                return JSONResponse({"ok": False}, status_code=status.HTTP_400_BAD_REQUEST)
+            alterados, pendentes = await AlunoRepoAsync.aprovarCadastros(ids)
+            return JSONResponse({"ok": True, "alterados": alterados, "pendentes": pendentes})
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+@router.post("/recusar_lote")
+async def postRecusarLote(
+    ids: List[int] = Body(..., embed=True),
+    usuario: Usuario = Depends(validar_usuario_logado),
+):
+    if usuario:
+        if usuario.admin:
+            # recusar um cadastro pendente o exclui; alunos já aprovados não são afetados
+            ids = list(dict.fromkeys(ids))
+            if not ids or len(ids) > LIMITE_LOTE:
+                return JSONResponse({"ok": False}, status_code=status.HTTP_400_BAD_REQUEST)
+            alterados, pendentes = await AlunoRepoAsync.recusarCadastros(ids)
+            return JSONResponse({"ok": True, "alterados": alterados, "pendentes": pendentes})
         else:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
     else:
@@ -86,12 +173,24 @@ async def getAprovar(
     request: Request,
     pa: int = 1,
     tp: int = 6,
+    c: str = "",
     usuario: Usuario = Depends(validar_usuario_logado),
 ):
     if usuario:
         if usuario.admin:
-            alunos = AlunoRepo.obterPaginaAprovar(pa, tp)
-            totalPaginas = AlunoRepo.obterQtdePaginasAprovar(tp)
+            # com cursor (c), a página é buscada pela chave e não por deslocamento;
+            # também numa única consulta, com as contagens da tabela contador
+            if c:
+                pagina = await AlunoRepoAsync.obterPaginaAprovarCursor(tp, c)
+                alunos, proximo, anterior = pagina.itens, pagina.proximo, pagina.anterior
+                pa = 0
+                totalPaginas = pagina.totalPaginas
+                qtdeAprovar = pagina.contagens["pendentes"]
+            else:
+                pagina = await AlunoRepoAsync.obterPaginaAprovarComContagens(pa, tp)
+                alunos, totalPaginas = pagina.itens, pagina.totalPaginas
+                qtdeAprovar = pagina.contagens["pendentes"]
+                proximo, anterior = cursores_da_pagina(alunos, pa, totalPaginas, chaveAlunoAprovar)
             return templates.TemplateResponse(
                 "aluno/aprovar.html",
                 {
@@ -100,7 +199,10 @@ async def getAprovar(
                     "totalPaginas": totalPaginas,
                     "paginaAtual": pa,
                     "tamanhoPagina": tp,
+                    "proximo": proximo,
+                    "anterior": anterior,
                     "usuario": usuario,
+                    "qtdeAprovar": qtdeAprovar,
                 },
             )
         else:
@@ -111,7 +213,7 @@ async def getAprovar(
 
 @router.get("/novo", response_class=HTMLResponse)
 async def getNovo(request: Request, usuario: Usuario = Depends(validar_usuario_logado)):
-    projetos = ProjetoRepo.obterTodosParaSelect()
+    projetos = await ProjetoRepoAsync.obterTodosParaSelect()
     return templates.TemplateResponse(
         "aluno/novo.html",
         {"request": request, "usuario": usuario, "projetos": projetos},
@@ -148,7 +250,7 @@ async def postNovoJson(
             }
         )
         raise RequestValidationError(listaErros)
-    AlunoRepo.inserir(
+    await AlunoRepoAsync.inserir(
         Aluno(
             id=0,
             nome=nome.strip(),
@@ -170,38 +272,22 @@ async def postNovo(
     confSenha: str = Form(""),
     idProjeto: int = Form(0),
 ):
-    # normalização dos dados
-    nome = capitalizar_nome_proprio(nome).strip()
-    email = email.lower().strip()
-    senha = senha.strip()
-    confSenha = confSenha.strip()
-
-    # verificação de erros
-    erros = {}
-    # validação do campo nome
-    is_not_empty(nome, "nome", erros)
-    is_person_fullname(nome, "nome", erros)
-    # validação do campo email
-    is_not_empty(email, "email", erros)
-    if is_email(email, "email", erros):
-        if AlunoRepo.emailExiste(email):
-            add_error("email", "Já existe um aluno cadastrado com este e-mail.", erros)
-    # validação do campo senha
-    is_not_empty(senha, "senha", erros)
-    is_password(senha, "senha", erros)
-    # validação do campo confSenha
-    is_not_empty(confSenha, "confSenha", erros)
-    is_matching_fields(confSenha, "confSenha", senha, "Senha", erros)
-    # validação do campo idProjeto
-    is_selected_id_valid(idProjeto, "idProjeto", erros)
+    # normalização e verificação de erros
+    dados, erros = ESQUEMA_NOVO.validar(
+        {"nome": nome, "email": email, "senha": senha, "confSenha": confSenha, "idProjeto": idProjeto}
+    )
+    nome, email, senha = dados["nome"], dados["email"], dados["senha"]
+    # o banco só é consultado com um e-mail válido
+    if "email" not in erros and await AlunoRepoAsync.emailExiste(email):
+        add_error("email", "Já existe um aluno cadastrado com este e-mail.", erros)
 
     # se tem erro, mostra o formulário novamente
     if len(erros) > 0:
         valores = {}
         valores["nome"] = nome
-        valores["email"] = email.lower()
+        valores["email"] = email
         valores["idProjeto"] = idProjeto
-        projetos = ProjetoRepo.obterTodosParaSelect()
+        projetos = await ProjetoRepoAsync.obterTodosParaSelect()
         return templates.TemplateResponse(
             "aluno/novo.html",
             {
@@ -214,12 +300,13 @@ async def postNovo(
         )
 
     # inserção no banco de dados
-    AlunoRepo.inserir(
+    hash_senha = await servicoSenhas.gerarHash(senha)
+    await AlunoRepoAsync.inserir(
         Aluno(
             id=0,
             nome=nome,
             email=email,
-            senha=obter_hash_senha(senha),
+            senha=hash_senha,
             idProjeto=idProjeto,
         )
     )
@@ -231,6 +318,105 @@ async def postNovo(
     )
 
 
+def lerAlunoImportado(registro: dict, idsProjetos: set, erros: dict) -> Aluno:
+    # mesmas normalizações e validações do cadastro (postNovo); alunos importados
+    # pelo administrador já entram aprovados, salvo coluna aprovado com valor falso
+    dados, errosRegistro = ESQUEMA_IMPORTACAO.validar(registro)
+    erros.update(errosRegistro)
+    aprovado = str(registro.get("aprovado", "")).strip().lower() not in ("0", "false", "nao", "não")
+    if "idProjeto" not in erros and dados["idProjeto"] not in idsProjetos:
+        add_error("idProjeto", "Projeto não encontrado.", erros)
+    return Aluno(
+        id=0,
+        nome=dados["nome"],
+        email=dados["email"],
+        senha=dados["senha"],
+        idProjeto=dados["idProjeto"],
+        aprovado=aprovado,
+    )
+
+
+@router.post("/importar")
+async def postImportar(
+    usuario: Usuario = Depends(validar_usuario_logado),
+    arquivo: UploadFile = File(...),
+):
+    if usuario:
+        if usuario.admin:
+            idsProjetos = {p.id for p in await ProjetoRepoAsync.obterTodosParaSelect()}
+            emailsVistos = set()
+            inseridos = 0
+            rejeitados = 0
+            listaErros = []
+
+            def rejeitar(numero: int, erros: dict):
+                nonlocal rejeitados
+                rejeitados += 1
+                if len(listaErros) < LIMITE_ERROS:
+                    listaErros.append({"registro": numero, "erros": erros})
+
+            try:
+                # o arquivo é lido em blocos e os registros são tratados em lotes
+                async for lote in em_lotes(ler_registros(arquivo)):
+                    validos = []
+                    for numero, registro in lote:
+                        erros = {}
+                        aluno = lerAlunoImportado(registro, idsProjetos, erros)
+                        if not erros and aluno.email in emailsVistos:
+                            add_error("email", "E-mail repetido no arquivo.", erros)
+                        if erros:
+                            rejeitar(numero, erros)
+                            continue
+                        emailsVistos.add(aluno.email)
+                        validos.append((numero, aluno))
+                    if not validos:
+                        continue
+                    existentes = await AlunoRepoAsync.obterEmailsExistentes(
+                        [aluno.email for _, aluno in validos]
+                    )
+                    alunos = []
+                    for numero, aluno in validos:
+                        if aluno.email in existentes:
+                            rejeitar(numero, {"email": ["Já existe um aluno cadastrado com este e-mail."]})
+                        else:
+                            alunos.append(aluno)
+                    # o bcrypt é o passo mais caro: as senhas do lote são
+                    # distribuídas entre os processos do pool
+                    hashes = await servicoSenhas.gerarHashes([aluno.senha for aluno in alunos])
+                    for aluno, hash_senha in zip(alunos, hashes):
+                        aluno.senha = hash_senha
+                    inseridos += await AlunoRepoAsync.inserirVarios(alunos)
+            except ErroImportacao as e:
+                # os lotes anteriores ao erro já foram gravados
+                return JSONResponse(
+                    {"ok": False, "erro": str(e), "inseridos": inseridos, "rejeitados": rejeitados, "erros": listaErros},
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            return JSONResponse(
+                {"ok": True, "inseridos": inseridos, "rejeitados": rejeitados, "erros": listaErros}
+            )
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+@router.get("/exportar")
+async def getExportar(
+    formato: str = "csv",
+    usuario: Usuario = Depends(validar_usuario_logado),
+):
+    if usuario:
+        if usuario.admin:
+            return resposta_exportacao(
+                "alunos", COLUNAS_EXPORTACAO, AlunoRepoAsync.percorrerTodos(), formato
+            )
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
 @router.get("/excluir/{id:int}", response_class=HTMLResponse)
 async def getExcluir(
     request: Request,
@@ -239,7 +425,7 @@ async def getExcluir(
 ):
     if usuario:
         if usuario.admin:
-            aluno = AlunoRepo.obterPorId(id)
+            aluno = await AlunoRepoAsync.obterPorId(id)
             return templates.TemplateResponse(
                 "aluno/excluir.html",
                 {"request": request, "usuario": usuario, "aluno": aluno},
@@ -258,7 +444,7 @@ async def postExcluir(
 ):
     if usuario:
         if usuario.admin:
-            if AlunoRepo.excluir(id):
+            if await AlunoRepoAsync.excluir(id):
                 return RedirectResponse(
                     "/aluno/listagem", status_code=status.HTTP_303_SEE_OTHER
                 )
@@ -275,7 +461,7 @@ async def getDashboard(
     request: Request, usuario: Usuario = Depends(validar_usuario_logado)
 ):
     if usuario:
-        aluno = AlunoRepo.obterPorId(usuario.id)
+        aluno = await AlunoRepoAsync.obterPorId(usuario.id)
         if aluno:
             return templates.TemplateResponse(
                 "aluno/dashboard.html",
@@ -307,28 +493,17 @@ async def postAlterarSenha(
     novaSenha: str = Form(""),
     confNovaSenha: str = Form(""),    
 ):
-    # normalização dos dados
-    senhaAtual = senhaAtual.strip()
-    novaSenha = novaSenha.strip()
-    confNovaSenha = confNovaSenha.strip()    
-
-    # verificação de erros
-    erros = {}
-    # validação do campo senhaAtual
-    is_not_empty(senhaAtual, "senhaAtual", erros)
-    is_password(senhaAtual, "senhaAtual", erros)    
-    # validação do campo novaSenha
-    is_not_empty(novaSenha, "novaSenha", erros)
-    is_password(novaSenha, "novaSenha", erros)
-    # validação do campo confNovaSenha
-    is_not_empty(confNovaSenha, "confNovaSenha", erros)
-    is_matching_fields(confNovaSenha, "confNovaSenha", novaSenha, "Nova Senha", erros)
+    # normalização e verificação de erros
+    dados, erros = ESQUEMA_ALTERAR_SENHA.validar(
+        {"senhaAtual": senhaAtual, "novaSenha": novaSenha, "confNovaSenha": confNovaSenha}
+    )
+    senhaAtual, novaSenha = dados["senhaAtual"], dados["novaSenha"]
     
     # só verifica a senha no banco de dados se não houverem erros de validação
     if len(erros) == 0:    
-        hash_senha_bd = AlunoRepo.obterSenhaDeEmail(usuario.email)
+        hash_senha_bd = await AlunoRepoAsync.obterSenhaDeEmail(usuario.email)
         if hash_senha_bd:
-            if not verificar_senha(senhaAtual, hash_senha_bd):            
+            if not await servicoSenhas.verificar(senhaAtual, hash_senha_bd):            
                 add_error("senhaAtual", "Senha atual está incorreta.", erros)
     
     # se tem erro, mostra o formulário novamente
@@ -345,8 +520,8 @@ async def postAlterarSenha(
         )
 
     # se passou pelas validações, altera a senha no banco de dados
-    hash_nova_senha = obter_hash_senha(novaSenha)
-    AlunoRepo.alterarSenha(usuario.id, hash_nova_senha)
+    hash_nova_senha = await servicoSenhas.gerarHash(novaSenha)
+    await AlunoRepoAsync.alterarSenha(usuario.id, hash_nova_senha)
     
     # mostra página de sucesso
     return templates.TemplateResponse(
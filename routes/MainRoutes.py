@@ -1,37 +1,47 @@
 # routes/MainRoutes.py
-from fastapi import APIRouter, Depends, Form, Query, Request, status
-from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, Query, Request, status
+from fastapi.responses import RedirectResponse, Response
 from models.Usuario import Usuario
-from repositories.AlunoRepo import AlunoRepo
-from repositories.ProjetoRepo import ProjetoRepo
+from repositories.AlunoRepoAsync import AlunoRepoAsync
+from repositories.ProjetoRepoAsync import ProjetoRepoAsync
+from util.formSchema import EMAIL, OBRIGATORIO, Campo, Esquema, minusculo, texto
+from util.metrics import TIPO_PROMETHEUS, acesso_metricas_permitido, registroMetricas
+from util.pageCache import cachePaginas
+from util.passwordHashing import servicoSenhas
+from util.rateLimit import limitadorLogin, verificar_limite_login
 from util.security import (
     gerar_token,    
     validar_usuario_logado,
-    verificar_senha,
 )
-from util.templateFilters import formatarData, formatarIdParaImagem
+from util.templates import templates
 from util.validators import *
 
 
 router = APIRouter()
 
-templates = Jinja2Templates(directory="templates")
-
-
-@router.on_event("startup")
-async def startup_event():
-    templates.env.filters["date"] = formatarData
-    templates.env.filters["id_img"] = formatarIdParaImagem
+# esquema de validação do formulário de login, compilado uma única vez
+ESQUEMA_LOGIN = Esquema(
+    email=Campo(OBRIGATORIO, EMAIL, normalizar=minusculo),
+    senha=Campo(OBRIGATORIO, normalizar=texto),
+)
 
 
 @router.get("/")
 async def getIndex(
     request: Request, usuario: Usuario = Depends(validar_usuario_logado)
 ):
-    projetos = ProjetoRepo.obterTodos()    
-    for projeto in projetos:
-        projeto.integrantes = ProjetoRepo.obterIntegrantes(projeto.id)
+    # visitantes sem sessão recebem sempre a mesma página, servida da memória
+    if not usuario:
+        pagina = cachePaginas.obter("/")
+        if pagina is None:
+            versao = cachePaginas.versao
+            projetos = await ProjetoRepoAsync.obterTodosComIntegrantes()
+            resposta = templates.TemplateResponse(
+                "main/index.html", {"request": request, "usuario": None, "projetos": projetos}
+            )
+            pagina = cachePaginas.guardar("/", resposta.body, versao)
+        return cachePaginas.responder(request, pagina)
+    projetos = await ProjetoRepoAsync.obterTodosComIntegrantes()
     return templates.TemplateResponse(
         "main/index.html", {"request": request, "usuario": usuario, "projetos": projetos}
     )
@@ -49,30 +59,29 @@ async def getLogin(
 @router.post("/login")
 async def postLogin(
     request: Request,
+    tarefas: BackgroundTasks,
+    # o limite de tentativas vem antes da sessão, que pode consultar o banco
+    _=Depends(verificar_limite_login),
     usuario: Usuario = Depends(validar_usuario_logado),
     email: str = Form(""),
     senha: str = Form(""),
     returnUrl: str = Query("/"),
 ):
-    # normalização de dados
-    email = email.strip().lower()
-    senha = senha.strip()
-    
-    # validação de dados
-    erros = {}
-    # validação do campo email
-    is_not_empty(email, "email", erros)
-    is_email(email, "email", erros)
-    # validação do campo senha
-    is_not_empty(senha, "senha", erros)
+    # normalização e validação de dados
+    dados, erros = ESQUEMA_LOGIN.validar({"email": email, "senha": senha})
+    email, senha = dados["email"], dados["senha"]
         
     # só checa a senha no BD se os dados forem válidos
     if len(erros) == 0:
-        hash_senha_bd = AlunoRepo.obterSenhaDeEmail(email)
+        hash_senha_bd = await AlunoRepoAsync.obterSenhaDeEmail(email)
         if hash_senha_bd:
-            if verificar_senha(senha, hash_senha_bd):
+            if await servicoSenhas.verificar(senha, hash_senha_bd):
+                if servicoSenhas.precisaRehash(hash_senha_bd):
+                    # hash com custo diferente do calibrado: refeito depois da resposta
+                    tarefas.add_task(servicoSenhas.rehash, email, senha, hash_senha_bd)
+                limitadorLogin.registrarSucesso(email)
                 token = gerar_token()
-                if AlunoRepo.alterarToken(email, token):
+                if await AlunoRepoAsync.alterarToken(email, token):
                     response = RedirectResponse(returnUrl, status.HTTP_302_FOUND)
                     response.set_cookie(
                         key="auth_token", value=token, max_age=1800, httponly=True
@@ -83,8 +92,10 @@ async def postLogin(
                         "Não foi possível alterar o token do usuário no banco de dados."
                     )
             else:            
+                limitadorLogin.registrarFalha(email)
                 add_error("senha", "Senha não confere.", erros)
         else:
+            limitadorLogin.registrarFalha(email)
             add_error("email", "Usuário não cadastrado.", erros)
 
     # se tem algum erro, mostra o formulário novamente
@@ -106,9 +117,19 @@ async def getLogout(
     request: Request, usuario: Usuario = Depends(validar_usuario_logado)
 ):   
     if (usuario):
-        AlunoRepo.alterarToken(usuario.email, "") 
+        await AlunoRepoAsync.alterarToken(usuario.email, "")
     response = RedirectResponse("/", status.HTTP_302_FOUND)
     response.set_cookie(
         key="auth_token", value="", httponly=True, expires="1970-01-01T00:00:00Z"
     )    
     return response
+
+
+@router.get("/metrics")
+async def getMetrics(
+    request: Request, usuario: Usuario = Depends(validar_usuario_logado)
+):
+    # lido pelo Prometheus; sem redirecionar para o login, como fazem as páginas
+    if not acesso_metricas_permitido(request, bool(usuario and usuario.admin)):
+        return Response(status_code=status.HTTP_403_FORBIDDEN)
+    return Response(registroMetricas.exportar(), media_type=TIPO_PROMETHEUS)
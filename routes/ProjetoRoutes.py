@@ -1,24 +1,30 @@
 # routes/ProjetoRoutes.py
-from io import BytesIO
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Path, Request, UploadFile, status
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from PIL import Image
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from models.Projeto import Projeto
 from models.Usuario import Usuario
-from repositories.ProjetoRepo import ProjetoRepo
+from repositories.ProjetoRepoAsync import ProjetoRepoAsync
+from repositories.ProjetoSql import COLUNAS_EXPORTACAO, chaveProjeto
+from util.bulkData import LIMITE_ERROS, ErroImportacao, em_lotes, ler_registros, resposta_exportacao
+from util.executors import executar_cpu
+from util.formSchema import NOME_PROJETO, OBRIGATORIO, Campo, Esquema, nome_proprio, tamanho_entre, texto
+from util.images import ImagemGrandeDemais, obter_dimensoes_imagem, salvar_imagem_projeto
+from util.pagination import cursores_da_pagina
 from util.security import validar_usuario_logado
-from util.templateFilters import capitalizar_nome_proprio, formatarData
+from util.staticAssets import registrar_estaticos
+from util.templates import templates
+from util.uploads import ErroUpload, receber_imagem, remover_temporario
 from util.validators import *
 
 
 router = APIRouter(prefix="/projeto")
-templates = Jinja2Templates(directory="templates")
 
-
-@router.on_event("startup")
-async def startup_event():
-    templates.env.filters["date"] = formatarData    
+# esquema de validação do cadastro e da importação de projetos, compilado uma única vez
+ESQUEMA_PROJETO = Esquema(
+    nome=Campo(OBRIGATORIO, tamanho_entre(4, 32), NOME_PROJETO, normalizar=nome_proprio),
+    descricao=Campo(OBRIGATORIO, tamanho_entre(4, 512), normalizar=texto),
+)
 
 
 @router.get("/listagem", response_class=HTMLResponse)
@@ -26,12 +32,22 @@ async def getListagem(
     request: Request,
     pa: int = 1,
     tp: int = 6,
+    c: str = "",
     usuario: Usuario = Depends(validar_usuario_logado),
 ):
     if usuario:
         if usuario.admin:
-            projetos = ProjetoRepo.obterPagina(pa, tp)
-            totalPaginas = ProjetoRepo.obterQtdePaginas(tp)
+            # com cursor (c), a página é buscada pela chave e não por deslocamento;
+            # também numa única consulta, com o total da tabela contador
+            if c:
+                pagina = await ProjetoRepoAsync.obterPaginaCursor(tp, c)
+                projetos, proximo, anterior = pagina.itens, pagina.proximo, pagina.anterior
+                pa = 0
+                totalPaginas = pagina.totalPaginas
+            else:
+                pagina = await ProjetoRepoAsync.obterPaginaComContagens(pa, tp)
+                projetos, totalPaginas = pagina.itens, pagina.totalPaginas
+                proximo, anterior = cursores_da_pagina(projetos, pa, totalPaginas, chaveProjeto)
             return templates.TemplateResponse(
                 "projeto/listagem.html",
                 {
@@ -40,6 +56,8 @@ async def getListagem(
                     "totalPaginas": totalPaginas,
                     "paginaAtual": pa,
                     "tamanhoPagina": tp,
+                    "proximo": proximo,
+                    "anterior": anterior,
                     "usuario": usuario,
                 },
             )
@@ -72,49 +90,54 @@ async def postNovo(
 ):
     if usuario:
         if usuario.admin:
-            # normalização de dados
-            nome = capitalizar_nome_proprio(nome).strip()
-            descricao = descricao.strip()
-
-            # tratamento de erros
-            erros = {}
-            
-            # validação do campo nome
-            is_not_empty(nome, "nome", erros)
-            is_size_between(nome, "nome", 4, 32, erros)
-            is_project_name(nome, "nome", erros)
+            # normalização e tratamento de erros
+            dados, erros = ESQUEMA_PROJETO.validar({"nome": nome, "descricao": descricao})
+            nome, descricao = dados["nome"], dados["descricao"]
             
-            # validação do campo descricao
-            is_not_empty(descricao, "descricao", erros)
-            is_size_between(descricao, "descricao", 4, 512, erros)
-            
-            # validação da imagem
-            conteudo_arquivo = await arquivoImagem.read()
-            imagem = Image.open(BytesIO(conteudo_arquivo))
-            if not imagem:
-                add_error("arquivoImagem", "Nenhuma imagem foi enviada.", erros)
-            if imagem.width != imagem.height:
-                add_error("arquivoImagem", "A imagem precisa ser quadrada.", erros)
-
-            # se tem erro, mostra o formulário novamente
-            if len(erros) > 0:
-                valores = {}
-                valores["nome"] = nome
-                valores["descricao"] = descricao
-                return templates.TemplateResponse(
-                    "projeto/novo.html",
-                    {
-                        "request": request,
-                        "usuario": usuario,
-                        "erros": erros,
-                        "valores": valores,
-                    },
-                )
-
-            # grava os dados no banco e redireciona para a listagem
-            novo_projeto = ProjetoRepo.inserir(Projeto(0, nome, descricao))
-            if (novo_projeto):
-                imagem.save(f"static/img/projetos/{novo_projeto.id:04d}.jpg", "JPEG")
+            # validação da imagem: só o cabeçalho é analisado, sem decodificar os pixels
+            caminhoImagem = None
+            try:
+                try:
+                    caminhoImagem = await receber_imagem(arquivoImagem)
+                    dimensoes = await run_in_threadpool(obter_dimensoes_imagem, caminhoImagem)
+                    if not dimensoes:
+                        add_error("arquivoImagem", "Nenhuma imagem foi enviada.", erros)
+                    elif dimensoes[0] != dimensoes[1]:
+                        add_error("arquivoImagem", "A imagem precisa ser quadrada.", erros)
+                except ImagemGrandeDemais:
+                    add_error("arquivoImagem", "A imagem é grande demais.", erros)
+                except ErroUpload as erro:
+                    add_error("arquivoImagem", str(erro), erros)
+
+                # se tem erro, mostra o formulário novamente
+                if len(erros) > 0:
+                    valores = {}
+                    valores["nome"] = nome
+                    valores["descricao"] = descricao
+                    return templates.TemplateResponse(
+                        "projeto/novo.html",
+                        {
+                            "request": request,
+                            "usuario": usuario,
+                            "erros": erros,
+                            "valores": valores,
+                        },
+                    )
+
+                # grava os dados no banco e redireciona para a listagem
+                novo_projeto = await ProjetoRepoAsync.inserir(Projeto(0, nome, descricao))
+                if (novo_projeto):
+                    # variantes redimensionadas em JPEG progressivo, WebP e AVIF; o processo
+                    # do pool recebe só o caminho do upload, já validado e limitado em tamanho
+                    gravados = await executar_cpu(salvar_imagem_projeto, caminhoImagem, novo_projeto.id)
+                    # as imagens novas entram no manifesto dos estáticos fora do loop de
+                    # eventos; a renderização das páginas só consulta o manifesto
+                    await run_in_threadpool(registrar_estaticos, gravados)
+                    # uma página montada entre o inserir e a gravação das variantes ficou
+                    # sem o srcset e com a imagem sem versão: é descartada agora
+                    await ProjetoRepoAsync.invalidarPaginas()
+            finally:
+                remover_temporario(caminhoImagem)
             return RedirectResponse(
                 "/projeto/listagem", status_code=status.HTTP_303_SEE_OTHER
             )
@@ -124,6 +147,70 @@ async def postNovo(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
 
+def lerProjetoImportado(registro: dict, erros: dict) -> Projeto:
+    # mesmas normalizações e validações do cadastro (postNovo); a imagem do
+    # projeto não faz parte da importação
+    dados, errosRegistro = ESQUEMA_PROJETO.validar(registro)
+    erros.update(errosRegistro)
+    return Projeto(0, dados["nome"], dados["descricao"])
+
+
+@router.post("/importar")
+async def postImportar(
+    usuario: Usuario = Depends(validar_usuario_logado),
+    arquivo: UploadFile = File(...),
+):
+    if usuario:
+        if usuario.admin:
+            inseridos = 0
+            rejeitados = 0
+            listaErros = []
+            try:
+                # o arquivo é lido em blocos e os registros são gravados em lotes
+                async for lote in em_lotes(ler_registros(arquivo)):
+                    projetos = []
+                    for numero, registro in lote:
+                        erros = {}
+                        projeto = lerProjetoImportado(registro, erros)
+                        if erros:
+                            rejeitados += 1
+                            if len(listaErros) < LIMITE_ERROS:
+                                listaErros.append({"registro": numero, "erros": erros})
+                        else:
+                            projetos.append(projeto)
+                    if projetos:
+                        inseridos += await ProjetoRepoAsync.inserirVarios(projetos)
+            except ErroImportacao as e:
+                # os lotes anteriores ao erro já foram gravados
+                return JSONResponse(
+                    {"ok": False, "erro": str(e), "inseridos": inseridos, "rejeitados": rejeitados, "erros": listaErros},
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            return JSONResponse(
+                {"ok": True, "inseridos": inseridos, "rejeitados": rejeitados, "erros": listaErros}
+            )
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+@router.get("/exportar")
+async def getExportar(
+    formato: str = "csv",
+    usuario: Usuario = Depends(validar_usuario_logado),
+):
+    if usuario:
+        if usuario.admin:
+            return resposta_exportacao(
+                "projetos", COLUNAS_EXPORTACAO, ProjetoRepoAsync.percorrerTodos(), formato
+            )
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
 @router.get("/excluir/{id:int}", response_class=HTMLResponse)
 async def getExcluir(
     request: Request,
@@ -132,7 +219,7 @@ async def getExcluir(
 ):
     if usuario:
         if usuario.admin:
-            projeto = ProjetoRepo.obterPorId(id)
+            projeto = await ProjetoRepoAsync.obterPorId(id)
             return templates.TemplateResponse(
                 "projeto/excluir.html",
                 {"request": request, "usuario": usuario, "projeto": projeto},
@@ -151,7 +238,7 @@ async def postExcluir(
 ):
     if usuario:
         if usuario.admin:
-            if ProjetoRepo.excluir(id):
+            if await ProjetoRepoAsync.excluir(id):
                 return RedirectResponse("/projeto/listagem", status_code=status.HTTP_303_SEE_OTHER)
             else:
                 raise Exception("Não foi possível excluir o projeto.")
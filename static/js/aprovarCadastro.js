@@ -1,22 +1,25 @@
-// Função para fazer a chamada da API
-async function desaprovarCadastro(id) {
+// Aprova ou recusa vários cadastros em uma única chamada da API, sem recarregar a página
+async function enviarLote(acao, ids, botao) {
     try {
-        const url = `/aluno/aprovar/${id}`;        
+        const url = `/aluno/${acao}_lote`;
         const response = await fetch(url, {
-            method: 'GET',
+            method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
-            }
-        });        
+            },
+            body: JSON.stringify({ ids: ids.map(Number) })
+        });
         const data = await response.json();
-        if (data.ok) {
-            ocultarTooltipErro(id);
-            removerLinhaComAnimacao(id);            
+        if (response.ok && data.ok) {
+            ocultarTooltip(botao);
+            ids.forEach((id) => removerLinhaComAnimacao(id));
+            atualizarQtdePendentes(data.pendentes);
         } else {
-            mostrarTooltipErro(id);
+            mostrarTooltipErro(botao, acao);
         }
     } catch (error) {
-        console.error('Erro ao chamar a API:', error);        
+        console.error('Erro ao chamar a API:', error);
+        mostrarTooltipErro(botao, acao);
     }
 }
 
@@ -26,27 +29,57 @@ function removerLinhaComAnimacao(id) {
         const rect = linha.getBoundingClientRect();
         linha.style.height = `${rect.height}px`;
         void linha.offsetHeight;
-        linha.classList.add('fade-out');        
+        linha.classList.add('fade-out');
         linha.addEventListener('animationend', () => {
             linha.remove();
-            recarregarPagina();
+            atualizarBotoesLote();
+            recarregarSeVazia();
         });
     }
 }
 
-function ocultarTooltipErro(id) {
-    const botao = document.querySelector(`button.btn-success[data-id="${id}"]`);
-    if (botao) {
-        var tooltip = bootstrap.Tooltip.getInstance(botao);
+function atualizarQtdePendentes(pendentes) {
+    const badge = document.getElementById('qtdePendentes');
+    if (badge) {
+        badge.textContent = pendentes;
+    }
+}
+
+function recarregarSeVazia() {
+    // só busca a próxima página quando a atual ficou sem cadastros
+    const trs = document.querySelectorAll('tbody>tr');
+    if (trs.length === 0) {
+        window.location.href = '/aluno/aprovar';
+    }
+}
+
+function idsSelecionados() {
+    const marcados = document.querySelectorAll('input.selecao:checked');
+    return Array.from(marcados, (caixa) => caixa.value);
+}
+
+function atualizarBotoesLote() {
+    const quantidade = idsSelecionados().length;
+    document.getElementById('aprovarSelecionados').disabled = quantidade === 0;
+    document.getElementById('recusarSelecionados').disabled = quantidade === 0;
+    const todas = document.querySelectorAll('input.selecao');
+    const selecionarTodos = document.getElementById('selecionarTodos');
+    selecionarTodos.checked = todas.length > 0 && quantidade === todas.length;
+    selecionarTodos.indeterminate = quantidade > 0 && quantidade < todas.length;
+}
+
+function ocultarTooltip(botao) {
+    const tooltip = bootstrap.Tooltip.getInstance(botao);
+    if (tooltip) {
         tooltip.hide();
     }
 }
 
-function mostrarTooltipErro(id) {
-    const botao = document.querySelector(`button.btn-success[data-id="${id}"]`);
-    if (botao) {
-        var tooltip = bootstrap.Tooltip.getInstance(botao);
-        tooltip._config.title = "Ocorreu um problema ao tentar aprovar o cadastro.";
+function mostrarTooltipErro(botao, acao) {
+    const tooltip = bootstrap.Tooltip.getInstance(botao);
+    if (tooltip) {
+        const verbo = acao === 'recusar' ? 'recusar' : 'aprovar';
+        tooltip._config.title = `Ocorreu um problema ao tentar ${verbo} o cadastro.`;
         tooltip.update();
         tooltip.show();
         setTimeout(() => {
@@ -55,21 +88,39 @@ function mostrarTooltipErro(id) {
     }
 }
 
-function recarregarPagina() {
-    //const trs = document.querySelectorAll('tbody>tr');        
-    //if (trs.length === 0) {
-    window.location.href = '/aluno/aprovar';
-    //}
-}
-
-// Adicionar um evento de clique a todos os elementos <a> com classe "btn-success"
-document.addEventListener('DOMContentLoaded', (event) => {    
-    const botoes = document.querySelectorAll('button.btn-success');
+document.addEventListener('DOMContentLoaded', (event) => {
+    // aprovação individual: o mesmo endpoint, com um único id
+    const botoes = document.querySelectorAll('button.aprovar');
     botoes.forEach((botao) => {
         botao.addEventListener('click', (event) => {
             event.preventDefault();
-            const id = botao.getAttribute('data-id');            
-            desaprovarCadastro(id);
+            enviarLote('aprovar', [botao.getAttribute('data-id')], botao);
+        });
+    });
+
+    document.querySelectorAll('input.selecao').forEach((caixa) => {
+        caixa.addEventListener('change', atualizarBotoesLote);
+    });
+
+    document.getElementById('selecionarTodos').addEventListener('change', (event) => {
+        document.querySelectorAll('input.selecao').forEach((caixa) => {
+            caixa.checked = event.target.checked;
         });
+        atualizarBotoesLote();
+    });
+
+    const aprovarSelecionados = document.getElementById('aprovarSelecionados');
+    aprovarSelecionados.addEventListener('click', (event) => {
+        event.preventDefault();
+        enviarLote('aprovar', idsSelecionados(), aprovarSelecionados);
+    });
+
+    const recusarSelecionados = document.getElementById('recusarSelecionados');
+    recusarSelecionados.addEventListener('click', (event) => {
+        event.preventDefault();
+        const ids = idsSelecionados();
+        if (confirm(`Recusar e excluir ${ids.length} cadastro(s)?`)) {
+            enviarLote('recusar', ids, recusarSelecionados);
+        }
     });
-});
\ No newline at end of file
+});
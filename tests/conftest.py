@@ -0,0 +1,19 @@
+# tests/conftest.py
+import pytest
+
+from repositories.AlunoRepo import AlunoRepo
+from repositories.ProjetoRepo import ProjetoRepo
+from util.Database import Database
+from util.migrations import migrar
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    # banco vazio com o esquema completo, sem tocar no dados.db do projeto
+    Database.fecharTodas()
+    monkeypatch.setattr(Database, "caminho", str(tmp_path / "dados.db"))
+    ProjetoRepo.criarTabela()
+    AlunoRepo.criarTabela()
+    migrar()
+    yield Database
+    Database.fecharTodas()
@@ -0,0 +1,88 @@
+# tests/test_formSchema.py
+import pytest
+
+from util.formSchema import (
+    EMAIL,
+    NOME_COMPLETO,
+    OBRIGATORIO,
+    SELECIONADO,
+    SENHA,
+    Campo,
+    Esquema,
+    igual_a,
+    inteiro,
+    minusculo,
+    nome_proprio,
+    tamanho_entre,
+    texto,
+)
+from util.validators import MENSAGEM_EMAIL, MENSAGEM_SELECAO, MENSAGEM_SENHA, MENSAGEM_VAZIO
+
+ESQUEMA = Esquema(
+    nome=Campo(OBRIGATORIO, NOME_COMPLETO, normalizar=nome_proprio),
+    email=Campo(OBRIGATORIO, EMAIL, normalizar=minusculo),
+    senha=Campo(OBRIGATORIO, SENHA, normalizar=texto),
+    confSenha=Campo(OBRIGATORIO, igual_a("senha", "Senha"), normalizar=texto),
+    idProjeto=Campo(SELECIONADO, normalizar=inteiro, padrao=0),
+)
+VALIDOS = {
+    "nome": "  maria da silva ",
+    "email": " Maria@Exemplo.COM ",
+    "senha": "Abc@123",
+    "confSenha": "Abc@123",
+    "idProjeto": "2",
+}
+
+
+def test_dados_validos_sao_normalizados():
+    valores, erros = ESQUEMA.validar(VALIDOS)
+    assert erros == {}
+    assert valores == {
+        "nome": "Maria da Silva",
+        "email": "maria@exemplo.com",
+        "senha": "Abc@123",
+        "confSenha": "Abc@123",
+        "idProjeto": 2,
+    }
+
+
+def test_campos_ausentes_usam_o_padrao():
+    valores, erros = ESQUEMA.validar({})
+    assert valores["idProjeto"] == 0
+    assert erros == {
+        "nome": [MENSAGEM_VAZIO],
+        "email": [MENSAGEM_VAZIO],
+        "senha": [MENSAGEM_VAZIO],
+        "confSenha": [MENSAGEM_VAZIO],
+        "idProjeto": [MENSAGEM_SELECAO],
+    }
+
+
+def test_cada_campo_para_no_primeiro_erro():
+    _, erros = ESQUEMA.validar({**VALIDOS, "email": "nao-e-email", "senha": "fraca", "confSenha": "fraca"})
+    assert erros == {"email": [MENSAGEM_EMAIL], "senha": [MENSAGEM_SENHA]}
+
+
+def test_regra_que_compara_com_outro_campo():
+    _, erros = ESQUEMA.validar({**VALIDOS, "confSenha": "Outra@123"})
+    assert list(erros) == ["confSenha"]
+    assert "Senha" in erros["confSenha"][0]
+
+
+@pytest.mark.parametrize("valor, valido", [("abc", False), ("abcd", True), ("a" * 8, True), ("a" * 9, False)])
+def test_tamanho_entre(valor, valido):
+    esquema = Esquema(descricao=Campo(tamanho_entre(4, 8), normalizar=texto))
+    _, erros = esquema.validar({"descricao": valor})
+    assert (erros == {}) is valido
+
+
+def test_normalizacoes_toleram_valores_nao_texto():
+    assert texto(None) == ""
+    assert texto(12) == "12"
+    assert inteiro("x") == 0
+    assert inteiro(None) == 0
+
+
+def test_regra_com_campo_inexistente_e_recusada():
+    with pytest.raises(ValueError):
+        Esquema(confSenha=Campo(igual_a("senha", "Senha")))
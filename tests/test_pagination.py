@@ -0,0 +1,97 @@
+# tests/test_pagination.py
+import base64
+
+import pytest
+
+from util.pagination import codificar_cursor, decodificar_cursor, ler_cursor, montar_pagina
+
+INICIO = ("", 0)
+
+
+@pytest.mark.parametrize("chave", [("Ana", 3), ("Café com Ação", 12), (0, "2023-01-01 10:00:00", 7)])
+@pytest.mark.parametrize("anterior", [False, True])
+def test_cursor_ida_e_volta(chave, anterior):
+    cursor = codificar_cursor(chave, anterior)
+    assert decodificar_cursor(cursor) == (chave, anterior)
+
+
+def test_cursor_seguro_para_url():
+    cursor = codificar_cursor(("a?b&c=d/ã", 1))
+    assert "=" not in cursor
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "None", "!!!", base64.urlsafe_b64encode(b"{}").decode(), base64.urlsafe_b64encode(b"[1]").decode()],
+)
+def test_cursor_invalido_vira_none(cursor):
+    assert decodificar_cursor(cursor) is None
+
+
+def test_ler_cursor_sem_cursor_ou_invalido_comeca_do_inicio():
+    assert ler_cursor(None, INICIO) == (INICIO, False, False)
+    assert ler_cursor("lixo", INICIO) == (INICIO, False, False)
+    # cursor de outra listagem, com chave de outro tamanho
+    assert ler_cursor(codificar_cursor(("a", 1, 2)), INICIO) == (INICIO, False, False)
+
+
+@pytest.mark.parametrize("chave", [(["a"], 1), ("a", {"b": 1}), ("a", "1"), (1, 1), ("a", True), ("a", None)])
+def test_ler_cursor_com_tipos_errados_comeca_do_inicio(chave):
+    assert ler_cursor(codificar_cursor(chave), INICIO) == (INICIO, False, False)
+
+
+def test_ler_cursor_valido():
+    assert ler_cursor(codificar_cursor(("Bia", 5), True), INICIO) == (("Bia", 5), True, True)
+
+
+def _pagina(linhas, tamanho, anterior=False, temCursor=False):
+    return montar_pagina(list(linhas), tamanho, anterior, temCursor, mapear=lambda x: x, chave=lambda x: x)
+
+
+def test_primeira_pagina_com_mais_itens():
+    pagina = _pagina([("a", 1), ("b", 2), ("c", 3)], 2)
+    assert pagina.itens == [("a", 1), ("b", 2)]
+    assert decodificar_cursor(pagina.proximo) == (("b", 2), False)
+    assert pagina.anterior is None
+
+
+def test_ultima_pagina_sem_proximo():
+    pagina = _pagina([("c", 3)], 2, temCursor=True)
+    assert pagina.proximo is None
+    assert decodificar_cursor(pagina.anterior) == (("c", 3), True)
+
+
+def test_busca_para_tras_volta_na_ordem():
+    # na busca para trás as linhas chegam invertidas, com o item extra no fim
+    pagina = _pagina([("c", 3), ("b", 2), ("a", 1)], 2, anterior=True, temCursor=True)
+    assert pagina.itens == [("b", 2), ("c", 3)]
+    assert decodificar_cursor(pagina.anterior) == (("b", 2), True)
+    assert decodificar_cursor(pagina.proximo) == (("c", 3), False)
+
+
+def test_pagina_vazia_sem_cursores():
+    pagina = _pagina([], 2, temCursor=True)
+    assert pagina.itens == []
+    assert pagina.proximo is None and pagina.anterior is None
+
+
+def test_pagina_por_cursor_com_contagens():
+    # as contagens vêm nas primeiras colunas de cada linha, como nas páginas por deslocamento
+    linhas = [(5, 2, "a", 1), (5, 2, "b", 2), (5, 2, "c", 3)]
+    pagina = montar_pagina(
+        linhas, 2, False, False, mapear=lambda x: x, chave=lambda x: x, nomesContagens=["aprovados", "pendentes"]
+    )
+    assert pagina.itens == [("a", 1), ("b", 2)]
+    assert pagina.contagens == {"aprovados": 5, "pendentes": 2}
+    assert (pagina.totalItens, pagina.totalPaginas) == (5, 3)
+    assert decodificar_cursor(pagina.proximo) == (("b", 2), False)
+
+
+def test_pagina_por_cursor_vazia_mantem_contagens():
+    # depois da última página, o LEFT JOIN devolve só a linha das contagens
+    pagina = montar_pagina(
+        [(4, None, None)], 2, False, True, mapear=lambda x: x, chave=lambda x: x, nomesContagens=["projetos"]
+    )
+    assert pagina.itens == []
+    assert (pagina.totalItens, pagina.totalPaginas) == (4, 2)
@@ -0,0 +1,18 @@
+# tests/test_queryPlan.py
+from util.queryPlan import consultas_com_varredura, listar_consultas
+
+
+def test_varreduras_de_aluno_sao_so_as_esperadas(banco):
+    # listar todos percorre a tabela por natureza (a exportação vai em lotes pelo
+    # id); qualquer outra consulta aqui perdeu o índice
+    assert consultas_com_varredura("aluno") == ["AlunoSql.OBTER_TODOS"]
+
+
+def test_nenhuma_varredura_de_projeto(banco):
+    assert consultas_com_varredura("projeto") == []
+
+
+def test_listar_consultas_traz_so_selects():
+    consultas = listar_consultas()
+    assert "AlunoSql.OBTER_TODOS" in consultas
+    assert all(sql.lstrip().upper().startswith("SELECT") for sql in consultas.values())
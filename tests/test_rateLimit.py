@@ -0,0 +1,128 @@
+# tests/test_rateLimit.py
+import pytest
+
+from util import rateLimit
+from util.rateLimit import BackendLimite, BackendMemoria, LimitadorLogin, RegraLimite
+
+JANELA = 60
+
+
+class Relogio:
+    def __init__(self, agora: float):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    # início de uma janela fixa, para as contas ficarem exatas
+    relogio = Relogio(JANELA * 1000)
+    monkeypatch.setattr(rateLimit.time, "time", relogio)
+    return relogio
+
+
+def _limitador(limiteIp: int = 100, limiteEmail: int = 3) -> LimitadorLogin:
+    return LimitadorLogin(
+        BackendMemoria(),
+        RegraLimite("ip", limiteIp, JANELA),
+        RegraLimite("email", limiteEmail, JANELA),
+    )
+
+
+def test_backend_e_abstrato():
+    with pytest.raises(TypeError):
+        BackendLimite()
+
+
+def test_janela_deslizante_pondera_a_anterior():
+    backend = BackendMemoria()
+    for _ in range(4):
+        backend.registrar("k", JANELA, 10)
+    assert backend.contar("k", JANELA, 59) == 4
+    # na metade da janela seguinte, a anterior vale metade
+    assert backend.contar("k", JANELA, 90) == 2
+    # duas janelas depois, não sobra nada
+    assert backend.contar("k", JANELA, 150) == 0
+
+
+def test_capacidade_descarta_as_chaves_menos_usadas():
+    backend = BackendMemoria(capacidade=2)
+    for chave in ("a", "b", "a", "c"):
+        backend.registrar(chave, JANELA, 0)
+    assert backend.tamanho() == 2
+    assert backend.contar("b", JANELA, 0) == 0
+    assert backend.contar("a", JANELA, 0) == 2
+
+
+def test_bloqueia_email_apos_as_falhas_e_libera_no_sucesso(relogio):
+    limitador = _limitador()
+    for _ in range(3):
+        assert limitador.verificar("1.1.1.1", "a@b.com") is None
+        limitador.registrarFalha("a@b.com")
+    assert limitador.verificar("1.1.1.1", "a@b.com")
+    # outro e-mail do mesmo IP continua permitido
+    assert limitador.verificar("1.1.1.1", "c@d.com") is None
+    limitador.registrarSucesso("a@b.com")
+    assert limitador.verificar("1.1.1.1", "a@b.com") is None
+    assert limitador.obterEstatisticas()["bloqueadasEmail"] == 1
+
+
+def test_bloqueia_ip_e_tentativas_bloqueadas_nao_contam(relogio):
+    limitador = _limitador(limiteIp=2)
+    assert limitador.verificar("1.1.1.1", "a@b.com") is None
+    assert limitador.verificar("1.1.1.1", "c@d.com") is None
+    for _ in range(5):
+        assert limitador.verificar("1.1.1.1", "e@f.com")
+    assert limitador.backend.contar("ip:1.1.1.1", JANELA, relogio.agora) == 2
+    assert limitador.verificar("2.2.2.2", "a@b.com") is None
+
+
+def _liberado_em(limitador: LimitadorLogin, relogio: Relogio, espera: int) -> bool:
+    inicio = relogio.agora
+    relogio.agora = inicio + espera - 1
+    bloqueado_antes = limitador.verificar("1.1.1.1", "a@b.com") is not None
+    relogio.agora = inicio + espera
+    return bloqueado_antes and limitador.verificar("1.1.1.1", "a@b.com") is None
+
+
+def test_retry_after_dentro_da_janela_atual(relogio):
+    # 7 falhas na janela anterior e 1 na atual: com limite 3, o peso da anterior
+    # precisa cair abaixo de 2, o que acontece antes do fim da janela atual
+    limitador = _limitador()
+    relogio.agora -= 30
+    for _ in range(7):
+        limitador.registrarFalha("a@b.com")
+    relogio.agora += 40
+    limitador.registrarFalha("a@b.com")
+    espera = limitador.verificar("1.1.1.1", "a@b.com")
+    # 7 * (1 - f) < 2  =>  f > 5/7  =>  42,9 s da janela, 10 já decorridos
+    assert espera == 33
+    assert _liberado_em(limitador, relogio, espera)
+
+
+def test_retry_after_depois_da_janela_atual(relogio):
+    # 7 falhas na janela atual já passam do limite: a espera vai até a próxima
+    # janela, quando o peso delas começa a cair
+    limitador = _limitador()
+    for _ in range(7):
+        limitador.registrarFalha("a@b.com")
+    relogio.agora += 10
+    espera = limitador.verificar("1.1.1.1", "a@b.com")
+    # 50 s até o fim da janela, mais 7 * (1 - f) < 3  =>  f > 4/7  =>  34,3 s
+    assert espera == 85
+    assert _liberado_em(limitador, relogio, espera)
+
+
+def test_retry_after_no_limite_exato(relogio):
+    # 5 * (1 - f) < 2 vale só depois de f = 0,6: aos 26 s a estimativa ainda é 3
+    limitador = _limitador()
+    relogio.agora -= 30
+    for _ in range(5):
+        limitador.registrarFalha("a@b.com")
+    relogio.agora += 40
+    limitador.registrarFalha("a@b.com")
+    espera = limitador.verificar("1.1.1.1", "a@b.com")
+    assert espera == 27
+    assert _liberado_em(limitador, relogio, espera)
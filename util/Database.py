@@ -1,8 +1,330 @@
 # util/Database.py
+import logging
 import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from util.queryTracing import ConexaoRastreada
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PerfilArmazenamento:
+    journalMode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # bytes mapeados em memória (0 desativa)
+    mmapSize: int = 64 * 1024 * 1024
+    # valores negativos são em KiB, positivos em páginas
+    cacheSize: int = -16000
+    # tempo (ms) que uma conexão espera por um lock antes de falhar
+    busyTimeout: int = 5000
+
+    def pragmas(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journalMode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={int(self.mmapSize)}",
+            f"PRAGMA cache_size={int(self.cacheSize)}",
+            f"PRAGMA busy_timeout={int(self.busyTimeout)}",
+        ]
+
 
 class Database:
+    caminho = "dados.db"
+    perfil = PerfilArmazenamento()
+    # quantidade máxima de conexões abertas ao mesmo tempo
+    tamanhoPool = 8
+    # tempo máximo (s) que uma requisição espera por uma conexão livre
+    tempoEsperaMaximo = 10.0
+    # tempo (s) a partir do qual uma conexão em uso é considerada vazada
+    tempoVazamento = 30.0
+    # tempo máximo (s) que uma escrita espera a sua vez na fila
+    tempoEsperaEscrita = 30.0
+
+    _condicao = threading.Condition()
+    _local = threading.local()
+    _ociosas = []
+    _emUso = {}
+    _totalCriadas = 0
+    # fila FIFO de quem aguarda a vez de escrever (escritas síncronas e as
+    # de util/DatabaseAsync.py): uma transação de escrita por vez no processo
+    _condicaoEscrita = threading.Condition()
+    _filaEscrita = deque()
+    _conexaoEscrita = None
+    _estatisticas = {
+        "criadas": 0,
+        "reutilizadas": 0,
+        "afinidade": 0,
+        "esperas": 0,
+        "timeouts": 0,
+        "vazamentos": 0,
+        "escritas": 0,
+        "esperasEscrita": 0,
+        "timeoutsEscrita": 0,
+    }
+
+    @classmethod
+    def configurar(cls, perfil: PerfilArmazenamento):
+        # as conexões já abertas continuam com o perfil antigo
+        cls.fecharTodas()
+        cls.perfil = perfil
+
+    @classmethod
+    def _novaConexao(cls, somenteLeitura: bool = True) -> sqlite3.Connection:
+        # check_same_thread=False porque a conexão pode ser devolvida ao
+        # pool por uma thread e reaproveitada por outra; a ConexaoRastreada mede
+        # cada consulta (util/queryTracing.py)
+        conexao = sqlite3.connect(
+            cls.caminho,
+            check_same_thread=False,
+            timeout=cls.perfil.busyTimeout / 1000,
+            factory=ConexaoRastreada,
+        )
+        try:
+            for pragma in cls.perfil.pragmas():
+                conexao.execute(pragma)
+            if somenteLeitura:
+                # toda escrita deve passar pela fila de Database.conexaoEscrita()
+                conexao.execute("PRAGMA query_only=ON")
+        except BaseException:
+            conexao.close()
+            raise
+        return conexao
+
+    @classmethod
+    def _adquirir(cls) -> sqlite3.Connection:
+        preferida = getattr(cls._local, "conexao", None)
+        inicio = time.monotonic()
+        pilha = "".join(traceback.format_stack(limit=6)[:-3])
+        conexao = None
+        with cls._condicao:
+            while True:
+                if preferida is not None and preferida in cls._ociosas:
+                    # a thread reaproveita a última conexão que usou
+                    cls._ociosas.remove(preferida)
+                    conexao = preferida
+                    cls._estatisticas["afinidade"] += 1
+                    cls._estatisticas["reutilizadas"] += 1
+                    break
+                if cls._ociosas:
+                    conexao = cls._ociosas.pop()
+                    cls._estatisticas["reutilizadas"] += 1
+                    break
+                if cls._totalCriadas < cls.tamanhoPool:
+                    # só reserva a vaga: a conexão é aberta fora do lock, para que a
+                    # abertura e os pragmas não travem quem pega ou devolve conexões
+                    cls._totalCriadas += 1
+                    break
+                restante = cls.tempoEsperaMaximo - (time.monotonic() - inicio)
+                if restante <= 0:
+                    cls._estatisticas["timeouts"] += 1
+                    cls._registrarVazamentos()
+                    raise TimeoutError(
+                        "Nenhuma conexão com o banco de dados ficou disponível a tempo."
+                    )
+                cls._estatisticas["esperas"] += 1
+                cls._condicao.wait(restante)
+            if conexao is not None:
+                cls._emUso[id(conexao)] = (threading.current_thread().name, time.monotonic(), pilha)
+        if conexao is None:
+            try:
+                conexao = cls._novaConexao()
+            except BaseException:
+                # devolve a vaga reservada
+                with cls._condicao:
+                    cls._totalCriadas -= 1
+                    cls._condicao.notify()
+                raise
+            with cls._condicao:
+                cls._estatisticas["criadas"] += 1
+                cls._emUso[id(conexao)] = (threading.current_thread().name, time.monotonic(), pilha)
+        cls._local.conexao = conexao
+        return conexao
+
+    @classmethod
+    def _devolver(cls, conexao: sqlite3.Connection):
+        with cls._condicao:
+            cls._emUso.pop(id(conexao), None)
+            cls._ociosas.append(conexao)
+            cls._condicao.notify()
+
+    @classmethod
+    def _descartar(cls, conexao: sqlite3.Connection):
+        with cls._condicao:
+            cls._emUso.pop(id(conexao), None)
+            cls._totalCriadas -= 1
+            cls._condicao.notify()
+        if getattr(cls._local, "conexao", None) is conexao:
+            cls._local.conexao = None
+        try:
+            conexao.close()
+        except sqlite3.Error:
+            pass
+
+    @classmethod
+    @contextmanager
+    def conexao(cls):
+        # uso aninhado na mesma thread reaproveita a conexão já adquirida
+        if getattr(cls._local, "profundidade", 0) > 0:
+            cls._local.profundidade += 1
+            try:
+                yield cls._local.conexao
+            finally:
+                cls._local.profundidade -= 1
+            return
+        conexao = cls._adquirir()
+        cls._local.profundidade = 1
+        try:
+            yield conexao
+            conexao.commit()
+        except BaseException:
+            cls._local.profundidade = 0
+            try:
+                conexao.rollback()
+            except sqlite3.Error:
+                # conexão em estado desconhecido: não volta para o pool
+                cls._descartar(conexao)
+            else:
+                cls._devolver(conexao)
+            raise
+        cls._local.profundidade = 0
+        cls._devolver(conexao)
+
+    @classmethod
+    @contextmanager
+    def conexaoEscrita(cls):
+        # uso aninhado na mesma thread participa da transação já aberta
+        if getattr(cls._local, "profundidadeEscrita", 0) > 0:
+            cls._local.profundidadeEscrita += 1
+            try:
+                yield cls._conexaoEscrita
+            finally:
+                cls._local.profundidadeEscrita -= 1
+            return
+        vez, pronta = cls._entrarFilaEscrita()
+        if not pronta:
+            cls._aguardarVezEscrita(vez)
+        cls._local.profundidadeEscrita = 1
+        try:
+            # criada aqui dentro: se falhar, a vez ainda é liberada no finally
+            if cls._conexaoEscrita is None:
+                conexao = cls._novaConexao(somenteLeitura=False)
+                # transações controladas manualmente com BEGIN IMMEDIATE
+                conexao.isolation_level = None
+                cls._conexaoEscrita = conexao
+            conexao = cls._conexaoEscrita
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+                conexao.execute("COMMIT")
+            except BaseException:
+                if conexao.in_transaction:
+                    try:
+                        conexao.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        # conexão em estado desconhecido: a próxima escrita abre outra
+                        cls._conexaoEscrita = None
+                        conexao.close()
+                raise
+            cls._estatisticas["escritas"] += 1
+        finally:
+            cls._local.profundidadeEscrita = 0
+            cls._sairFilaEscrita(vez)
+
+    @classmethod
+    def _entrarFilaEscrita(cls) -> tuple[object, bool]:
+        # devolve o marcador da vez e se ele já está no início da fila
+        vez = object()
+        with cls._condicaoEscrita:
+            cls._filaEscrita.append(vez)
+            if cls._filaEscrita[0] is vez:
+                return vez, True
+            cls._estatisticas["esperasEscrita"] += 1
+            return vez, False
+
+    @classmethod
+    def _aguardarVezEscrita(cls, vez: object):
+        inicio = time.monotonic()
+        with cls._condicaoEscrita:
+            while cls._filaEscrita[0] is not vez:
+                restante = cls.tempoEsperaEscrita - (time.monotonic() - inicio)
+                if restante <= 0:
+                    cls._filaEscrita.remove(vez)
+                    cls._estatisticas["timeoutsEscrita"] += 1
+                    raise TimeoutError(
+                        "A conexão de escrita com o banco de dados não ficou disponível a tempo."
+                    )
+                cls._condicaoEscrita.wait(restante)
+
+    @classmethod
+    def _sairFilaEscrita(cls, vez: object):
+        with cls._condicaoEscrita:
+            cls._filaEscrita.remove(vez)
+            cls._condicaoEscrita.notify_all()
+
+    @classmethod
+    def carregarRelacionados(
+        cls, sql: str, ids: list, tamanhoLote: int = 500
+    ) -> dict:
+        # o sql deve ter {ids} no lugar da lista do IN e trazer na primeira
+        # coluna o id ao qual cada linha se relaciona; o resultado agrupa as
+        # demais colunas por esse id, mantendo a ordem devolvida pelo banco
+        relacionados = {id: [] for id in ids}
+        ids = list(relacionados)
+        with cls.conexao() as conexao:
+            cursor = conexao.cursor()
+            for i in range(0, len(ids), tamanhoLote):
+                lote = ids[i : i + tamanhoLote]
+                marcadores = ", ".join("?" * len(lote))
+                for linha in cursor.execute(sql.format(ids=marcadores), lote):
+                    valor = linha[1] if len(linha) == 2 else linha[1:]
+                    relacionados[linha[0]].append(valor)
+        return relacionados
+
+    @classmethod
+    def _registrarVazamentos(cls) -> int:
+        # deve ser chamado com cls._condicao adquirida
+        agora = time.monotonic()
+        vazadas = 0
+        for thread, desde, pilha in cls._emUso.values():
+            if agora - desde >= cls.tempoVazamento:
+                vazadas += 1
+                logger.warning(
+                    f"Conexão em uso há {agora - desde:.1f}s pela thread {thread}, adquirida em:\n{pilha}"
+                )
+        cls._estatisticas["vazamentos"] += vazadas
+        return vazadas
+
+    @classmethod
+    def verificarVazamentos(cls) -> int:
+        with cls._condicao:
+            return cls._registrarVazamentos()
+
+    @classmethod
+    def obterEstatisticas(cls) -> dict:
+        with cls._condicao:
+            return {
+                "tamanhoPool": cls.tamanhoPool,
+                "abertas": cls._totalCriadas,
+                "emUso": len(cls._emUso),
+                "ociosas": len(cls._ociosas),
+                "filaEscrita": len(cls._filaEscrita),
+                **cls._estatisticas,
+            }
+
     @classmethod
-    def criarConexao(cls):
-        conexao = sqlite3.connect("dados.db")
-        return conexao
\ No newline at end of file
+    def fecharTodas(cls):
+        with cls._condicao:
+            for conexao in cls._ociosas:
+                conexao.close()
+            cls._totalCriadas -= len(cls._ociosas)
+            cls._ociosas.clear()
+        with cls._condicaoEscrita:
+            if cls._conexaoEscrita is not None and not cls._filaEscrita:
+                cls._conexaoEscrita.close()
+                cls._conexaoEscrita = None
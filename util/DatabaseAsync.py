@@ -0,0 +1,169 @@
+# util/DatabaseAsync.py
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from util.Database import Database
+from util.queryTracing import conectar_async
+
+
+class DatabaseAsync:
+    # mesmo caminho, perfil e tamanho de pool da versão síncrona (util/Database.py)
+    tamanhoPool = Database.tamanhoPool
+    # cada conexão guarda os comandos já preparados; como o SQL dos
+    # repositórios é sempre o mesmo texto, eles são reaproveitados
+    comandosPreparados = 256
+
+    _ociosas = []
+    # o semáforo limita as conexões de leitura e, com elas, as threads do aiosqlite
+    # (uma por conexão); quem passa do limite espera na fila do semáforo
+    _semaforo = asyncio.Semaphore(tamanhoPool)
+    _naFila = 0
+    _maiorFila = 0
+    _emUso = 0
+    _conexaoEscrita = None
+    _estatisticas = {"criadas": 0, "reutilizadas": 0, "esperas": 0, "escritas": 0}
+
+    @classmethod
+    async def _novaConexao(cls, somenteLeitura: bool = True) -> aiosqlite.Connection:
+        perfil = Database.perfil
+        conexao = await conectar_async(
+            Database.caminho,
+            timeout=perfil.busyTimeout / 1000,
+            cached_statements=cls.comandosPreparados,
+            # a conexão de escrita controla as transações com BEGIN IMMEDIATE
+            isolation_level="" if somenteLeitura else None,
+        )
+        try:
+            for pragma in perfil.pragmas():
+                await conexao.execute(pragma)
+            if somenteLeitura:
+                # toda escrita deve passar por DatabaseAsync.conexaoEscrita()
+                await conexao.execute("PRAGMA query_only=ON")
+        except BaseException:
+            await conexao.close()
+            raise
+        cls._estatisticas["criadas"] += 1
+        return conexao
+
+    @classmethod
+    @asynccontextmanager
+    async def conexao(cls):
+        if cls._semaforo.locked():
+            cls._estatisticas["esperas"] += 1
+        cls._naFila += 1
+        cls._maiorFila = max(cls._maiorFila, cls._naFila)
+        try:
+            await cls._semaforo.acquire()
+        finally:
+            cls._naFila -= 1
+        cls._emUso += 1
+        try:
+            if cls._ociosas:
+                conexao = cls._ociosas.pop()
+                cls._estatisticas["reutilizadas"] += 1
+            else:
+                conexao = await cls._novaConexao()
+            try:
+                yield conexao
+            except BaseException:
+                try:
+                    await conexao.rollback()
+                except Exception:
+                    # conexão em estado desconhecido: não volta para o pool
+                    await conexao.close()
+                    raise
+                cls._ociosas.append(conexao)
+                raise
+            cls._ociosas.append(conexao)
+        finally:
+            cls._emUso -= 1
+            cls._semaforo.release()
+
+    @classmethod
+    async def _aguardarVezEscrita(cls) -> object:
+        # as escritas assíncronas entram na mesma fila FIFO das síncronas
+        # (Database.conexaoEscrita): uma transação de escrita por vez no
+        # processo, sem depender do busy_timeout entre as duas camadas
+        vez, pronta = Database._entrarFilaEscrita()
+        if pronta:
+            return vez
+        espera = asyncio.get_running_loop().run_in_executor(
+            None, Database._aguardarVezEscrita, vez
+        )
+        try:
+            await asyncio.shield(espera)
+        except asyncio.CancelledError:
+            # a thread continua na fila: quando a vez chegar, é devolvida
+            espera.add_done_callback(
+                lambda f: f.cancelled()
+                or f.exception() is not None
+                or Database._sairFilaEscrita(vez)
+            )
+            raise
+        return vez
+
+    @classmethod
+    @asynccontextmanager
+    async def conexaoEscrita(cls):
+        vez = await cls._aguardarVezEscrita()
+        try:
+            if cls._conexaoEscrita is None:
+                cls._conexaoEscrita = await cls._novaConexao(somenteLeitura=False)
+            conexao = cls._conexaoEscrita
+            await conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+                await conexao.execute("COMMIT")
+            except BaseException:
+                if conexao.in_transaction:
+                    try:
+                        await conexao.execute("ROLLBACK")
+                    except Exception:
+                        # conexão em estado desconhecido: a próxima escrita abre outra
+                        cls._conexaoEscrita = None
+                        await conexao.close()
+                raise
+            cls._estatisticas["escritas"] += 1
+        finally:
+            Database._sairFilaEscrita(vez)
+
+    @classmethod
+    async def carregarRelacionados(
+        cls, sql: str, ids: list, tamanhoLote: int = 500
+    ) -> dict:
+        # mesmo contrato de Database.carregarRelacionados
+        relacionados = {id: [] for id in ids}
+        ids = list(relacionados)
+        async with cls.conexao() as conexao:
+            for i in range(0, len(ids), tamanhoLote):
+                lote = ids[i : i + tamanhoLote]
+                marcadores = ", ".join("?" * len(lote))
+                for linha in await conexao.execute_fetchall(sql.format(ids=marcadores), lote):
+                    valor = linha[1] if len(linha) == 2 else linha[1:]
+                    relacionados[linha[0]].append(valor)
+        return relacionados
+
+    @classmethod
+    def obterEstatisticas(cls) -> dict:
+        return {
+            "tamanhoPool": cls.tamanhoPool,
+            "emUso": cls._emUso,
+            "ociosas": len(cls._ociosas),
+            "naFila": cls._naFila,
+            "maiorFila": cls._maiorFila,
+            **cls._estatisticas,
+        }
+
+    @classmethod
+    async def fecharTodas(cls):
+        while cls._ociosas:
+            await cls._ociosas.pop().close()
+        vez = await cls._aguardarVezEscrita()
+        try:
+            if cls._conexaoEscrita is not None:
+                await cls._conexaoEscrita.close()
+                cls._conexaoEscrita = None
+        finally:
+            Database._sairFilaEscrita(vez)
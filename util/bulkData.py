@@ -0,0 +1,203 @@
+# util/bulkData.py
+# importação e exportação em massa: os arquivos são lidos e gerados em streaming,
+# sem manter todos os registros na memória
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from util.uploads import TAMANHO_BLOCO
+
+
+# registros por transação (e por rodada de hash de senhas) na importação
+TAMANHO_LOTE = 200
+# linhas acumuladas antes de enviar um bloco da exportação
+LINHAS_POR_BLOCO = 500
+# a resposta da importação lista no máximo estes registros rejeitados
+LIMITE_ERROS = 100
+_SEPARADORES_JSON = " \t\r\n,"
+# o StreamingResponse acrescenta o charset (utf-8) aos tipos text/*
+TIPOS_EXPORTACAO = {"csv": "text/csv", "json": "application/json"}
+
+
+class ErroImportacao(Exception):
+    pass
+
+
+def formato_do_arquivo(arquivo: UploadFile) -> str | None:
+    nome = (arquivo.filename or "").lower()
+    tipo = (arquivo.content_type or "").split(";")[0].strip()
+    if nome.endswith(".csv") or tipo in ("text/csv", "application/vnd.ms-excel"):
+        return "csv"
+    if nome.endswith((".json", ".jsonl", ".ndjson")) or tipo in ("application/json", "application/x-ndjson"):
+        return "json"
+    return None
+
+
+async def _ler_texto(arquivo: UploadFile) -> AsyncIterator[str]:
+    # decodificador incremental: um caractere pode ficar dividido entre dois blocos
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        while bloco := await arquivo.read(TAMANHO_BLOCO):
+            if texto := decodificador.decode(bloco):
+                yield texto
+        if texto := decodificador.decode(b"", final=True):
+            yield texto
+    except UnicodeDecodeError:
+        raise ErroImportacao("O arquivo deve estar codificado em UTF-8.")
+
+
+async def _ler_linhas(arquivo: UploadFile) -> AsyncIterator[str]:
+    pendente = ""
+    async for texto in _ler_texto(arquivo):
+        *linhas, pendente = (pendente + texto).split("\n")
+        for linha in linhas:
+            yield linha + "\n"
+    if pendente:
+        yield pendente
+
+
+async def ler_registros_csv(arquivo: UploadFile) -> AsyncIterator[tuple[int, dict]]:
+    # a primeira linha traz os nomes das colunas; um registro pode ocupar várias linhas
+    # (campo entre aspas com quebra de linha), então as linhas são acumuladas até
+    # que as aspas estejam balanceadas
+    colunas = None
+    delimitador = ","
+    registro = ""
+    numero = 0
+    async for linha in _ler_linhas(arquivo):
+        registro += linha
+        if registro.count('"') % 2:
+            continue
+        if colunas is None:
+            # planilhas em português costumam exportar CSV separado por ponto e vírgula
+            delimitador = ";" if registro.count(";") > registro.count(",") else ","
+        valores = next(csv.reader([registro], delimiter=delimitador), [])
+        registro = ""
+        if not any(valor.strip() for valor in valores):
+            continue
+        if colunas is None:
+            colunas = [valor.strip() for valor in valores]
+            continue
+        numero += 1
+        yield numero, dict(zip(colunas, valores))
+    if registro.strip():
+        raise ErroImportacao("O arquivo CSV termina com aspas não fechadas.")
+
+
+async def ler_registros_json(arquivo: UploadFile) -> AsyncIterator[tuple[int, dict]]:
+    # aceita um array de objetos ou um objeto por linha (JSON Lines); cada objeto
+    # é decodificado assim que chega por completo
+    decodificador = json.JSONDecoder()
+    pendente = ""
+    emArray = None
+    terminado = False
+    numero = 0
+    async for texto in _ler_texto(arquivo):
+        if terminado:
+            if texto.strip():
+                raise ErroImportacao("Há conteúdo depois do fim do array JSON.")
+            continue
+        pendente += texto
+        posicao = 0
+        while True:
+            while posicao < len(pendente) and pendente[posicao] in _SEPARADORES_JSON:
+                posicao += 1
+            if posicao == len(pendente):
+                break
+            if emArray is None:
+                emArray = pendente[posicao] == "["
+                if emArray:
+                    posicao += 1
+                    continue
+            if emArray and pendente[posicao] == "]":
+                if pendente[posicao + 1 :].strip():
+                    raise ErroImportacao("Há conteúdo depois do fim do array JSON.")
+                terminado = True
+                posicao = len(pendente)
+                break
+            try:
+                objeto, fim = decodificador.raw_decode(pendente, posicao)
+            except json.JSONDecodeError:
+                # objeto incompleto: espera o próximo bloco
+                break
+            if not isinstance(objeto, dict):
+                raise ErroImportacao("Cada registro do JSON deve ser um objeto.")
+            numero += 1
+            yield numero, objeto
+            posicao = fim
+        pendente = pendente[posicao:]
+    if pendente.strip():
+        raise ErroImportacao(f"JSON inválido ou incompleto depois do registro {numero}.")
+    if emArray and not terminado:
+        raise ErroImportacao("O array JSON não foi fechado.")
+
+
+def ler_registros(arquivo: UploadFile) -> AsyncIterator[tuple[int, dict]]:
+    # devolve pares (número do registro, campos), lidos do upload bloco a bloco
+    formato = formato_do_arquivo(arquivo)
+    if formato == "csv":
+        return ler_registros_csv(arquivo)
+    if formato == "json":
+        return ler_registros_json(arquivo)
+    raise ErroImportacao("O arquivo deve ser CSV ou JSON.")
+
+
+async def em_lotes(itens: AsyncIterable, tamanho: int = TAMANHO_LOTE) -> AsyncIterator[list]:
+    lote = []
+    async for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+async def gerar_csv(
+    colunas: list[str], linhas: AsyncIterable[tuple], linhasPorBloco: int = LINHAS_POR_BLOCO
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    quantidade = 0
+    async for linha in linhas:
+        escritor.writerow(linha)
+        quantidade += 1
+        if quantidade % linhasPorBloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def gerar_json(
+    colunas: list[str], linhas: AsyncIterable[tuple], linhasPorBloco: int = LINHAS_POR_BLOCO
+) -> AsyncIterator[str]:
+    partes = ["["]
+    separador = ""
+    async for linha in linhas:
+        partes.append(separador + json.dumps(dict(zip(colunas, linha)), ensure_ascii=False))
+        separador = ","
+        if len(partes) >= linhasPorBloco:
+            yield "".join(partes)
+            partes = []
+    partes.append("]")
+    yield "".join(partes)
+
+
+def resposta_exportacao(
+    nome: str, colunas: list[str], linhas: AsyncIterable[tuple], formato: str = "csv"
+) -> StreamingResponse:
+    if formato not in TIPOS_EXPORTACAO:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+    gerar = gerar_csv if formato == "csv" else gerar_json
+    return StreamingResponse(
+        gerar(colunas, linhas),
+        media_type=TIPOS_EXPORTACAO[formato],
+        headers={"content-disposition": f'attachment; filename="{nome}.{formato}"'},
+    )
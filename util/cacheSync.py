@@ -0,0 +1,113 @@
+# util/cacheSync.py
+# mantém os caches de página e de sessão coerentes quando vários trabalhadores (processos)
+# atendem a aplicação: os gatilhos de InvalidacaoSql registram as alterações no banco e
+# cada processo, antes de atender uma requisição, confere se algum outro gravou algo
+import os
+import sqlite3
+import threading
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from repositories import InvalidacaoSql
+from util.Database import Database
+from util.pageCache import cachePaginas
+from util.sessionCache import cacheSessao
+
+
+# intervalo mínimo entre duas verificações; 0 confere a cada requisição
+INTERVALO = float(os.getenv("CACHE_SINCRONIZACAO_MS", "0")) / 1000
+
+
+class SincronizacaoCaches:
+    def __init__(self, intervalo: float = INTERVALO):
+        self.intervalo = intervalo
+        self._conexao: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._proximaVerificacao = 0.0
+        self._dataVersion = None
+        self._versaoPaginas = None
+        self._ultimaSessao = 0
+        self.verificacoes = 0
+        self.alteracoes = 0
+        self.invalidacoesPaginas = 0
+        self.invalidacoesSessoes = 0
+        self.limpezasSessoes = 0
+
+    def _abrir(self) -> sqlite3.Connection:
+        # conexão própria, fora do pool e sem rastreamento: não conta nas consultas da
+        # requisição. Aberta no primeiro uso, já dentro do processo do trabalhador
+        conexao = sqlite3.connect(Database.caminho, check_same_thread=False, isolation_level=None)
+        self._versaoPaginas = conexao.execute(InvalidacaoSql.OBTER_VERSAO_PAGINAS).fetchone()[0]
+        self._ultimaSessao = conexao.execute(InvalidacaoSql.OBTER_ULTIMA_SESSAO).fetchone()[0]
+        self._dataVersion = conexao.execute("PRAGMA data_version").fetchone()[0]
+        return conexao
+
+    def verificar(self):
+        agora = time.monotonic()
+        if agora < self._proximaVerificacao:
+            return
+        with self._lock:
+            self._proximaVerificacao = agora + self.intervalo
+            if self._conexao is None:
+                self._conexao = self._abrir()
+                return
+            self.verificacoes += 1
+            # PRAGMA data_version só muda quando outra conexão (de qualquer processo)
+            # confirma uma transação: sem gravações, a verificação para aqui
+            dataVersion = self._conexao.execute("PRAGMA data_version").fetchone()[0]
+            if dataVersion == self._dataVersion:
+                return
+            self._dataVersion = dataVersion
+            self.alteracoes += 1
+            self._conexao.execute("BEGIN")
+            try:
+                versaoPaginas = self._conexao.execute(InvalidacaoSql.OBTER_VERSAO_PAGINAS).fetchone()[0]
+                sessoes = self._conexao.execute(InvalidacaoSql.OBTER_SESSOES_APOS, (self._ultimaSessao,)).fetchall()
+            finally:
+                self._conexao.execute("COMMIT")
+            if versaoPaginas != self._versaoPaginas:
+                self._versaoPaginas = versaoPaginas
+                self.invalidacoesPaginas += 1
+                cachePaginas.invalidar()
+            if sessoes:
+                if sessoes[0][0] > self._ultimaSessao + 1:
+                    # as invalidações mais antigas já foram descartadas do banco
+                    self.limpezasSessoes += 1
+                    cacheSessao.limpar()
+                else:
+                    self.invalidacoesSessoes += len(sessoes)
+                    cacheSessao.invalidarUsuarios({idAluno for _, idAluno in sessoes})
+                self._ultimaSessao = sessoes[-1][0]
+
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def obterEstatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "verificacoes": self.verificacoes,
+                "alteracoes": self.alteracoes,
+                "invalidacoesPaginas": self.invalidacoesPaginas,
+                "invalidacoesSessoes": self.invalidacoesSessoes,
+                "limpezasSessoes": self.limpezasSessoes,
+            }
+
+
+sincronizacaoCaches = SincronizacaoCaches()
+
+
+class SincronizacaoCachesMiddleware:
+    # a verificação roda no laço de eventos: sem gravações de outros processos ela é
+    # um PRAGMA de poucos microssegundos, que não lê nada do disco
+    def __init__(self, app: ASGIApp, sincronizacao: SincronizacaoCaches = sincronizacaoCaches):
+        self.app = app
+        self.sincronizacao = sincronizacao
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            self.sincronizacao.verificar()
+        await self.app(scope, receive, send)
@@ -0,0 +1,193 @@
+# util/compression.py
+# pós-processamento das respostas: minificação do HTML e compressão gzip/brotli
+import hashlib
+import zlib
+from collections import OrderedDict
+
+import htmlmin
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.staticAssets import brotli, codificacoes_aceitas
+
+
+TIPOS_COMPRIMIVEIS = ("text/html", "application/json", "text/csv", "text/plain")
+# respostas menores que isso vão sem compressão: o ganho não paga o custo
+TAMANHO_MINIMO = 1024
+NIVEL_GZIP = 6
+# qualidade baixa do brotli: a compressão é feita a cada requisição
+QUALIDADE_BROTLI = 4
+# blocos a partir desse tamanho são comprimidos no threadpool, fora do loop de eventos
+TAMANHO_MINIMO_THREAD = 16 * 1024
+
+
+def _minificar_html(html: bytes) -> bytes:
+    try:
+        return htmlmin.minify(
+            html.decode("utf-8"), remove_comments=True, remove_optional_attribute_quotes=False
+        ).encode("utf-8")
+    except (UnicodeDecodeError, ValueError):
+        return html
+
+
+class CacheMinificacao:
+    # o mesmo template com o mesmo contexto gera o mesmo HTML: o resultado é guardado
+    # pelo hash do conteúdo renderizado, evitando minificar de novo páginas repetidas.
+    # O htmlmin é Python puro e lento: nas faltas ele roda no threadpool, e o cache
+    # só é consultado e alterado no loop de eventos
+    def __init__(self, capacidade: int = 256):
+        self.capacidade = capacidade
+        self._itens: OrderedDict[bytes, bytes] = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    async def minificar(self, html: bytes) -> bytes:
+        chave = hashlib.blake2b(html, digest_size=16).digest()
+        minificado = self._itens.get(chave)
+        if minificado is not None:
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return minificado
+        self.faltas += 1
+        minificado = await run_in_threadpool(_minificar_html, html)
+        self._itens[chave] = minificado
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+        return minificado
+
+    def obterEstatisticas(self) -> dict:
+        return {"itens": len(self._itens), "acertos": self.acertos, "faltas": self.faltas}
+
+
+cacheMinificacao = CacheMinificacao()
+
+
+class _Compressor:
+    def __init__(self, codificacao: str):
+        self.codificacao = codificacao
+        if codificacao == "br":
+            self._brotli = brotli.Compressor(quality=QUALIDADE_BROTLI)
+        else:
+            self._zlib = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        # cada bloco sai completo (flush), para que respostas em streaming cheguem aos poucos
+        if self.codificacao == "br":
+            return self._brotli.process(dados) + self._brotli.flush()
+        return self._zlib.compress(dados) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self) -> bytes:
+        if self.codificacao == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+    def comprimirTudo(self, dados: bytes) -> bytes:
+        return self.comprimir(dados) + self.finalizar()
+
+    async def comprimirForaDoLoop(self, dados: bytes, finalizar: bool = False) -> bytes:
+        # blocos pequenos custam menos que a ida ao threadpool; o compressor é usado
+        # por uma requisição só, em sequência, então não precisa de lock
+        funcao = self.comprimirTudo if finalizar else self.comprimir
+        if len(dados) < TAMANHO_MINIMO_THREAD:
+            return funcao(dados)
+        return await run_in_threadpool(funcao, dados)
+
+
+class CompressaoMiddleware:
+    def __init__(self, app: ASGIApp, tamanhoMinimo: int = TAMANHO_MINIMO, minificar: bool = True):
+        self.app = app
+        self.tamanhoMinimo = tamanhoMinimo
+        self.minificar = minificar
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        aceitas = codificacoes_aceitas(Headers(scope=scope).get("accept-encoding", ""))
+        codificacao = None
+        if "br" in aceitas and brotli is not None:
+            codificacao = "br"
+        elif "gzip" in aceitas:
+            codificacao = "gzip"
+        resposta = _RespostaProcessada(self, send, codificacao)
+        await self.app(scope, receive, resposta.enviar)
+
+
+class _RespostaProcessada:
+    # acumula o corpo até o tamanho mínimo; se a resposta termina antes, é tratada inteira
+    # (minificada e, se couber, comprimida); senão segue em streaming, bloco a bloco
+    def __init__(self, middleware: CompressaoMiddleware, send: Send, codificacao: str | None):
+        self.middleware = middleware
+        self.send = send
+        self.codificacao = codificacao
+        self.inicio: Message | None = None
+        self.processar = False
+        self.html = False
+        self.acumulado = b""
+        self.compressor: _Compressor | None = None
+        self.iniciada = False
+
+    async def enviar(self, mensagem: Message):
+        if mensagem["type"] == "http.response.start":
+            cabecalhos = Headers(raw=mensagem["headers"])
+            tipo = cabecalhos.get("content-type", "").split(";")[0].strip()
+            self.inicio = mensagem
+            self.html = tipo == "text/html"
+            self.processar = (
+                tipo in TIPOS_COMPRIMIVEIS
+                and "content-encoding" not in cabecalhos
+                and mensagem["status"] not in (204, 304)
+            )
+            return
+        if mensagem["type"] != "http.response.body" or not self.processar:
+            await self._iniciar()
+            await self.send(mensagem)
+            return
+
+        corpo = mensagem.get("body", b"")
+        maisCorpo = mensagem.get("more_body", False)
+        if self.iniciada:
+            await self._enviarBloco(corpo, maisCorpo)
+            return
+        self.acumulado += corpo
+        if maisCorpo and len(self.acumulado) < self.middleware.tamanhoMinimo:
+            return
+        corpo, self.acumulado = self.acumulado, b""
+        if not maisCorpo:
+            await self._enviarCompleta(corpo)
+        else:
+            await self._iniciarStreaming(corpo)
+
+    async def _iniciar(self):
+        if not self.iniciada and self.inicio is not None:
+            self.iniciada = True
+            await self.send(self.inicio)
+
+    async def _enviarCompleta(self, corpo: bytes):
+        if self.html and self.middleware.minificar:
+            corpo = await cacheMinificacao.minificar(corpo)
+        cabecalhos = MutableHeaders(raw=self.inicio["headers"])
+        cabecalhos.add_vary_header("Accept-Encoding")
+        if self.codificacao and len(corpo) >= self.middleware.tamanhoMinimo:
+            corpo = await _Compressor(self.codificacao).comprimirForaDoLoop(corpo, finalizar=True)
+            cabecalhos["content-encoding"] = self.codificacao
+        cabecalhos["content-length"] = str(len(corpo))
+        await self._iniciar()
+        await self.send({"type": "http.response.body", "body": corpo, "more_body": False})
+
+    async def _iniciarStreaming(self, corpo: bytes):
+        cabecalhos = MutableHeaders(raw=self.inicio["headers"])
+        cabecalhos.add_vary_header("Accept-Encoding")
+        if self.codificacao:
+            self.compressor = _Compressor(self.codificacao)
+            cabecalhos["content-encoding"] = self.codificacao
+            if "content-length" in cabecalhos:
+                del cabecalhos["content-length"]
+        await self._iniciar()
+        await self._enviarBloco(corpo, True)
+
+    async def _enviarBloco(self, corpo: bytes, maisCorpo: bool):
+        if self.compressor is not None:
+            corpo = await self.compressor.comprimirForaDoLoop(corpo, finalizar=not maisCorpo)
+        await self.send({"type": "http.response.body", "body": corpo, "more_body": maisCorpo})
@@ -1,15 +1,15 @@
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 import logging
 
 from models.Usuario import Usuario
+from util.passwordHashing import SobrecargaSenhas
+from util.rateLimit import LoginBloqueado
 from util.security import validar_usuario_logado
+from util.templates import templates
 
 
-templates = Jinja2Templates(directory="templates")
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -42,6 +42,29 @@ def configurar(app: FastAPI):
             status_code=ex.status_code,
         )
 
+    @app.exception_handler(SobrecargaSenhas)
+    async def password_overload_exception_handler(request: Request, _):
+        return templates.TemplateResponse(
+            "main/erro.html",
+            {"request": request, "detail": "Servidor ocupado. Tente novamente em instantes."},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
+    @app.exception_handler(LoginBloqueado)
+    async def login_rate_limit_exception_handler(request: Request, ex: LoginBloqueado):
+        return templates.TemplateResponse(
+            "main/login.html",
+            {
+                "request": request,
+                "usuario": None,
+                "erros": {"email": [f"Muitas tentativas de login. Tente novamente em {ex.espera} segundos."]},
+                "valores": {"email": ex.email},
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(ex.espera)},
+        )
+
     @app.exception_handler(RequestValidationError)
     async def request_validation_error(request: Request, exc: RequestValidationError):
         erros = {}
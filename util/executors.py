@@ -0,0 +1,94 @@
+# util/executors.py
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PoolMonitorado:
+    def __init__(self, nome: str, trabalhadores: int, processos: bool = False):
+        self.nome = nome
+        self.trabalhadores = trabalhadores
+        self.processos = processos
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._maiorFila = 0
+        self._concluidas = 0
+        self._falhas = 0
+
+    def _obterExecutor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.processos:
+                    # spawn evita herdar por fork as threads e conexões abertas
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.trabalhadores,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.trabalhadores, thread_name_prefix=self.nome
+                    )
+            return self._executor
+
+    def _aoConcluir(self, futuro):
+        with self._lock:
+            self._pendentes -= 1
+            self._concluidas += 1
+            if futuro.exception() is not None:
+                self._falhas += 1
+
+    async def executar(self, funcao, *args, **kwargs):
+        if self.processos:
+            chamada = functools.partial(funcao, *args, **kwargs)
+        else:
+            # propaga as contextvars da requisição para a thread, como asyncio.to_thread
+            contexto = contextvars.copy_context()
+            chamada = functools.partial(contexto.run, funcao, *args, **kwargs)
+        futuro = self._obterExecutor().submit(chamada)
+        with self._lock:
+            self._pendentes += 1
+            self._maiorFila = max(self._maiorFila, self._pendentes - self.trabalhadores)
+        futuro.add_done_callback(self._aoConcluir)
+        return await asyncio.wrap_future(futuro)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "trabalhadores": self.trabalhadores,
+                "emExecucao": min(self._pendentes, self.trabalhadores),
+                "naFila": max(0, self._pendentes - self.trabalhadores),
+                "maiorFila": self._maiorFila,
+                "concluidas": self._concluidas,
+                "falhas": self._falhas,
+            }
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+# cada trabalhador do uvicorn (WEB_CONCURRENCY, também o padrão do --workers) cria o
+# seu pool: os núcleos são divididos entre eles para não haver processos demais
+TRABALHADORES_WEB = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+NUCLEOS_POR_TRABALHADOR = max(1, (os.cpu_count() or 1) // TRABALHADORES_WEB)
+# bcrypt e Pillow são limitados por CPU e seguram o GIL
+poolCpu = PoolMonitorado("cpu", NUCLEOS_POR_TRABALHADOR, processos=True)
+
+
+async def executar_cpu(funcao, *args, **kwargs):
+    return await poolCpu.executar(funcao, *args, **kwargs)
+
+
+def obter_metricas_executores() -> dict:
+    return {poolCpu.nome: poolCpu.metricas()}
+
+
+def encerrar_executores():
+    poolCpu.encerrar()
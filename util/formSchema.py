@@ -0,0 +1,131 @@
+# util/formSchema.py
+# validação declarativa de formulários: cada esquema é compilado uma única vez, na
+# importação do módulo, em uma função própria com os testes de cada campo em sequência.
+# Validar um formulário é uma chamada só; cada campo para no primeiro erro, que é a
+# mensagem exibida pelo formulário (formValidation.js mostra só a primeira)
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from util.templateFilters import capitalizar_nome_proprio
+from util.validators import (
+    MENSAGEM_EMAIL,
+    MENSAGEM_NOME,
+    MENSAGEM_NOME_COMPLETO,
+    MENSAGEM_SELECAO,
+    MENSAGEM_SENHA,
+    MENSAGEM_VAZIO,
+    PADRAO_EMAIL,
+    PADRAO_NOME_COMPLETO,
+    PADRAO_NOME_PROJETO,
+    PADRAO_SENHA,
+)
+
+
+@dataclass(frozen=True)
+class Regra:
+    # teste(valor) -> verdadeiro se válido; com outroCampo, teste(valor, valorDoOutroCampo)
+    teste: Callable[..., Any]
+    mensagem: str
+    outroCampo: str | None = None
+
+
+class Campo:
+    def __init__(self, *regras: Regra, normalizar: Callable[[Any], Any] | None = None, padrao: Any = ""):
+        self.regras = regras
+        self.normalizar = normalizar
+        self.padrao = padrao
+
+
+class Esquema:
+    def __init__(self, **campos: Campo):
+        indices = {nome: i for i, nome in enumerate(campos)}
+        for nome, campo in campos.items():
+            for regra in campo.regras:
+                if regra.outroCampo is not None and regra.outroCampo not in indices:
+                    raise ValueError(f"Regra do campo {nome} depende do campo inexistente {regra.outroCampo}.")
+        self.campos = tuple(campos)
+        # validar(dados) -> (valores normalizados, erros no formato de util/validators.py);
+        # é a própria função gerada, sem um método intermediário
+        self.fonte, self.validar = self._compilar(campos, indices)
+
+    @staticmethod
+    def _compilar(campos: dict, indices: dict):
+        # gera o código de uma função sem laços nem consultas a atributos: cada campo
+        # vira uma variável local e cada regra, um if/elif que chama o teste direto
+        ambiente = {}
+        linhas = ["def validar(dados):", "    erros = {}"]
+        for nome, campo in campos.items():
+            i = indices[nome]
+            ambiente[f"padrao{i}"] = campo.padrao
+            valor = f"dados.get({nome!r}, padrao{i})"
+            if campo.normalizar is not None:
+                ambiente[f"normalizar{i}"] = campo.normalizar
+                valor = f"normalizar{i}({valor})"
+            linhas.append(f"    v{i} = {valor}")
+        for nome, campo in campos.items():
+            i = indices[nome]
+            for j, regra in enumerate(campo.regras):
+                ambiente[f"teste{i}_{j}"] = regra.teste
+                ambiente[f"mensagem{i}_{j}"] = regra.mensagem
+                argumentos = f"v{i}" if regra.outroCampo is None else f"v{i}, v{indices[regra.outroCampo]}"
+                linhas.append(f"    {'elif' if j else 'if'} not teste{i}_{j}({argumentos}):")
+                linhas.append(f"        erros[{nome!r}] = [mensagem{i}_{j}]")
+        valores = ", ".join(f"{nome!r}: v{indices[nome]}" for nome in campos)
+        linhas.append(f"    return {{{valores}}}, erros")
+        fonte = "\n".join(linhas)
+        exec(compile(fonte, "<formSchema>", "exec"), ambiente)
+        return fonte, ambiente["validar"]
+
+
+# normalizações
+def texto(valor: Any) -> str:
+    if isinstance(valor, str):
+        return valor.strip()
+    return "" if valor is None else str(valor).strip()
+
+
+def minusculo(valor: Any) -> str:
+    return texto(valor).lower()
+
+
+def nome_proprio(valor: Any) -> str:
+    # o split da capitalização já descarta os espaços das pontas
+    return capitalizar_nome_proprio(valor if isinstance(valor, str) else texto(valor))
+
+
+def inteiro(valor: Any) -> int:
+    try:
+        return int(valor or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+# regras
+def formato(padrao, mensagem: str) -> Regra:
+    # padrao: expressão já compilada (re.compile)
+    return Regra(padrao.match, mensagem)
+
+
+def tamanho_entre(minimo: int, maximo: int) -> Regra:
+    return Regra(
+        lambda valor: minimo <= len(valor) <= maximo,
+        f"Este campo deve ter entre {minimo} e {maximo} caracteres.",
+    )
+
+
+def igual_a(campo: str, rotulo: str) -> Regra:
+    return Regra(
+        lambda valor, outro: valor.strip() == outro.strip(),
+        f"O valor deste campo deve ser igual ao do campo {rotulo}.",
+        campo,
+    )
+
+
+# testes implementados em C: str.strip devolve "" (falso) para texto em branco, e
+# (0).__lt__(valor) equivale a 0 < valor
+OBRIGATORIO = Regra(str.strip, MENSAGEM_VAZIO)
+EMAIL = formato(PADRAO_EMAIL, MENSAGEM_EMAIL)
+SENHA = formato(PADRAO_SENHA, MENSAGEM_SENHA)
+NOME_COMPLETO = formato(PADRAO_NOME_COMPLETO, MENSAGEM_NOME_COMPLETO)
+NOME_PROJETO = formato(PADRAO_NOME_PROJETO, MENSAGEM_NOME)
+SELECIONADO = Regra((0).__lt__, MENSAGEM_SELECAO)
@@ -0,0 +1,130 @@
+# util/images.py
+# salvar_imagem_projeto roda no pool de processos: recebe e devolve apenas dados simples
+import os
+import sys
+from typing import BinaryIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+
+PASTA_PROJETOS = "static/img/projetos"
+# largura (e altura, as imagens são quadradas) de cada variante, em ordem crescente;
+# retina é o card em 2x. As variantes são geradas (no envio e na inicialização) e
+# não vão para o repositório
+VARIANTES = {"card": 400, "retina": 800, "detalhe": 1200}
+# a variante gravada também como {id}.jpg, o endereço usado antes das variantes
+VARIANTE_PADRAO = "retina"
+# formatos além do JPEG, na ordem de preferência do <picture>; AVIF depende do Pillow instalado
+FORMATOS_ALTERNATIVOS = [
+    formato
+    for formato, disponivel in [("avif", features.check("avif")), ("webp", features.check("webp"))]
+    if disponivel
+]
+TIPOS_MIME = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg"}
+# acima disso a imagem é recusada antes de decodificar os pixels (proteção contra "bombas")
+LIMITE_PIXELS = 4096 * 4096
+
+
+class ImagemGrandeDemais(Exception):
+    pass
+
+
+def obter_dimensoes_imagem(arquivo: str | BinaryIO) -> tuple[int, int] | None:
+    # Image.open só lê o cabeçalho; os pixels não são decodificados aqui. Devolve None
+    # se o arquivo não é uma imagem e recusa as dimensões acima de LIMITE_PIXELS
+    try:
+        with Image.open(arquivo) as imagem:
+            largura, altura = imagem.size
+    except Image.DecompressionBombError as erro:
+        raise ImagemGrandeDemais(str(erro)) from erro
+    except (UnidentifiedImageError, OSError):
+        return None
+    if largura * altura > LIMITE_PIXELS:
+        raise ImagemGrandeDemais(f"imagem com mais de {LIMITE_PIXELS} pixels")
+    return largura, altura
+
+
+def _preparar(imagem: Image.Image) -> Image.Image:
+    # aplica a orientação do EXIF e normaliza o modo: RGBA mantém a transparência
+    imagem = ImageOps.exif_transpose(imagem)
+    if imagem.mode in ("RGBA", "LA") or (imagem.mode == "P" and "transparency" in imagem.info):
+        return imagem.convert("RGBA")
+    return imagem.convert("RGB")
+
+
+def _sem_transparencia(imagem: Image.Image) -> Image.Image:
+    # JPEG não tem canal alfa: a imagem é composta sobre fundo branco
+    if imagem.mode != "RGBA":
+        return imagem
+    fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+    fundo.paste(imagem, mask=imagem.getchannel("A"))
+    return fundo
+
+
+def _gravar(imagem: Image.Image, caminho: str, formato: str):
+    if formato == "jpg":
+        _sem_transparencia(imagem).save(
+            caminho, "JPEG", quality=82, optimize=True, progressive=True
+        )
+    elif formato == "webp":
+        imagem.save(caminho, "WEBP", quality=80, method=4)
+    elif formato == "avif":
+        imagem.save(caminho, "AVIF", quality=60)
+
+
+def salvar_imagem_projeto(
+    origem: str, id: int, pasta: str = PASTA_PROJETOS, gravarPadrao: bool = True
+) -> list[str]:
+    # grava todas as variantes em todos os formatos e devolve os caminhos gravados;
+    # origem é o caminho da imagem (o upload é copiado pela rota para um temporário)
+    gravados = []
+    with Image.open(origem) as original:
+        if original.width * original.height > LIMITE_PIXELS:
+            raise ImagemGrandeDemais(f"imagem com mais de {LIMITE_PIXELS} pixels")
+        # JPEGs grandes são decodificados já reduzidos, o suficiente para a maior variante
+        maior = max(VARIANTES.values())
+        original.draft("RGB", (maior, maior))
+        imagem = _preparar(original)
+    geradas = {}
+    redimensionada = None
+    for variante, largura in VARIANTES.items():
+        # imagens menores que a variante não são ampliadas: a primeira variante que
+        # alcança a largura original é gravada nesse tamanho e as seguintes, que
+        # sairiam iguais a ela, não são geradas (nem entram no srcset)
+        if redimensionada is not None and redimensionada.width >= imagem.width:
+            break
+        redimensionada = imagem
+        if imagem.width > largura:
+            altura = largura * imagem.height // imagem.width
+            redimensionada = imagem.resize((largura, altura), Image.LANCZOS)
+        for formato in ["jpg"] + FORMATOS_ALTERNATIVOS:
+            caminho = os.path.join(pasta, f"{id:04d}-{variante}.{formato}")
+            _gravar(redimensionada, caminho, formato)
+            gravados.append(caminho)
+        geradas[variante] = redimensionada
+    if gravarPadrao:
+        # a variante padrão ou, se a imagem é menor que ela, a maior gerada
+        caminho = os.path.join(pasta, f"{id:04d}.jpg")
+        _gravar(geradas.get(VARIANTE_PADRAO, redimensionada), caminho, "jpg")
+        gravados.append(caminho)
+    return gravados
+
+
+def gerar_variantes_existentes(pasta: str = PASTA_PROJETOS) -> list[int]:
+    # gera as variantes que faltam ({id}.jpg sem {id}-card.jpg): as imagens que vêm com o
+    # repositório e as gravadas antes do pipeline; o {id}.jpg original é mantido
+    ids = []
+    for arquivo in sorted(os.listdir(pasta)):
+        nome, extensao = os.path.splitext(arquivo)
+        if extensao != ".jpg" or not nome.isdigit():
+            continue
+        if os.path.exists(os.path.join(pasta, f"{nome}-card.jpg")):
+            continue
+        salvar_imagem_projeto(os.path.join(pasta, arquivo), int(nome), pasta, gravarPadrao=False)
+        ids.append(int(nome))
+    return ids
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else PASTA_PROJETOS
+    print(f"variantes geradas: {gerar_variantes_existentes(pasta)}")
@@ -0,0 +1,322 @@
+# util/metrics.py
+# métricas de desempenho no formato texto do Prometheus: latência por rota,
+# tempo de cada consulta SQL (util/queryTracing.py), consultas por requisição e
+# as estatísticas que os componentes já mantêm (pools, caches, limitadores)
+import bisect
+import contextvars
+import hmac
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# limites das faixas dos histogramas, em segundos
+FAIXAS_REQUISICAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAIXAS_CONSULTA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+FAIXAS_QTDE_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# caminhos sem rota (404) viram um único rótulo, para não criar uma série por URL
+ROTA_DESCONHECIDA = "<desconhecida>"
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+# com o token definido, o coletor do Prometheus se identifica por Authorization: Bearer
+TOKEN_METRICAS = os.getenv("METRICAS_TOKEN", "")
+# a mesma consulta executada mais vezes que isso numa requisição indica um N+1
+LIMITE_REPETICOES = int(os.getenv("CONSULTA_REPETIDA_LIMITE", "5"))
+# enviado por um administrador, registra no log cada consulta da requisição com o
+# plano de execução e devolve a contagem nos cabeçalhos da resposta
+CABECALHO_DEPURACAO = "x-depurar-consultas"
+
+logger = logging.getLogger(__name__)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == math.inf:
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Metrica(ABC):
+    tipo = "untyped"
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._lock = threading.Lock()
+
+    def _cabecalho(self) -> list[str]:
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+    @abstractmethod
+    def exportar(self) -> list[str]:
+        ...
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores: dict[tuple, float] = {}
+
+    def incrementar(self, *rotulos, valor: float = 1):
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def exportar(self) -> list[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return self._cabecalho() + [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, rotulos)} {_formatar_numero(valor)}"
+            for rotulos, valor in valores
+        ]
+
+
+class Medidor(Contador):
+    # valor que sobe e desce (requisições em andamento, por exemplo)
+    tipo = "gauge"
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = (), faixas: tuple = FAIXAS_REQUISICAO):
+        super().__init__(nome, descricao, rotulos)
+        self.faixas = tuple(sorted(faixas))
+        # rótulos -> [contagem de cada faixa (não acumulada)..., acima da última, soma]
+        self._series: dict[tuple, list] = {}
+
+    def observar(self, valor: float, *rotulos):
+        # a faixa "le" inclui o próprio limite
+        indice = bisect.bisect_left(self.faixas, valor)
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [0] * (len(self.faixas) + 1) + [0.0]
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def exportar(self) -> list[str]:
+        with self._lock:
+            series = [(rotulos, list(serie)) for rotulos, serie in self._series.items()]
+        linhas = self._cabecalho()
+        for rotulos, serie in series:
+            acumulado = 0
+            for limite, contagem in zip(self.faixas + (math.inf,), serie):
+                acumulado += contagem
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, rotulos, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, rotulos)} {_formatar_numero(serie[-1])}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, rotulos)} {acumulado}")
+        return linhas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: list[Metrica] = []
+        # nome do componente -> função que devolve o dicionário obterEstatisticas()
+        self._coletores: dict[str, Callable[[], dict]] = {}
+
+    def registrar(self, metrica: Metrica) -> Metrica:
+        self._metricas.append(metrica)
+        return metrica
+
+    def coletar(self, componente: str, obterEstatisticas: Callable[[], dict]):
+        self._coletores[componente] = obterEstatisticas
+
+    def _exportarEstatisticas(self) -> list[str]:
+        # cada valor numérico das estatísticas vira uma série do medidor app_estatistica;
+        # dicionários aninhados (um por pool, por exemplo) juntam as chaves com ponto
+        nome = "app_estatistica"
+        linhas = [
+            f"# HELP {nome} Estatísticas internas dos componentes (pools, caches, limitadores).",
+            f"# TYPE {nome} gauge",
+        ]
+        for componente, obterEstatisticas in self._coletores.items():
+            pendentes = list(obterEstatisticas().items())
+            while pendentes:
+                chave, valor = pendentes.pop(0)
+                if isinstance(valor, dict):
+                    pendentes.extend((f"{chave}.{subchave}", subvalor) for subchave, subvalor in valor.items())
+                elif isinstance(valor, (int, float)):
+                    rotulos = _formatar_rotulos(("componente", "nome"), (componente, chave))
+                    linhas.append(f"{nome}{rotulos} {_formatar_numero(float(valor))}")
+        return linhas
+
+    def exportar(self) -> str:
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.exportar())
+        linhas.extend(self._exportarEstatisticas())
+        return "\n".join(linhas) + "\n"
+
+
+registroMetricas = RegistroMetricas()
+
+duracaoRequisicao = registroMetricas.registrar(
+    Histograma(
+        "http_request_duration_seconds",
+        "Duração das requisições, da chegada ao último byte da resposta.",
+        ("metodo", "rota", "status"),
+        FAIXAS_REQUISICAO,
+    )
+)
+requisicoesEmAndamento = registroMetricas.registrar(
+    Medidor("http_requests_in_progress", "Requisições sendo atendidas agora.", ("metodo",))
+)
+duracaoConsulta = registroMetricas.registrar(
+    Histograma(
+        "db_query_duration_seconds",
+        "Duração de cada execute/executemany no SQLite, pelo nome da constante SQL.",
+        ("consulta",),
+        FAIXAS_CONSULTA,
+    )
+)
+errosConsulta = registroMetricas.registrar(
+    Contador("db_query_errors_total", "Consultas SQL que terminaram em erro.", ("consulta",))
+)
+consultasPorRequisicao = registroMetricas.registrar(
+    Histograma(
+        "db_queries_per_request",
+        "Quantidade de consultas SQL feitas por requisição.",
+        ("rota",),
+        FAIXAS_QTDE_CONSULTAS,
+    )
+)
+consultasLentas = registroMetricas.registrar(
+    Contador("db_slow_queries_total", "Consultas SQL acima do limite de CONSULTA_LENTA_MS.", ("consulta",))
+)
+consultasRepetidas = registroMetricas.registrar(
+    Contador(
+        "db_repeated_queries_total",
+        "Requisições que repetiram a mesma consulta mais de CONSULTA_REPETIDA_LIMITE vezes (N+1).",
+        ("rota", "consulta"),
+    )
+)
+
+
+@dataclass
+class ConsultasRequisicao:
+    # acumulado pelas consultas feitas durante uma requisição (util/queryTracing.py)
+    quantidade: int = 0
+    tempo: float = 0.0
+    # execuções de cada comando (SELECT/INSERT/UPDATE/DELETE), pelo nome da consulta
+    porConsulta: dict[str, int] = field(default_factory=dict)
+    depurar: bool = False
+
+    def repetidas(self, limite: int = LIMITE_REPETICOES) -> list[tuple[str, int]]:
+        return sorted(
+            ((nome, vezes) for nome, vezes in self.porConsulta.items() if vezes > limite),
+            key=lambda item: -item[1],
+        )
+
+
+# objeto mutável da requisição atual: as threads dos executores e das conexões
+# aiosqlite recebem uma cópia do contexto, mas alteram o mesmo objeto
+consultasRequisicao: contextvars.ContextVar[ConsultasRequisicao | None] = contextvars.ContextVar(
+    "consultasRequisicao", default=None
+)
+
+
+def acesso_metricas_permitido(request: Request, admin: bool = False) -> bool:
+    # administradores logados, o token configurado ou a própria máquina
+    if admin:
+        return True
+    if TOKEN_METRICAS:
+        autorizacao = request.headers.get("authorization", "")
+        return hmac.compare_digest(autorizacao.encode(), f"Bearer {TOKEN_METRICAS}".encode())
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1", "localhost")
+
+
+def rota_da_requisicao(scope: Scope) -> str:
+    # o modelo da rota (/aluno/excluir/{id:int}), não o caminho com os valores
+    rota = scope.get("route")
+    if rota is not None and hasattr(rota, "path"):
+        return rota.path
+    if scope.get("root_path"):
+        # aplicação montada (arquivos estáticos)
+        return scope["root_path"] + "/{caminho}"
+    return ROTA_DESCONHECIDA
+
+
+def cabecalhos_depuracao(consultas: ConsultasRequisicao) -> dict[str, str]:
+    # as consultas feitas até o início da resposta; numa resposta comum, todas
+    cabecalhos = {
+        "X-Consultas": str(consultas.quantidade),
+        "X-Consultas-Tempo-Ms": f"{consultas.tempo * 1000:.2f}",
+        "Server-Timing": f'db;dur={consultas.tempo * 1000:.2f};desc="{consultas.quantidade} consultas"',
+    }
+    repetidas = consultas.repetidas()
+    if repetidas:
+        cabecalhos["X-Consultas-Repetidas"] = ", ".join(f"{nome}={vezes}" for nome, vezes in repetidas)
+    return cabecalhos
+
+
+def registrar_repeticoes(consultas: ConsultasRequisicao, rota: str):
+    for nome, vezes in consultas.repetidas():
+        consultasRepetidas.incrementar(rota, nome)
+        logger.warning(f"Possível N+1 em {rota}: {nome} executada {vezes} vezes na mesma requisição.")
+
+
+class MetricasMiddleware:
+    def __init__(
+        self, app: ASGIApp, permitirDepuracao: Callable[[Request], Awaitable[bool]] | None = None
+    ):
+        self.app = app
+        # decide se quem pediu a depuração pode recebê-la (só administradores)
+        self.permitirDepuracao = permitirDepuracao
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metodo = scope["method"]
+        status = 500
+        consultas = ConsultasRequisicao()
+        marcador = consultasRequisicao.set(consultas)
+
+        async def enviar(mensagem: Message):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                if consultas.depurar:
+                    cabecalhos = MutableHeaders(raw=mensagem["headers"])
+                    for nome, valor in cabecalhos_depuracao(consultas).items():
+                        cabecalhos[nome] = valor
+            await send(mensagem)
+
+        requisicoesEmAndamento.incrementar(metodo)
+        inicio = time.perf_counter()
+        try:
+            if self.permitirDepuracao is not None and Headers(scope=scope).get(CABECALHO_DEPURACAO) == "1":
+                consultas.depurar = await self.permitirDepuracao(Request(scope))
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            requisicoesEmAndamento.incrementar(metodo, valor=-1)
+            consultasRequisicao.reset(marcador)
+            rota = rota_da_requisicao(scope)
+            duracaoRequisicao.observar(duracao, metodo, rota, str(status))
+            consultasPorRequisicao.observar(consultas.quantidade, rota)
+            registrar_repeticoes(consultas, rota)
@@ -0,0 +1,34 @@
+# util/migrations.py
+from repositories import AlunoSql, ContadorSql, InvalidacaoSql, ParametroSql, ProjetoSql
+from util.Database import Database
+
+
+# cada item é uma versão do esquema; a versão aplicada fica em PRAGMA user_version.
+# novas alterações entram sempre no final da lista, nunca editando as anteriores
+MIGRACOES = [
+    # 1: índices das consultas mais frequentes
+    AlunoSql.CRIAR_INDICES + ProjetoSql.CRIAR_INDICES + ["ANALYZE"],
+    # 2: índices compatíveis com a paginação por cursor
+    AlunoSql.RECRIAR_INDICES_ORDENACAO + ["ANALYZE"],
+    # 3: contagens das listagens mantidas por gatilhos
+    [ContadorSql.CRIAR_TABELA, ContadorSql.INICIALIZAR] + ContadorSql.CRIAR_GATILHOS,
+    # 4: parâmetros da aplicação, como o custo calibrado do bcrypt
+    [ParametroSql.CRIAR_TABELA],
+    # 5: invalidação dos caches entre trabalhadores (util/cacheSync.py)
+    InvalidacaoSql.CRIAR_TABELAS + [InvalidacaoSql.INICIALIZAR] + InvalidacaoSql.CRIAR_GATILHOS,
+]
+
+
+def obter_versao_esquema() -> int:
+    with Database.conexao() as conexao:
+        return conexao.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar() -> int:
+    with Database.conexaoEscrita() as conexao:
+        versao = conexao.execute("PRAGMA user_version").fetchone()[0]
+        for numero, comandos in enumerate(MIGRACOES[versao:], start=versao + 1):
+            for sql in comandos:
+                conexao.execute(sql)
+            conexao.execute(f"PRAGMA user_version={numero}")
+        return len(MIGRACOES)
@@ -0,0 +1,101 @@
+# util/pageCache.py
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+
+@dataclass
+class PaginaRenderizada:
+    corpo: bytes
+    etag: str
+    ultimaModificacao: str
+
+
+class CachePaginas:
+    def __init__(self):
+        self._itens: dict[str, PaginaRenderizada] = {}
+        self._lock = threading.Lock()
+        # incrementada a cada invalidação; uma renderização iniciada antes dela é descartada
+        self.versao = 0
+        self.ultimaModificacao = time.time()
+        self.acertos = 0
+        self.faltas = 0
+        self.naoModificadas = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: str) -> PaginaRenderizada | None:
+        with self._lock:
+            pagina = self._itens.get(chave)
+            if pagina is None:
+                self.faltas += 1
+            else:
+                self.acertos += 1
+            return pagina
+
+    def guardar(self, chave: str, corpo: bytes, versao: int) -> PaginaRenderizada:
+        pagina = PaginaRenderizada(
+            corpo=corpo,
+            etag=f'W/"{hashlib.blake2b(corpo, digest_size=12).hexdigest()}"',
+            ultimaModificacao=formatdate(self.ultimaModificacao, usegmt=True),
+        )
+        with self._lock:
+            # os dados mudaram durante a renderização: a página já nasce desatualizada
+            if versao == self.versao:
+                self._itens[chave] = pagina
+        return pagina
+
+    def invalidar(self):
+        with self._lock:
+            self.versao += 1
+            self.ultimaModificacao = time.time()
+            self.invalidacoes += len(self._itens)
+            self._itens.clear()
+
+    def obterEstatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "versao": self.versao,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "naoModificadas": self.naoModificadas,
+                "invalidacoes": self.invalidacoes,
+            }
+
+    def responder(self, request: Request, pagina: PaginaRenderizada) -> Response:
+        # o conteúdo muda com o login (cookie), então o navegador sempre revalida
+        cabecalhos = {
+            "ETag": pagina.etag,
+            "Last-Modified": pagina.ultimaModificacao,
+            "Cache-Control": "no-cache",
+            "Vary": "Cookie",
+        }
+        if self._naoModificada(request, pagina):
+            with self._lock:
+                self.naoModificadas += 1
+            return Response(status_code=304, headers=cabecalhos)
+        return Response(pagina.corpo, media_type="text/html", headers=cabecalhos)
+
+    @staticmethod
+    def _naoModificada(request: Request, pagina: PaginaRenderizada) -> bool:
+        etags = request.headers.get("if-none-match")
+        if etags is not None:
+            # a comparação fraca ignora o prefixo W/
+            return any(
+                etag.strip().removeprefix("W/") == pagina.etag.removeprefix("W/")
+                for etag in etags.split(",")
+            ) or etags.strip() == "*"
+        desde = request.headers.get("if-modified-since")
+        if desde is None:
+            return False
+        try:
+            return parsedate_to_datetime(desde) >= parsedate_to_datetime(pagina.ultimaModificacao)
+        except (TypeError, ValueError):
+            return False
+
+
+cachePaginas = CachePaginas()
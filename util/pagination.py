@@ -0,0 +1,109 @@
+# util/pagination.py
+import base64
+import binascii
+import json
+import math
+from typing import Callable
+
+from models.Pagina import Pagina
+
+
+def codificar_cursor(chave: tuple, anterior: bool = False) -> str:
+    conteudo = json.dumps([list(chave), anterior], separators=(",", ":"))
+    return base64.urlsafe_b64encode(conteudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[tuple, bool] | None:
+    # cursores inválidos ou adulterados voltam como None (primeira página)
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        chave, anterior = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return tuple(chave), bool(anterior)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def ler_cursor(cursor: str | None, inicio: tuple) -> tuple[tuple, bool, bool]:
+    # devolve a chave de busca, se a busca é para trás e se havia cursor válido;
+    # sem cursor, a busca começa em `inicio`, que deve vir antes de qualquer chave.
+    # Cada elemento da chave precisa ter o tipo do elemento de `inicio` (texto para
+    # nome e data, inteiro para id): listas ou objetos vão direto para o sqlite
+    decodificado = decodificar_cursor(cursor) if cursor else None
+    if (
+        decodificado is None
+        or len(decodificado[0]) != len(inicio)
+        or any(type(valor) is not type(referencia) for valor, referencia in zip(decodificado[0], inicio))
+    ):
+        return inicio, False, False
+    return decodificado[0], decodificado[1], True
+
+
+def separar_contagens(linhas: list, nomesContagens: list[str]) -> tuple[dict, list]:
+    # as primeiras colunas de cada linha são as contagens, a primeira delas o total
+    # da listagem; uma página vazia vem como uma única linha com o item nulo
+    qtde = len(nomesContagens)
+    contagens = dict(zip(nomesContagens, linhas[0][:qtde])) if linhas else {}
+    contagens = {nome: int(valor or 0) for nome, valor in contagens.items()}
+    return contagens, [x[qtde:] for x in linhas if x[qtde] is not None]
+
+
+def _aplicar_contagens(pagina: Pagina, contagens: dict, nomesContagens: list[str], tamanhoPagina: int):
+    pagina.totalItens = contagens.get(nomesContagens[0], 0)
+    pagina.totalPaginas = math.ceil(pagina.totalItens / tamanhoPagina) if tamanhoPagina > 0 else 0
+    pagina.contagens = contagens
+
+
+def montar_pagina(
+    linhas: list,
+    tamanhoPagina: int,
+    anterior: bool,
+    temCursor: bool,
+    mapear: Callable,
+    chave: Callable,
+    nomesContagens: list[str] | None = None,
+) -> Pagina:
+    # as linhas vêm com um item a mais, que só indica se existe outra página
+    # na direção da busca; na busca para trás vêm também em ordem invertida.
+    # Com nomesContagens, as linhas trazem antes as contagens (separar_contagens)
+    contagens = None
+    if nomesContagens:
+        contagens, linhas = separar_contagens(linhas, nomesContagens)
+    haMais = len(linhas) > tamanhoPagina
+    linhas = linhas[:tamanhoPagina]
+    if anterior:
+        linhas.reverse()
+    itens = [mapear(x) for x in linhas]
+    pagina = Pagina(itens=itens)
+    if contagens is not None:
+        _aplicar_contagens(pagina, contagens, nomesContagens, tamanhoPagina)
+    if not itens:
+        return pagina
+    if anterior:
+        temProximo, temAnterior = temCursor, haMais
+    else:
+        temProximo, temAnterior = haMais, temCursor
+    if temProximo:
+        pagina.proximo = codificar_cursor(chave(itens[-1]))
+    if temAnterior:
+        pagina.anterior = codificar_cursor(chave(itens[0]), anterior=True)
+    return pagina
+
+
+def montar_pagina_com_contagens(
+    linhas: list, tamanhoPagina: int, nomesContagens: list[str], mapear: Callable
+) -> Pagina:
+    contagens, linhas = separar_contagens(linhas, nomesContagens)
+    pagina = Pagina(itens=[mapear(x) for x in linhas])
+    _aplicar_contagens(pagina, contagens, nomesContagens, tamanhoPagina)
+    return pagina
+
+
+def cursores_da_pagina(
+    itens: list, paginaAtual: int, totalPaginas: int, chave: Callable
+) -> tuple[str | None, str | None]:
+    # cursores para sair de uma página obtida por deslocamento (pa/tp)
+    if not itens:
+        return None, None
+    proximo = codificar_cursor(chave(itens[-1])) if paginaAtual < totalPaginas else None
+    anterior = codificar_cursor(chave(itens[0]), anterior=True) if paginaAtual > 1 else None
+    return proximo, anterior
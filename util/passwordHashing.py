@@ -0,0 +1,181 @@
+# util/passwordHashing.py
+# hash de senhas com o custo do bcrypt calibrado para o hardware, limite de
+# operações simultâneas e atualização do hash (rehash) depois do login
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import bcrypt
+
+from repositories.AlunoRepoAsync import AlunoRepoAsync
+from repositories.ParametroRepo import ParametroRepo
+from util.executors import NUCLEOS_POR_TRABALHADOR, executar_cpu
+from util.security import obter_custo_hash, obter_hash_senha, obter_hashes_senhas, verificar_senha
+
+
+logger = logging.getLogger(__name__)
+
+# abaixo de 10 o bcrypt fica fraco demais; acima de 16 cada hash leva segundos
+CUSTO_MINIMO = 10
+CUSTO_MAXIMO = 16
+CUSTO_PADRAO = 12
+# tempo desejado para um hash (e para cada verificação de senha) neste servidor
+TEMPO_ALVO_MS = int(os.getenv("SENHA_TEMPO_ALVO_MS", "250"))
+# operações de bcrypt ao mesmo tempo neste trabalhador: metade dos núcleos que cabem
+# a ele (util/executors.py), para que uma rajada de logins não ocupe a CPU inteira
+CONCORRENCIA = int(os.getenv("SENHA_CONCORRENCIA", str(max(1, NUCLEOS_POR_TRABALHADOR // 2))))
+# pedidos esperando além disso são recusados (503) em vez de acumular na fila
+FILA_MAXIMA = int(os.getenv("SENHA_FILA_MAXIMA", "32"))
+PARAMETRO_CUSTO = "custoBcrypt"
+
+
+class SobrecargaSenhas(Exception):
+    pass
+
+
+class LimitadorConcorrencia:
+    def __init__(self, limite: int, filaMaxima: int):
+        self.limite = limite
+        self.filaMaxima = filaMaxima
+        self._semaforo = asyncio.Semaphore(limite)
+        self._emUso = 0
+        self._naFila = 0
+        self._maiorFila = 0
+        self._recusadas = 0
+        self._concluidas = 0
+
+    def ocupado(self) -> bool:
+        return self._emUso >= self.limite
+
+    def saturado(self) -> bool:
+        return self.ocupado() and self._naFila >= self.filaMaxima
+
+    @asynccontextmanager
+    async def reservar(self, recusar: bool = True):
+        if recusar and self.saturado():
+            self._recusadas += 1
+            raise SobrecargaSenhas()
+        self._naFila += 1
+        self._maiorFila = max(self._maiorFila, self._naFila)
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._naFila -= 1
+        self._emUso += 1
+        try:
+            yield
+        finally:
+            self._emUso -= 1
+            self._concluidas += 1
+            self._semaforo.release()
+
+    def obterEstatisticas(self) -> dict:
+        return {
+            "limite": self.limite,
+            "emUso": self._emUso,
+            "naFila": self._naFila,
+            "maiorFila": self._maiorFila,
+            "recusadas": self._recusadas,
+            "concluidas": self._concluidas,
+        }
+
+
+def calibrar_custo(tempoAlvoMs: int = TEMPO_ALVO_MS) -> dict:
+    # mede o custo mínimo e extrapola: cada ponto a mais de custo dobra o tempo do bcrypt
+    sal = bcrypt.gensalt(CUSTO_MINIMO)
+    medidas = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        bcrypt.hashpw(b"calibracao", sal)
+        medidas.append(time.perf_counter() - inicio)
+    tempoMinimoMs = min(medidas) * 1000
+    custo = CUSTO_MINIMO + round(math.log2(tempoAlvoMs / tempoMinimoMs))
+    custo = max(CUSTO_MINIMO, min(CUSTO_MAXIMO, custo))
+    return {
+        "custo": custo,
+        "tempoAlvoMs": tempoAlvoMs,
+        "tempoEstimadoMs": round(tempoMinimoMs * 2 ** (custo - CUSTO_MINIMO), 1),
+        "calibradoEm": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+class ServicoSenhas:
+    def __init__(self, limitador: LimitadorConcorrencia):
+        self.limitador = limitador
+        self.custo = CUSTO_PADRAO
+        self.parametros: dict = {}
+        self._rehashEmAndamento = set()
+
+    def configurar(self, recalibrar: bool = False) -> int:
+        # o custo calibrado fica gravado no banco e vale para todos os trabalhadores;
+        # a calibração só se repete quando o tempo alvo muda ou com SENHA_RECALIBRAR=1
+        # (SENHA_CUSTO fixa o custo sem calibrar)
+        if os.getenv("SENHA_CUSTO"):
+            self.custo = max(CUSTO_MINIMO, min(CUSTO_MAXIMO, int(os.environ["SENHA_CUSTO"])))
+            return self.custo
+        recalibrar = recalibrar or os.getenv("SENHA_RECALIBRAR", "0") == "1"
+        gravado = ParametroRepo.obter(PARAMETRO_CUSTO)
+        parametros = json.loads(gravado) if gravado else {}
+        if recalibrar or parametros.get("tempoAlvoMs") != TEMPO_ALVO_MS:
+            parametros = calibrar_custo(TEMPO_ALVO_MS)
+            ParametroRepo.gravar(PARAMETRO_CUSTO, json.dumps(parametros))
+            logger.info(f"Custo do bcrypt calibrado: {parametros}")
+        self.parametros = parametros
+        self.custo = parametros["custo"]
+        return self.custo
+
+    async def gerarHash(self, senha: str) -> str:
+        async with self.limitador.reservar():
+            return await executar_cpu(obter_hash_senha, senha, self.custo)
+
+    async def gerarHashes(self, senhas: list[str]) -> list[str]:
+        # importação em massa: as senhas são divididas em uma fatia por vaga do
+        # limitador; as fatias esperam a vez em vez de serem recusadas
+        if not senhas:
+            return []
+        tamanhoFatia = -(-len(senhas) // self.limitador.limite)
+        fatias = [senhas[i : i + tamanhoFatia] for i in range(0, len(senhas), tamanhoFatia)]
+
+        async def gerarFatia(fatia: list[str]) -> list[str]:
+            async with self.limitador.reservar(recusar=False):
+                return await executar_cpu(obter_hashes_senhas, fatia, self.custo)
+
+        resultados = await asyncio.gather(*(gerarFatia(fatia) for fatia in fatias))
+        return [hash_senha for resultado in resultados for hash_senha in resultado]
+
+    async def verificar(self, senha: str, hashSenha: str) -> bool:
+        async with self.limitador.reservar():
+            return await executar_cpu(verificar_senha, senha, hashSenha)
+
+    def precisaRehash(self, hashSenha: str) -> bool:
+        custo = obter_custo_hash(hashSenha)
+        return custo is not None and custo != self.custo
+
+    async def rehash(self, email: str, senha: str, hashAntigo: str) -> bool:
+        # roda depois da resposta do login; com o limitador ocupado, fica para o
+        # próximo login em vez de disputar a CPU com quem está entrando
+        if email in self._rehashEmAndamento or self.limitador.ocupado():
+            return False
+        self._rehashEmAndamento.add(email)
+        try:
+            hashNovo = await self.gerarHash(senha)
+            return await AlunoRepoAsync.substituirHashSenha(email, hashAntigo, hashNovo)
+        except SobrecargaSenhas:
+            return False
+        finally:
+            self._rehashEmAndamento.discard(email)
+
+    def obterEstatisticas(self) -> dict:
+        return {"custo": self.custo, **self.limitador.obterEstatisticas()}
+
+
+servicoSenhas = ServicoSenhas(LimitadorConcorrencia(CONCORRENCIA, FILA_MAXIMA))
+
+
+def configurar_custo_senhas() -> int:
+    return servicoSenhas.configurar()
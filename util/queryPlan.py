@@ -0,0 +1,42 @@
+# util/queryPlan.py
+from types import ModuleType
+from repositories import AlunoSql, ProjetoSql
+from util.Database import Database
+from util.queryTracing import plano_consulta
+
+
+def listar_consultas(*modulos: ModuleType) -> dict[str, str]:
+    # todas as constantes SELECT dos módulos de SQL dos repositórios
+    modulos = modulos or (AlunoSql, ProjetoSql)
+    consultas = {}
+    for modulo in modulos:
+        prefixo = modulo.__name__.rsplit(".", 1)[-1]
+        for nome, valor in vars(modulo).items():
+            if nome.isupper() and isinstance(valor, str) and valor.lstrip().upper().startswith("SELECT"):
+                consultas[f"{prefixo}.{nome}"] = valor
+    return consultas
+
+
+def explicar_consulta(sql: str) -> list[str]:
+    with Database.conexao() as conexao:
+        return plano_consulta(conexao, sql)
+
+
+def explicar_consultas(*modulos: ModuleType) -> dict[str, list[str]]:
+    return {nome: explicar_consulta(sql) for nome, sql in listar_consultas(*modulos).items()}
+
+
+def consultas_com_varredura(tabela: str = "aluno", *modulos: ModuleType) -> list[str]:
+    # consultas que percorrem a tabela inteira, sem usar índice
+    return [
+        nome
+        for nome, plano in explicar_consultas(*modulos).items()
+        if any(passo == f"SCAN {tabela}" for passo in plano)
+    ]
+
+
+if __name__ == "__main__":
+    for nome, plano in explicar_consultas().items():
+        print(nome)
+        for passo in plano:
+            print(f"    {passo}")
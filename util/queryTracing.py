@@ -0,0 +1,172 @@
+# util/queryTracing.py
+# mede cada execute/executemany feito nas conexões do SQLite (síncronas e aiosqlite),
+# identifica a consulta pelo nome da constante dos módulos *Sql dos repositórios e
+# registra no log as consultas lentas, com o plano de execução
+import contextvars
+import functools
+import logging
+import os
+import sqlite3
+import time
+from types import ModuleType
+
+import aiosqlite
+
+from repositories import AlunoSql, ParametroSql, ProjetoSql
+from util.metrics import consultasLentas, consultasRequisicao, duracaoConsulta, errosConsulta
+
+
+# consultas com texto desconhecido são agrupadas pela primeira palavra (BEGIN,
+# PRAGMA...); o cache de nomes não cresce além disso
+LIMITE_CACHE_NOMES = 1024
+# consultas mais demoradas que isso vão para o log com o plano de execução
+LIMITE_CONSULTA_LENTA = float(os.getenv("CONSULTA_LENTA_MS", "100")) / 1000
+# só estes comandos têm plano de execução e entram na detecção de N+1
+COMANDOS_EXPLICAVEIS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+logger = logging.getLogger(__name__)
+
+
+def _mapear_consultas(*modulos: ModuleType) -> tuple[dict[str, str], list[tuple[str, str]]]:
+    # texto do SQL -> "AlunoSql.OBTER_POR_ID"; os modelos com {ids} ou {emails} são
+    # reconhecidos pelo trecho anterior ao marcador
+    nomes = {}
+    prefixos = []
+    for modulo in modulos:
+        prefixo = modulo.__name__.rsplit(".", 1)[-1]
+        for nome, valor in vars(modulo).items():
+            if not nome.isupper():
+                continue
+            for sql in valor if isinstance(valor, list) else [valor]:
+                if not isinstance(sql, str):
+                    continue
+                if "{" in sql:
+                    prefixos.append((sql.split("{", 1)[0], f"{prefixo}.{nome}"))
+                else:
+                    nomes.setdefault(sql, f"{prefixo}.{nome}")
+    return nomes, prefixos
+
+
+_nomes, _prefixos = _mapear_consultas(AlunoSql, ProjetoSql, ParametroSql)
+_cacheNomes: dict[str, str] = {}
+
+
+def nome_consulta(sql: str) -> str:
+    nome = _nomes.get(sql) or _cacheNomes.get(sql)
+    if nome is not None:
+        return nome
+    nome = next((nome for prefixo, nome in _prefixos if sql.startswith(prefixo)), None)
+    if nome is None:
+        palavras = sql.split(None, 1)
+        nome = palavras[0].upper() if palavras else "<vazia>"
+    if len(_cacheNomes) < LIMITE_CACHE_NOMES:
+        _cacheNomes[sql] = nome
+    return nome
+
+
+_planos: dict[str, list[str]] = {}
+
+
+def plano_consulta(conexao: sqlite3.Connection, sql: str) -> list[str]:
+    # {ids} vira um único marcador e todos os parâmetros são NULL: o plano não depende
+    # dos valores; o cursor comum não passa pelo rastreamento
+    sql = sql.replace("{ids}", "?").replace("{emails}", "?")
+    cursor = conexao.cursor(sqlite3.Cursor)
+    try:
+        plano = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+    finally:
+        cursor.close()
+    return [linha[3] for linha in plano]
+
+
+def _plano_em_cache(conexao: sqlite3.Connection, sql: str) -> list[str]:
+    # o EXPLAIN roda uma vez por texto de consulta, não a cada consulta lenta
+    plano = _planos.get(sql)
+    if plano is None:
+        try:
+            plano = plano_consulta(conexao, sql)
+        except sqlite3.Error as erro:
+            plano = [f"(plano indisponível: {erro})"]
+        if len(_planos) < LIMITE_CACHE_NOMES:
+            _planos[sql] = plano
+    return plano
+
+
+def _registrar_no_log(conexao: sqlite3.Connection, sql: str, nome: str, duracao: float, lenta: bool):
+    explicavel = sql.lstrip()[:7].upper().startswith(COMANDOS_EXPLICAVEIS)
+    plano = "".join(f"\n    {passo}" for passo in _plano_em_cache(conexao, sql)) if explicavel else ""
+    texto = " ".join(sql.split())
+    if lenta:
+        logger.warning(f"Consulta lenta ({duracao * 1000:.1f} ms) {nome}: {texto}{plano}")
+    else:
+        logger.info(f"Consulta ({duracao * 1000:.2f} ms) {nome}: {texto}{plano}")
+
+
+def registrar_consulta(conexao: sqlite3.Connection, sql: str, duracao: float, erro: bool = False):
+    nome = nome_consulta(sql)
+    duracaoConsulta.observar(duracao, nome)
+    if erro:
+        errosConsulta.incrementar(nome)
+    consultas = consultasRequisicao.get()
+    depurar = False
+    if consultas is not None:
+        consultas.quantidade += 1
+        consultas.tempo += duracao
+        if sql.lstrip()[:7].upper().startswith(COMANDOS_EXPLICAVEIS):
+            consultas.porConsulta[nome] = consultas.porConsulta.get(nome, 0) + 1
+        depurar = consultas.depurar
+    lenta = duracao >= LIMITE_CONSULTA_LENTA
+    if lenta:
+        consultasLentas.incrementar(nome)
+    if (lenta or depurar) and not erro:
+        _registrar_no_log(conexao, sql, nome, duracao, lenta)
+
+
+def _medir(cursor: sqlite3.Cursor, executar, sql: str, *args):
+    # no SQLite o execute roda a consulta até a primeira linha; para as consultas
+    # com ORDER BY ou agregação, é aí que está quase todo o trabalho
+    inicio = time.perf_counter()
+    try:
+        resultado = executar(sql, *args)
+    except BaseException:
+        registrar_consulta(cursor.connection, sql, time.perf_counter() - inicio, erro=True)
+        raise
+    registrar_consulta(cursor.connection, sql, time.perf_counter() - inicio)
+    return resultado
+
+
+class CursorRastreado(sqlite3.Cursor):
+    def execute(self, sql, parametros=()):
+        return _medir(self, super().execute, sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return _medir(self, super().executemany, sql, parametros)
+
+
+class ConexaoRastreada(sqlite3.Connection):
+    # o Connection.execute nativo não passa pelo Cursor.execute: os atalhos são
+    # refeitos sobre o cursor rastreado
+    def cursor(self, factory=CursorRastreado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+class ConexaoAsyncRastreada(aiosqlite.Connection):
+    # o aiosqlite executa tudo em uma thread própria da conexão; cada chamada leva
+    # junto o contexto da requisição, para as consultas contarem na requisição certa
+    async def _execute(self, fn, *args, **kwargs):
+        contexto = contextvars.copy_context()
+        return await super()._execute(contexto.run, fn, *args, **kwargs)
+
+
+def conectar_async(caminho: str, **kwargs) -> ConexaoAsyncRastreada:
+    # equivalente a aiosqlite.connect, com a conexão rastreada nas duas pontas
+    return ConexaoAsyncRastreada(
+        functools.partial(sqlite3.connect, caminho, factory=ConexaoRastreada, **kwargs),
+        iter_chunk_size=64,
+    )
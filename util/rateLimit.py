@@ -0,0 +1,205 @@
+# util/rateLimit.py
+# limite de tentativas de login por IP e por e-mail, em janela deslizante, verificado
+# antes de qualquer consulta ao banco ou cálculo de hash
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Form, Request
+
+from util.passwordHashing import SobrecargaSenhas, servicoSenhas
+
+
+@dataclass
+class RegraLimite:
+    nome: str
+    limite: int
+    # duração da janela, em segundos
+    janela: float
+
+
+class LoginBloqueado(Exception):
+    def __init__(self, espera: int, email: str = ""):
+        super().__init__(f"Tente novamente em {espera} s.")
+        # segundos até a próxima tentativa permitida (cabeçalho Retry-After)
+        self.espera = espera
+        self.email = email
+
+
+class BackendLimite(ABC):
+    # interface dos contadores; um backend compartilhado entre processos (Redis,
+    # por exemplo) pode substituir o local sem mudar o LimitadorLogin
+    @abstractmethod
+    def registrar(self, chave: str, janela: float, agora: float):
+        ...
+
+    @abstractmethod
+    def contar(self, chave: str, janela: float, agora: float) -> float:
+        ...
+
+    @abstractmethod
+    def espera(self, chave: str, janela: float, limite: int, agora: float) -> float:
+        # segundos até contar() ficar abaixo do limite
+        ...
+
+    @abstractmethod
+    def zerar(self, chave: str):
+        ...
+
+    @abstractmethod
+    def tamanho(self) -> int:
+        ...
+
+
+class BackendMemoria(BackendLimite):
+    # janela deslizante aproximada: a contagem da janela fixa atual mais a da anterior,
+    # ponderada pela fração dela que ainda cai na janela; usa memória constante por
+    # chave, e as chaves menos usadas saem quando a capacidade é atingida
+    def __init__(self, capacidade: int = 100_000):
+        self.capacidade = capacidade
+        # chave -> [início da janela atual, contagem atual, contagem anterior]
+        self._itens: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _avancar(item: list, janela: float, agora: float):
+        inicio = agora - agora % janela
+        if item[0] != inicio:
+            item[2] = item[1] if inicio - item[0] == janela else 0
+            item[1] = 0
+            item[0] = inicio
+
+    def registrar(self, chave: str, janela: float, agora: float):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                item = self._itens[chave] = [agora - agora % janela, 0, 0]
+                while len(self._itens) > self.capacidade:
+                    self._itens.popitem(last=False)
+            else:
+                self._itens.move_to_end(chave)
+                self._avancar(item, janela, agora)
+            item[1] += 1
+
+    def contar(self, chave: str, janela: float, agora: float) -> float:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return 0
+            self._avancar(item, janela, agora)
+            return item[1] + item[2] * (1 - (agora % janela) / janela)
+
+    def espera(self, chave: str, janela: float, limite: int, agora: float) -> float:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return 0
+            self._avancar(item, janela, agora)
+            _, atual, anterior = item
+            decorrido = agora % janela
+            if atual < limite:
+                if not anterior:
+                    return 0
+                # o peso da janela anterior cai linearmente: a estimativa de contar()
+                # fica abaixo do limite quando anterior * (1 - fração) < limite - atual
+                return max(0, janela * (1 - (limite - atual) / anterior) - decorrido)
+            # a janela atual sozinha já atinge o limite: só na próxima, quando ela
+            # passa a ser a anterior e o seu peso começa a cair
+            return janela - decorrido + janela * (1 - limite / atual)
+
+    def zerar(self, chave: str):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def tamanho(self) -> int:
+        with self._lock:
+            return len(self._itens)
+
+
+class LimitadorLogin:
+    # por IP contam todas as tentativas; por e-mail, só as que falharam (um login
+    # bem-sucedido zera a contagem do e-mail)
+    def __init__(self, backend: BackendLimite, regraIp: RegraLimite, regraEmail: RegraLimite):
+        self.backend = backend
+        self.regraIp = regraIp
+        self.regraEmail = regraEmail
+        self._lock = threading.Lock()
+        self._contadores = {
+            "permitidas": 0,
+            "bloqueadasIp": 0,
+            "bloqueadasEmail": 0,
+            "falhas": 0,
+            "sucessos": 0,
+        }
+
+    def _contar(self, nome: str):
+        with self._lock:
+            self._contadores[nome] += 1
+
+    def _excedida(self, regra: RegraLimite, chave: str, agora: float) -> int | None:
+        chave = f"{regra.nome}:{chave}"
+        if self.backend.contar(chave, regra.janela, agora) >= regra.limite:
+            espera = self.backend.espera(chave, regra.janela, regra.limite, agora)
+            # no instante exato da espera a estimativa ainda é igual ao limite
+            return math.floor(espera) + 1
+        return None
+
+    def verificar(self, ip: str, email: str) -> int | None:
+        # devolve em quantos segundos tentar de novo, ou None se a tentativa é permitida;
+        # tentativas bloqueadas não contam, para o bloqueio não se prolongar sozinho
+        agora = time.time()
+        espera = self._excedida(self.regraIp, ip, agora)
+        if espera:
+            self._contar("bloqueadasIp")
+            return espera
+        espera = self._excedida(self.regraEmail, email, agora)
+        if espera:
+            self._contar("bloqueadasEmail")
+            return espera
+        self.backend.registrar(f"{self.regraIp.nome}:{ip}", self.regraIp.janela, agora)
+        self._contar("permitidas")
+        return None
+
+    def registrarFalha(self, email: str):
+        self.backend.registrar(f"{self.regraEmail.nome}:{email}", self.regraEmail.janela, time.time())
+        self._contar("falhas")
+
+    def registrarSucesso(self, email: str):
+        self.backend.zerar(f"{self.regraEmail.nome}:{email}")
+        self._contar("sucessos")
+
+    def obterEstatisticas(self) -> dict:
+        with self._lock:
+            return {**self._contadores, "chaves": self.backend.tamanho()}
+
+
+limitadorLogin = LimitadorLogin(
+    BackendMemoria(),
+    RegraLimite(
+        "ip",
+        int(os.getenv("LOGIN_LIMITE_IP", "30")),
+        float(os.getenv("LOGIN_JANELA_IP", "60")),
+    ),
+    RegraLimite(
+        "email",
+        int(os.getenv("LOGIN_LIMITE_EMAIL", "5")),
+        float(os.getenv("LOGIN_JANELA_EMAIL", "300")),
+    ),
+)
+
+
+async def verificar_limite_login(request: Request, email: str = Form("")):
+    # dependência declarada antes das demais na rota de login: a tentativa é recusada
+    # sem consultar o banco (nem a sessão) e sem calcular hash
+    ip = request.client.host if request.client else ""
+    email = email.strip().lower()
+    espera = limitadorLogin.verificar(ip, email)
+    if espera:
+        raise LoginBloqueado(espera, email)
+    # com a fila do bcrypt cheia, descarta a tentativa antes de consultar o banco
+    if servicoSenhas.limitador.saturado():
+        raise SobrecargaSenhas()
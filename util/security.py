@@ -3,23 +3,46 @@ import secrets
 import bcrypt
 from fastapi import Request
 from models.Usuario import Usuario
-from repositories.AlunoRepo import AlunoRepo
+from repositories.AlunoRepoAsync import AlunoRepoAsync
+from util.sessionCache import cacheSessao
 
-def validar_usuario_logado(request: Request) -> Usuario | None:
+async def validar_usuario_logado(request: Request) -> Usuario | None:
     try:
         token = request.cookies["auth_token"]
         if token.strip() == "":
             return None
-        usuario = AlunoRepo.obterUsuarioPorToken(token)
+        usuario = cacheSessao.obter(token)
+        if usuario is None:
+            usuario = await AlunoRepoAsync.obterUsuarioPorToken(token)
+            if usuario:
+                cacheSessao.guardar(token, usuario)
         return usuario
     except KeyError:
         return None    
 
-def obter_hash_senha(senha: str) -> str:
+async def requisicao_de_admin(request: Request) -> bool:
+    # usada pelo MetricasMiddleware para liberar o cabeçalho de depuração de consultas
+    usuario = await validar_usuario_logado(request)
+    return bool(usuario and usuario.admin)
+
+def obter_hash_senha(senha: str, custo: int | None = None) -> str:
     # A função bcrypt.hashpw espera que a senha seja em bytes, por isso usamos .encode()
-    hashed = bcrypt.hashpw(senha.encode(), bcrypt.gensalt())
+    # o custo vem de util.passwordHashing (calibrado); sem ele, vale o padrão do bcrypt
+    sal = bcrypt.gensalt(custo) if custo else bcrypt.gensalt()
+    hashed = bcrypt.hashpw(senha.encode(), sal)
     return hashed.decode()  # Decodificar para obter a string do hash
 
+def obter_hashes_senhas(senhas: list[str], custo: int | None = None) -> list[str]:
+    # usada pela importação em massa: cada processo do pool recebe uma fatia das senhas
+    return [obter_hash_senha(senha, custo) for senha in senhas]
+
+def obter_custo_hash(hash_senha: str) -> int | None:
+    # formato do bcrypt: $2b$<custo>$<sal e hash>
+    try:
+        return int(hash_senha.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
 def verificar_senha(senha: str, hash_senha: str) -> bool:
     try:
         # A função bcrypt.checkpw espera que ambos sejam bytes
@@ -0,0 +1,78 @@
+# util/sessionCache.py
+import threading
+import time
+from collections import OrderedDict
+
+from models.Usuario import Usuario
+
+
+class CacheSessao:
+    def __init__(self, capacidade: int = 1024, validade: float = 60.0):
+        self.capacidade = capacidade
+        # tempo (s) que um usuário fica em cache sem consultar o banco
+        self.validade = validade
+        self._itens: OrderedDict[str, tuple[Usuario, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.invalidacoes = 0
+
+    def obter(self, token: str) -> Usuario | None:
+        with self._lock:
+            item = self._itens.get(token)
+            if item is None:
+                self.faltas += 1
+                return None
+            usuario, expiraEm = item
+            if expiraEm < time.monotonic():
+                del self._itens[token]
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(token)
+            self.acertos += 1
+            return usuario
+
+    def guardar(self, token: str, usuario: Usuario):
+        with self._lock:
+            self._itens[token] = (usuario, time.monotonic() + self.validade)
+            self._itens.move_to_end(token)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def _invalidarSe(self, condicao):
+        with self._lock:
+            tokens = [t for t, (u, _) in self._itens.items() if condicao(t, u)]
+            for token in tokens:
+                del self._itens[token]
+            self.invalidacoes += len(tokens)
+
+    def invalidarToken(self, token: str):
+        self._invalidarSe(lambda t, u: t == token)
+
+    def invalidarUsuario(self, id: int):
+        self._invalidarSe(lambda t, u: u.id == id)
+
+    def invalidarUsuarios(self, ids: set[int]):
+        # uma passada só pelo cache, para as invalidações vindas de outros trabalhadores
+        self._invalidarSe(lambda t, u: u.id in ids)
+
+    def invalidarEmail(self, email: str):
+        self._invalidarSe(lambda t, u: u.email == email)
+
+    def limpar(self):
+        with self._lock:
+            self.invalidacoes += len(self._itens)
+            self._itens.clear()
+
+    def obterEstatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+cacheSessao = CacheSessao()
@@ -0,0 +1,27 @@
+# util/startupLock.py
+# com vários trabalhadores, cada processo importa main.py e executa a inicialização
+# (tabelas, migrações, calibração do bcrypt, compilação dos estáticos); o bloqueio de
+# arquivo faz com que um processo por vez a execute, e os seguintes encontram tudo pronto
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem flock, o que só é seguro com um trabalhador
+    fcntl = None
+
+from util.Database import Database
+
+
+@contextmanager
+def bloqueio_inicializacao(caminho: str | None = None):
+    caminho = caminho or f"{Database.caminho}.lock"
+    if fcntl is None:
+        yield
+        return
+    with open(caminho, "a") as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
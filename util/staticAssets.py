@@ -0,0 +1,178 @@
+# util/staticAssets.py
+# arquivos estáticos com o hash do conteúdo no nome (nome.hash.ext) e versões pré-comprimidas
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    # sem o pacote brotli, só as versões .gz são geradas
+    brotli = None
+
+
+PASTA_ORIGEM = "static"
+PASTA_COMPILADA = "static_build"
+URL_BASE = "/static"
+EXTENSOES_COMPRIMIVEIS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".ttf", ".eot"}
+# arquivos menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 1024
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+# gravado em PASTA_COMPILADA, mas não é servido: muda a cada compilação
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+logger = logging.getLogger(__name__)
+
+_manifesto: dict[str, str] = {}
+# arquivos pedidos fora do manifesto, avisados uma vez só
+_ausentes: set[str] = set()
+_lock = threading.Lock()
+
+
+def _gravar_atomicamente(caminho: str, conteudo: bytes):
+    # vários trabalhadores podem compilar ao mesmo tempo: grava em temporário e renomeia
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix=".tmp-")
+    with os.fdopen(descritor, "wb") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def nome_versionado(caminhoRelativo: str, conteudo: bytes) -> str:
+    base, extensao = os.path.splitext(caminhoRelativo)
+    resumo = hashlib.blake2b(conteudo, digest_size=6).hexdigest()
+    return f"{base}.{resumo}{extensao}"
+
+
+def compilar_arquivo(caminhoRelativo: str, origem: str = PASTA_ORIGEM, destino: str = PASTA_COMPILADA) -> str:
+    # copia o arquivo com o hash no nome e grava as versões .gz e .br ao lado;
+    # o nome muda com o conteúdo, então um arquivo já compilado não precisa ser refeito
+    with open(os.path.join(origem, caminhoRelativo), "rb") as f:
+        conteudo = f.read()
+    versionado = nome_versionado(caminhoRelativo, conteudo)
+    caminho = os.path.join(destino, versionado)
+    if not os.path.exists(caminho):
+        extensao = os.path.splitext(caminhoRelativo)[1].lower()
+        if extensao in EXTENSOES_COMPRIMIVEIS and len(conteudo) >= TAMANHO_MINIMO_COMPRESSAO:
+            comprimidos = {".gz": gzip.compress(conteudo, 9, mtime=0)}
+            if brotli is not None:
+                comprimidos[".br"] = brotli.compress(conteudo, quality=11)
+            for sufixo, comprimido in comprimidos.items():
+                if len(comprimido) < len(conteudo):
+                    _gravar_atomicamente(caminho + sufixo, comprimido)
+        # o arquivo principal por último: sua existência indica que a compilação terminou
+        _gravar_atomicamente(caminho, conteudo)
+    return versionado
+
+
+def compilar_estaticos(origem: str = PASTA_ORIGEM, destino: str = PASTA_COMPILADA) -> dict[str, str]:
+    manifesto = {}
+    for pasta, _, arquivos in os.walk(origem):
+        for arquivo in arquivos:
+            relativo = os.path.relpath(os.path.join(pasta, arquivo), origem).replace(os.sep, "/")
+            manifesto[relativo] = compilar_arquivo(relativo, origem, destino)
+    _gravar_atomicamente(
+        os.path.join(destino, ARQUIVO_MANIFESTO),
+        json.dumps(manifesto, indent=0, sort_keys=True).encode(),
+    )
+    with _lock:
+        _manifesto.clear()
+        _manifesto.update(manifesto)
+    return manifesto
+
+
+def registrar_estaticos(caminhos: list[str], origem: str = PASTA_ORIGEM) -> list[str]:
+    # compila arquivos criados depois da inicialização (as variantes das imagens
+    # enviadas) e os inclui no manifesto deste trabalhador; faz E/S e compressão,
+    # então deve rodar fora do loop de eventos
+    relativos = [
+        os.path.relpath(caminho, origem).replace(os.sep, "/") for caminho in caminhos
+    ]
+    versionados = {relativo: compilar_arquivo(relativo, origem) for relativo in relativos}
+    with _lock:
+        _manifesto.update(versionados)
+        _ausentes.difference_update(versionados)
+    return list(versionados.values())
+
+
+def existe_estatico(caminhoRelativo: str) -> bool:
+    caminhoRelativo = caminhoRelativo.lstrip("/")
+    with _lock:
+        if caminhoRelativo in _manifesto:
+            return True
+    return os.path.isfile(os.path.join(PASTA_ORIGEM, caminhoRelativo))
+
+
+def url_estatico(caminhoRelativo: str) -> str:
+    # global do Jinja: {{ url_estatico('css/estilos.css') }} -> /static/css/estilos.<hash>.css;
+    # roda durante a renderização, então só consulta o manifesto: um arquivo fora dele
+    # sai sem versão (servido da pasta de origem, sempre revalidado)
+    caminhoRelativo = caminhoRelativo.lstrip("/")
+    with _lock:
+        versionado = _manifesto.get(caminhoRelativo)
+        if versionado is None:
+            avisar = caminhoRelativo not in _ausentes
+            _ausentes.add(caminhoRelativo)
+    if versionado is None:
+        if avisar:
+            logger.warning(f"Arquivo estático fora do manifesto, servido sem versão: {caminhoRelativo}")
+        return f"{URL_BASE}/{caminhoRelativo}"
+    return f"{URL_BASE}/{versionado}"
+
+
+def codificacoes_aceitas(cabecalho: str) -> set[str]:
+    aceitas = set()
+    for item in cabecalho.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        if parametros.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+class ArquivosEstaticos(StaticFiles):
+    # serve os arquivos versionados de PASTA_COMPILADA como imutáveis, preferindo .br ou .gz
+    # conforme o Accept-Encoding; os demais vêm da pasta de origem e são sempre revalidados
+    def __init__(self, directory: str = PASTA_ORIGEM, compilados: str = PASTA_COMPILADA, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.compilados = compilados
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        caminho = os.path.realpath(os.path.join(self.compilados, path))
+        pastaCompilada = os.path.realpath(self.compilados)
+        dentro = caminho.startswith(pastaCompilada + os.sep)
+        if caminho == os.path.join(pastaCompilada, ARQUIVO_MANIFESTO):
+            # o manifesto é interno: a busca segue na pasta de origem, onde ele não existe
+            dentro = False
+        if not dentro or path.endswith((".gz", ".br")) or not os.path.isfile(caminho):
+            resposta = await super().get_response(path, scope)
+            resposta.headers.setdefault("cache-control", CACHE_REVALIDAR)
+            return resposta
+
+        cabecalhos = Headers(scope=scope)
+        aceitas = codificacoes_aceitas(cabecalhos.get("accept-encoding", ""))
+        tipo = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        respostaCabecalhos = {"cache-control": CACHE_IMUTAVEL, "vary": "Accept-Encoding"}
+        arquivo = caminho
+        for codificacao, sufixo in (("br", ".br"), ("gzip", ".gz")):
+            if codificacao in aceitas and os.path.isfile(caminho + sufixo):
+                arquivo = caminho + sufixo
+                respostaCabecalhos["content-encoding"] = codificacao
+                break
+        resposta = FileResponse(
+            arquivo, stat_result=os.stat(arquivo), media_type=tipo, headers=respostaCabecalhos
+        )
+        if self.is_not_modified(resposta.headers, cabecalhos):
+            return NotModifiedResponse(resposta.headers)
+        return resposta
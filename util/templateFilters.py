@@ -1,4 +1,6 @@
 # util/templateFilters.py
+from util.images import VARIANTES
+from util.staticAssets import existe_estatico, url_estatico
 
 def formatarData(dataStr: str) -> str:
     if dataStr is None:
@@ -6,18 +8,32 @@ def formatarData(dataStr: str) -> str:
     ano, mes, dia = dataStr.split('-')
     return f"{dia}/{mes}/{ano}"
 
-def formatarIdParaImagem(id: str) -> str:
+def formatarIdParaImagem(id: str, variante: str = "") -> str:
     if not id:
         return ""
     formatado = f"{id:0{4}}"
+    if variante:
+        formatado = f"{formatado}-{variante}"
     return formatado
 
+def formatarSrcsetImagem(id: str, formato: str = "jpg") -> str:
+    # card e retina são as variantes que cabem nos cards da página inicial; imagens
+    # pequenas não geram as variantes maiores, que então ficam de fora
+    if not id:
+        return ""
+    caminhos = [
+        (f"img/projetos/{formatarIdParaImagem(id, variante)}.{formato}", VARIANTES[variante])
+        for variante in ("card", "retina")
+    ]
+    return ", ".join(
+        f"{url_estatico(caminho)} {largura}w" for caminho, largura in caminhos if existe_estatico(caminho)
+    )
+
+PALAVRAS_IGNORADAS = frozenset(['de', 'da', 'do', 'di', 'das', 'com', 'dos'])
+
 def capitalizar_nome_proprio(nome: str) -> str:
-    nome = nome.lower()
-    ignoradas = ['de', 'da', 'do', 'di', 'das', 'com', 'dos']    
-    palavras = nome.split()    
     palavras_capitalizadas = [
-        palavra.capitalize() if palavra.lower() not in ignoradas else palavra.lower()
-        for palavra in palavras
+        palavra if palavra in PALAVRAS_IGNORADAS else palavra.capitalize()
+        for palavra in nome.lower().split()
     ]
     return ' '.join(palavras_capitalizadas)
@@ -0,0 +1,45 @@
+# util/templates.py
+# ambiente Jinja2 único, compartilhado pelas rotas e pelo tratamento de exceções
+import os
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from util.images import FORMATOS_ALTERNATIVOS, TIPOS_MIME
+from util.staticAssets import url_estatico
+from util.templateFilters import formatarData, formatarIdParaImagem, formatarSrcsetImagem
+
+
+PASTA_TEMPLATES = "templates"
+# bytecode dos templates compilados, reaproveitado entre reinícios e trabalhadores
+PASTA_CACHE_BYTECODE = ".jinja_cache"
+# em produção os templates não mudam: sem auto_reload, o Jinja não consulta o disco
+# a cada renderização; TEMPLATES_RECARREGAR=1 reativa a recarga durante o desenvolvimento
+RECARREGAR = os.getenv("TEMPLATES_RECARREGAR", "0") == "1"
+
+os.makedirs(PASTA_CACHE_BYTECODE, exist_ok=True)
+
+# o ambiente é montado aqui e entregue pronto ao Starlette (env=), sem as opções
+# repassadas pelo construtor do Jinja2Templates
+ambiente = Environment(
+    loader=FileSystemLoader(PASTA_TEMPLATES),
+    autoescape=True,
+    auto_reload=RECARREGAR,
+    bytecode_cache=FileSystemBytecodeCache(PASTA_CACHE_BYTECODE),
+    # todos os templates ficam em memória depois de precompilar_templates
+    cache_size=-1,
+)
+templates = Jinja2Templates(env=ambiente)
+templates.env.filters["date"] = formatarData
+templates.env.filters["id_img"] = formatarIdParaImagem
+templates.env.filters["srcset_img"] = formatarSrcsetImagem
+templates.env.globals["url_estatico"] = url_estatico
+templates.env.globals["formatos_img"] = [(f, TIPOS_MIME[f]) for f in FORMATOS_ALTERNATIVOS]
+
+
+def precompilar_templates() -> int:
+    # carrega todos os templates na inicialização, e não na primeira requisição de cada um
+    nomes = templates.env.list_templates(extensions=["html"])
+    for nome in nomes:
+        templates.env.get_template(nome)
+    return len(nomes)
@@ -0,0 +1,117 @@
+# util/uploads.py
+import os
+import shutil
+import tempfile
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# limite do arquivo de imagem e do corpo da requisição que o envia (a imagem mais os campos)
+TAMANHO_MAXIMO_IMAGEM = 5 * 1024 * 1024
+TAMANHO_MAXIMO_CORPO = TAMANHO_MAXIMO_IMAGEM + 256 * 1024
+# limite do corpo das importações em CSV/JSON, lidas em blocos (util/bulkData.py)
+TAMANHO_MAXIMO_IMPORTACAO = 50 * 1024 * 1024
+# limite das demais requisições, que só trazem campos de formulário
+TAMANHO_MAXIMO_FORMULARIO = 1024 * 1024
+TAMANHO_BLOCO = 64 * 1024
+# bytes lidos para reconhecer o formato pela assinatura
+TAMANHO_ASSINATURA = 16
+# assinaturas dos formatos aceitos, verificadas no primeiro bloco do arquivo
+ASSINATURAS_IMAGEM = {
+    "jpg": [b"\xff\xd8\xff"],
+    "png": [b"\x89PNG\r\n\x1a\n"],
+    "gif": [b"GIF87a", b"GIF89a"],
+    "webp": [b"RIFF"],
+}
+
+
+class ErroUpload(Exception):
+    pass
+
+
+def identificar_imagem(cabecalho: bytes) -> str | None:
+    for formato, assinaturas in ASSINATURAS_IMAGEM.items():
+        if any(cabecalho.startswith(assinatura) for assinatura in assinaturas):
+            if formato == "webp" and cabecalho[8:12] != b"WEBP":
+                continue
+            return formato
+    return None
+
+
+async def receber_imagem(
+    arquivo: UploadFile, tamanhoMaximo: int = TAMANHO_MAXIMO_IMAGEM
+) -> str:
+    # valida o upload no próprio arquivo em que o Starlette o recebeu e o copia em
+    # blocos para um arquivo temporário, cujo caminho é devolvido: só o caminho vai
+    # para o pool de processos. Quem chama deve remover o arquivo (remover_temporario)
+    cabecalho = await arquivo.read(TAMANHO_ASSINATURA)
+    if not cabecalho:
+        raise ErroUpload("Nenhuma imagem foi enviada.")
+    formato = identificar_imagem(cabecalho)
+    if formato is None:
+        raise ErroUpload("O arquivo enviado não é uma imagem JPG, PNG, GIF ou WEBP.")
+    tamanho = arquivo.size
+    if tamanho is None:
+        tamanho = arquivo.file.seek(0, os.SEEK_END)
+    if tamanho > tamanhoMaximo:
+        raise ErroUpload(f"A imagem deve ter no máximo {tamanhoMaximo // (1024 * 1024)} MB.")
+    await arquivo.seek(0)
+    destino = tempfile.NamedTemporaryFile(prefix="upload-", suffix=f".{formato}", delete=False)
+    try:
+        with destino:
+            await run_in_threadpool(shutil.copyfileobj, arquivo.file, destino, TAMANHO_BLOCO)
+    except BaseException:
+        remover_temporario(destino.name)
+        raise
+    return destino.name
+
+
+def remover_temporario(caminho: str | None):
+    if caminho:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+class LimiteCorpoMiddleware:
+    # recusa corpos maiores que o limite enquanto chegam, antes que o formulário
+    # inteiro seja lido e gravado pelo parser de multipart; limitesPorRota dá um
+    # limite próprio (caminho exato) às rotas que recebem arquivos
+    def __init__(
+        self,
+        app: ASGIApp,
+        tamanhoMaximo: int = TAMANHO_MAXIMO_FORMULARIO,
+        limitesPorRota: dict[str, int] | None = None,
+    ):
+        self.app = app
+        self.tamanhoMaximo = tamanhoMaximo
+        self.limitesPorRota = limitesPorRota or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tamanhoMaximo = self.limitesPorRota.get(scope["path"], self.tamanhoMaximo)
+        tamanhoDeclarado = dict(scope["headers"]).get(b"content-length")
+        if tamanhoDeclarado and tamanhoDeclarado.isdigit() and int(tamanhoDeclarado) > tamanhoMaximo:
+            resposta = PlainTextResponse(
+                "Requisição grande demais.", status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+            await resposta(scope, receive, send)
+            return
+        recebidos = 0
+
+        async def receber_limitado() -> Message:
+            nonlocal recebidos
+            mensagem = await receive()
+            if mensagem["type"] == "http.request":
+                recebidos += len(mensagem.get("body", b""))
+                if recebidos > tamanhoMaximo:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return mensagem
+
+        await self.app(scope, receber_limitado, send)
@@ -2,6 +2,35 @@ import re
 from typing import Any
 
 
+# padrões compilados uma única vez, na importação; usados pelas funções abaixo e
+# pelas regras dos esquemas de formulário (util/formSchema.py)
+PADRAO_EMAIL = re.compile(
+    r"^[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$"
+)
+PADRAO_CPF = re.compile(r"^\d{3}\.\d{3}\.\d{3}-\d{2}$")
+PADRAO_CNPJ = re.compile(r"^\d{2}\.\d{3}\.\d{3}\/\d{4}-\d{2}$")
+PADRAO_TELEFONE = re.compile(r"^\(\d{2}\)\d{4,5}-\d{4}$")
+PADRAO_CEP = re.compile(r"^\d{5}-\d{3}$")
+PADRAO_NOME = re.compile(r"^[a-zA-ZÀ-ú']{2,40}$")
+PADRAO_NOME_COMPLETO = re.compile(r"^[a-zA-ZÀ-ú']{2,40}(?:\s[a-zA-ZÀ-ú']{2,40})+$")
+PADRAO_NOME_PROJETO = re.compile(r"^[\w]+(\s[\w]+)*$")
+PADRAO_SENHA = re.compile(
+    r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{4,64}$"
+)
+
+MENSAGEM_VAZIO = "O valor deste campo não pode ser vazio."
+MENSAGEM_FORMATO = "O valor deste campo está com o formato incorreto."
+MENSAGEM_EMAIL = "O valor deste campo deve ser um e-mail com formato válido."
+MENSAGEM_CPF = "O valor deste campo deve ser um CPF válido."
+MENSAGEM_CNPJ = "O valor deste campo deve ser um CNPJ válido."
+MENSAGEM_TELEFONE = "O valor deste campo deve ser um telefone válido."
+MENSAGEM_CEP = "O valor deste campo deve ser um CEP válido."
+MENSAGEM_NOME = "O valor deste campo deve ser um nome válido."
+MENSAGEM_NOME_COMPLETO = "O valor deste campo deve ser um nome completo válido."
+MENSAGEM_SENHA = "O valor deste campo deve ser uma senha válida entre 4 e 64 caracteres, contendo caracteres maiúsculos, minúsculos, dígitos e caracteres especiais (@$!%*?&)."
+MENSAGEM_SELECAO = "Selecione uma opção para este campo."
+
+
 def add_error(self_name: str, msg: str, errors: dict) -> bool:
     if errors.get(self_name) is None:
         errors[self_name] = []
@@ -32,7 +61,7 @@ def is_not_empty(self: str, self_name: str, errors: dict) -> bool:
     if self.strip() != "":
         return True
     else:
-        add_error(self_name, f"O valor deste campo não pode ser vazio.", errors)
+        add_error(self_name, MENSAGEM_VAZIO, errors)
         return False
 
 
@@ -70,89 +99,77 @@ def is_min_size(self: str, self_name: str, min_size: int, errors: dict) -> bool:
         return False
 
 
-def is_matching_regex(self: str, self_name: str, regex: str, errors: dict) -> bool:
+def is_matching_regex(
+    self: str, self_name: str, regex: str | re.Pattern, errors: dict
+) -> bool:
     if re.match(regex, self) is not None:
         return True
     else:
-        add_error(
-            self_name, "O valor deste campo está com o formato incorreto.", errors
-        )
+        add_error(self_name, MENSAGEM_FORMATO, errors)
         return False
 
 
 def is_email(self: str, self_name: str, errors: dict) -> bool:
-    if (
-        re.match(
-            r"^[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$",
-            self,
-        )
-        is not None
-    ):
+    if PADRAO_EMAIL.match(self) is not None:
         return True
     else:
-        add_error(
-            self_name,
-            "O valor deste campo deve ser um e-mail com formato válido.",
-            errors,
-        )
+        add_error(self_name, MENSAGEM_EMAIL, errors)
         return False
 
 
 def is_cpf(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^\d{3}\.\d{3}\.\d{3}-\d{2}$", self) is not None:
+    if PADRAO_CPF.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um CPF válido.", errors)
+        add_error(self_name, MENSAGEM_CPF, errors)
         return False
 
 
 def is_cnpj(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^\d{2}\.\d{3}\.\d{3}\/\d{4}-\d{2}$", self) is not None:
+    if PADRAO_CNPJ.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um CNPJ válido.", errors)
+        add_error(self_name, MENSAGEM_CNPJ, errors)
         return False
 
 
 def is_phone_number(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^\(\d{2}\)\d{4,5}-\d{4}$", self) is not None:
+    if PADRAO_TELEFONE.match(self) is not None:
         return True
     else:
-        add_error(
-            self_name, "O valor deste campo deve ser um telefone válido.", errors
-        )
+        add_error(self_name, MENSAGEM_TELEFONE, errors)
         return False
 
 
 def is_cep(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^\d{5}-\d{3}$", self) is not None:
+    if PADRAO_CEP.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um CEP válido.", errors)
+        add_error(self_name, MENSAGEM_CEP, errors)
         return False
 
 
 def is_person_name(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^[a-zA-ZÀ-ú']{2,40}$", self) is not None:
+    if PADRAO_NOME.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um nome válido.", errors)
+        add_error(self_name, MENSAGEM_NOME, errors)
         return False
 
 
 def is_person_fullname(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^[a-zA-ZÀ-ú']{2,40}(?:\s[a-zA-ZÀ-ú']{2,40})+$", self) is not None:
+    if PADRAO_NOME_COMPLETO.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um nome completo válido.", errors)
+        add_error(self_name, MENSAGEM_NOME_COMPLETO, errors)
         return False
     
     
 def is_project_name(self: str, self_name: str, errors: dict) -> bool:
-    if re.match(r"^[\w]+(\s[\w]+)*$", self) is not None:
+    if PADRAO_NOME_PROJETO.match(self) is not None:
         return True
     else:
-        add_error(self_name, "O valor deste campo deve ser um nome válido.", errors)
+        add_error(self_name, MENSAGEM_NOME, errors)
         return False
 
 
@@ -164,20 +181,10 @@ def is_password(self: str, self_name: str, errors: dict) -> bool:
     Tenha pelo menos um caractere especial dentre os especificados (@$!%*?&).
     Tenha um comprimento de pelo menos 4 e no máximo 64 caracteres.
     """
-    if (
-        re.match(
-            r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{4,64}$",
-            self,
-        )
-        is not None
-    ):
+    if PADRAO_SENHA.match(self) is not None:
         return True
     else:
-        add_error(
-            self_name,
-            "O valor deste campo deve ser uma senha válida entre 4 e 64 caracteres, contendo caracteres maiúsculos, minúsculos, dígitos e caracteres especiais (@$!%*?&).",
-            errors,
-        )
+        add_error(self_name, MENSAGEM_SENHA, errors)
         return False
 
 
@@ -213,7 +220,7 @@ def is_selected_id_valid(self: int, self_name: str, errors: dict) -> bool:
     if self > 0:
         return True
     else:
-        add_error(self_name, f"Selecione uma opção para este campo.", errors)
+        add_error(self_name, MENSAGEM_SELECAO, errors)
         return False
 
 